@@ -1,8 +1,9 @@
 # booking/admin.py
 
 from django.contrib import admin
+from django.utils import timezone
 from django.utils.html import format_html
-from .models import Cart, CartItem, Order, OrderItem, Ticket, GuestCheckout
+from .models import Cart, CartItem, Order, OrderItem, ScannerDevice, Ticket, GuestCheckout
 
 
 @admin.register(Cart)
@@ -12,13 +13,19 @@ class CartAdmin(admin.ModelAdmin):
     search_fields = ['session_key']
     readonly_fields = ['session_key', 'total_items', 'total_price']
     
+    def get_queryset(self, request):
+        # Totals come from one aggregate per page instead of a query per cart
+        return super().get_queryset(request).with_totals()
+    
     def total_items(self, obj):
         return obj.total_items
     total_items.short_description = 'Total Items'
+    total_items.admin_order_field = 'annotated_total_items'
     
     def total_price(self, obj):
         return f'£{obj.total_price:.2f}'
     total_price.short_description = 'Total Price'
+    total_price.admin_order_field = 'annotated_total_price'
 
 
 class CartItemInline(admin.TabularInline):
@@ -112,6 +119,7 @@ class TicketAdmin(admin.ModelAdmin):
     list_filter = ['is_used', 'order_item__event', 'order_item__ticket_type', 'order_item__order__created_at']
     search_fields = ['ticket_number', 'order_item__order__order_number', 'order_item__event__title']
     readonly_fields = ['ticket_number', 'qr_code_preview_large', 'order_item', 'is_used', 'used_at']
+    list_select_related = ['order_item__event', 'order_item__ticket_type', 'order_item__order']
     
     fieldsets = (
         ('Ticket Information', {
@@ -135,23 +143,18 @@ class TicketAdmin(admin.ModelAdmin):
     order_display.short_description = 'Order'
     
     def qr_code_preview(self, obj):
-        if obj.qr_code:
-            return format_html('<img src="data:image/png;base64,{}" width="50" height="50" />', obj.qr_code)
-        return '-'
+        return format_html('<img src="{}" width="50" height="50" loading="lazy" />', obj.qr_url)
     qr_code_preview.short_description = 'QR Code'
     
     def qr_code_preview_large(self, obj):
-        if obj.qr_code:
-            return format_html('<img src="data:image/png;base64,{}" width="200" height="200" />', obj.qr_code)
-        return 'No QR code generated'
+        return format_html('<img src="{}" width="200" height="200" />', obj.qr_url)
     qr_code_preview_large.short_description = 'QR Code'
     
     actions = ['mark_as_used', 'mark_as_unused', 'regenerate_qr_codes']
     
     def mark_as_used(self, request, queryset):
-        for ticket in queryset:
-            ticket.mark_as_used()
-        self.message_user(request, f'{queryset.count()} tickets marked as used.')
+        count = queryset.filter(is_used=False).update(is_used=True, used_at=timezone.now())
+        self.message_user(request, f'{count} tickets marked as used.')
     mark_as_used.short_description = 'Mark selected tickets as used'
     
     def mark_as_unused(self, request, queryset):
@@ -160,12 +163,25 @@ class TicketAdmin(admin.ModelAdmin):
     mark_as_unused.short_description = 'Mark selected tickets as unused'
     
     def regenerate_qr_codes(self, request, queryset):
-        for ticket in queryset:
-            ticket.generate_qr_code()
-        self.message_user(request, f'QR codes regenerated for {queryset.count()} tickets.')
+        from .qr import QRCache
+        from .ticket_codes import scan_codes
+        count = QRCache.render_many(scan_codes(queryset), force=True)
+        self.message_user(request, f'QR codes regenerated for {count} tickets.')
     regenerate_qr_codes.short_description = 'Regenerate QR codes'
 
 
+@admin.register(ScannerDevice)
+class ScannerDeviceAdmin(admin.ModelAdmin):
+    # Keys are issued with the issue_scanner_key command; untick is_active to revoke one
+    list_display = ['name', 'user', 'is_active', 'created_at']
+    list_filter = ['is_active']
+    search_fields = ['name', 'user__username']
+    readonly_fields = ['user', 'created_at']
+
+    def has_add_permission(self, request):
+        return False
+
+
 @admin.register(GuestCheckout)
 class GuestCheckoutAdmin(admin.ModelAdmin):
     list_display = ['email', 'order', 'created_account', 'created_at']
@@ -4,3 +4,8 @@ from django.apps import AppConfig
 class BookingConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'booking'
+
+    def ready(self):
+        # Scanner devices can't verify manifests without their own secret, so fail fast
+        from .gate_manifest import signing_secret
+        signing_secret()
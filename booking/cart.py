@@ -0,0 +1,127 @@
+# booking/cart.py
+"""The visitor's cart, independent of where it is stored."""
+
+from decimal import Decimal
+
+from django.utils.functional import cached_property
+
+from event_management.models import TicketType
+
+from .cart_storage import get_cart_storage
+
+COUNT_SESSION_KEY = 'cart_items_count'
+
+
+class CartLine:
+    """One ticket type in a cart"""
+
+    def __init__(self, ticket_type, quantity):
+        self.ticket_type = ticket_type
+        self.event = ticket_type.event
+        self.quantity = quantity
+
+    @property
+    def id(self):
+        return self.ticket_type.pk
+
+    @property
+    def subtotal(self):
+        return self.quantity * self.ticket_type.price
+
+    @property
+    def total_price(self):
+        """Alias for subtotal for compatibility"""
+        return self.subtotal
+
+
+class SessionCart:
+    """Cart for the current session"""
+
+    def __init__(self, request, storage=None):
+        self.request = request
+        self.storage = storage or get_cart_storage()
+
+    @property
+    def session_key(self):
+        return self.request.session.session_key
+
+    def ensure_session_key(self):
+        """The session key, creating the session first if needed (before any write)"""
+        if not self.request.session.session_key:
+            self.request.session.create()
+        return self.request.session.session_key
+
+    def _changed(self):
+        """Drop loaded items and store the new count after a mutation"""
+        for name in ('items', 'total_price'):
+            self.__dict__.pop(name, None)
+        self.request.session[COUNT_SESSION_KEY] = self.total_items
+
+    @cached_property
+    def lines(self):
+        """``{ticket_type_id: quantity}``"""
+        if not self.session_key:
+            return {}
+        return self.storage.get_lines(self.session_key)
+
+    @cached_property
+    def items(self):
+        """``CartLine``s, newest ticket type first; lines for deleted ticket types are skipped"""
+        lines = self.lines
+        if not lines:
+            return []
+        ticket_types = TicketType.objects.select_related('event').filter(pk__in=lines).order_by('-pk')
+        return [CartLine(ticket_type, lines[ticket_type.pk]) for ticket_type in ticket_types]
+
+    def __iter__(self):
+        return iter(self.items)
+
+    def __len__(self):
+        return len(self.lines)
+
+    def quantity_of(self, ticket_type):
+        return self.lines.get(getattr(ticket_type, 'pk', ticket_type), 0)
+
+    @property
+    def total_items(self):
+        return sum(self.lines.values())
+
+    @property
+    def items_count(self):
+        """``total_items`` as last stored in the session, read from storage only once per session"""
+        if not self.session_key:
+            return 0
+        count = self.request.session.get(COUNT_SESSION_KEY)
+        if count is None:
+            count = self.request.session[COUNT_SESSION_KEY] = self.total_items
+        return count
+
+    @cached_property
+    def total_price(self):
+        return sum((item.subtotal for item in self.items), Decimal('0.00'))
+
+    def set_quantity(self, ticket_type, quantity):
+        """Set how many of ``ticket_type`` are in the cart; zero removes the line"""
+        ticket_type_id = getattr(ticket_type, 'pk', ticket_type)
+        self.storage.set_quantity(self.ensure_session_key(), ticket_type_id, quantity)
+        if quantity > 0:
+            self.lines[ticket_type_id] = quantity
+        else:
+            self.lines.pop(ticket_type_id, None)
+        self._changed()
+
+    def remove(self, ticket_type):
+        if not self.session_key:
+            return
+        ticket_type_id = getattr(ticket_type, 'pk', ticket_type)
+        self.storage.remove(self.session_key, ticket_type_id)
+        self.lines.pop(ticket_type_id, None)
+        self._changed()
+
+    def clear(self):
+        """Clear all items from cart"""
+        if not self.session_key:
+            return
+        self.storage.clear(self.session_key)
+        self.lines = {}
+        self._changed()
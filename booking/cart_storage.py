@@ -0,0 +1,114 @@
+# booking/cart_storage.py
+"""Cart storage backends, selected with the CART_STORAGE setting."""
+
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from django.utils.module_loading import import_string
+
+from event_management.models import TicketType
+
+from .models import Cart, CartItem
+
+
+class CartStorage:
+    """Interface every cart backend implements"""
+
+    def get_lines(self, key):
+        """``{ticket_type_id: quantity}`` for the cart stored under ``key``"""
+        raise NotImplementedError
+
+    def set_quantity(self, key, ticket_type_id, quantity):
+        """Set the line's quantity; zero or less removes it"""
+        raise NotImplementedError
+
+    def remove(self, key, ticket_type_id):
+        raise NotImplementedError
+
+    def clear(self, key):
+        raise NotImplementedError
+
+
+class DatabaseCartStorage(CartStorage):
+    """Carts as ``Cart``/``CartItem`` rows"""
+
+    def get_lines(self, key):
+        return dict(
+            CartItem.objects.filter(cart__session_key=key).values_list('ticket_type_id', 'quantity')
+        )
+
+    def set_quantity(self, key, ticket_type_id, quantity):
+        if quantity <= 0:
+            return self.remove(key, ticket_type_id)
+        cart, _ = Cart.objects.get_or_create(session_key=key)
+        updated = CartItem.objects.filter(cart=cart, ticket_type_id=ticket_type_id).update(quantity=quantity)
+        if not updated:
+            event_id = TicketType.objects.values_list('event_id', flat=True).get(pk=ticket_type_id)
+            CartItem.objects.update_or_create(
+                cart=cart, ticket_type_id=ticket_type_id,
+                defaults={'event_id': event_id, 'quantity': quantity},
+            )
+
+    def remove(self, key, ticket_type_id):
+        CartItem.objects.filter(cart__session_key=key, ticket_type_id=ticket_type_id).delete()
+
+    def clear(self, key):
+        CartItem.objects.filter(cart__session_key=key).delete()
+
+
+class RedisCartStorage(CartStorage):
+    """
+    Carts as Redis hashes (``<prefix><session key>`` -> ticket type id ->
+    quantity). Every write refreshes the expiry, so a cart lives as long as
+    an active session would.
+    """
+
+    def __init__(self, client=None, prefix=None, timeout=None):
+        if client is None:
+            import redis
+            client = redis.Redis.from_url(settings.CART_REDIS_URL)
+        self.client = client
+        self.prefix = prefix or getattr(settings, 'CART_REDIS_PREFIX', 'cart:')
+        self.timeout = timeout or settings.SESSION_COOKIE_AGE
+
+    def _key(self, key):
+        return f'{self.prefix}{key}'
+
+    def get_lines(self, key):
+        return {
+            int(ticket_type_id): int(quantity)
+            for ticket_type_id, quantity in self.client.hgetall(self._key(key)).items()
+            if int(quantity) > 0
+        }
+
+    def set_quantity(self, key, ticket_type_id, quantity):
+        if quantity <= 0:
+            return self.remove(key, ticket_type_id)
+        pipe = self.client.pipeline()
+        pipe.hset(self._key(key), ticket_type_id, quantity)
+        pipe.expire(self._key(key), self.timeout)
+        pipe.execute()
+
+    def remove(self, key, ticket_type_id):
+        self.client.hdel(self._key(key), ticket_type_id)
+
+    def clear(self, key):
+        self.client.delete(self._key(key))
+
+
+_storage = None
+
+
+def get_cart_storage():
+    """The configured cart backend, created on first use"""
+    global _storage
+    if _storage is None:
+        _storage = import_string(settings.CART_STORAGE)()
+    return _storage
+
+
+@receiver(setting_changed)
+def _reset_cart_storage(setting, **kwargs):
+    global _storage
+    if setting.startswith('CART_'):
+        _storage = None
@@ -0,0 +1,231 @@
+# booking/gate_manifest.py
+"""Signed offline gate manifests for scanner devices, and merging of their used-ticket uploads."""
+
+import base64
+import bisect
+import hashlib
+import json
+import math
+import struct
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import ImproperlyConfigured
+from django.db import transaction
+from django.db.models import Case, DateTimeField, Value, When
+from django.utils import timezone
+from django.utils.crypto import constant_time_compare, salted_hmac
+from django.utils.dateparse import parse_datetime
+
+from . import ticket_codes
+from .models import Ticket
+
+FORMAT_VERSION = 1
+KEY_SALT = 'booking.gate_manifest'
+BLOOM_FALSE_POSITIVE_RATE = 0.001
+
+ALREADY_USED = 'already_used'
+DUPLICATE = 'duplicate'
+UNKNOWN = 'unknown'
+
+
+def code_hash(code):
+    """The 8-byte hash a manifest stores for ``code``"""
+    return struct.unpack('>Q', hashlib.sha256(code.encode()).digest()[:8])[0]
+
+
+def _bloom_positions(code, bits, hashes):
+    digest = hashlib.sha256(code.encode()).digest()
+    h1, h2 = struct.unpack('>QQ', digest[8:24])
+    return [(h1 + i * h2) % bits for i in range(hashes)]
+
+
+def _pack(hashes):
+    return base64.b64encode(struct.pack(f'>{len(hashes)}Q', *hashes)).decode()
+
+
+def _unpack(data):
+    raw = base64.b64decode(data)
+    return list(struct.unpack(f'>{len(raw) // 8}Q', raw))
+
+
+def signing_secret():
+    """``GATE_MANIFEST_SECRET``; it is shared with scanner devices, so SECRET_KEY can't stand in"""
+    secret = getattr(settings, 'GATE_MANIFEST_SECRET', '')
+    if not secret:
+        raise ImproperlyConfigured('GATE_MANIFEST_SECRET must be set to sign gate manifests')
+    if secret == settings.SECRET_KEY:
+        raise ImproperlyConfigured('GATE_MANIFEST_SECRET must differ from SECRET_KEY')
+    return secret
+
+
+def _signature(manifest):
+    body = json.dumps(manifest, sort_keys=True, separators=(',', ':'))
+    return salted_hmac(KEY_SALT, body, secret=signing_secret(), algorithm='sha256').hexdigest()
+
+
+def _cache_key(event_id):
+    return f'gate_manifest:{event_id}'
+
+
+def _codes(ticket_id, event_id, ticket_number):
+    codes = [ticket_codes.encode(ticket_id, event_id)]
+    if ticket_codes.is_legacy(ticket_number):
+        codes.append(ticket_number)
+    return codes
+
+
+class GateManifest:
+    """Builds signed offline manifests and merges used-ticket deltas"""
+
+    @staticmethod
+    def build(event_id):
+        """The signed manifest for the event: ``{'manifest': ..., 'signature': ...}``"""
+        rows = Ticket.objects.filter(order_item__event_id=event_id).values_list(
+            'pk', 'ticket_number', 'is_used'
+        )
+        codes, used = [], set()
+        for ticket_id, number, is_used in rows.iterator():
+            accepted = _codes(ticket_id, event_id, number)
+            codes.extend(accepted)
+            if is_used:
+                used.update(code_hash(code) for code in accepted)
+
+        bits = max(64, math.ceil(-len(codes) * math.log(BLOOM_FALSE_POSITIVE_RATE) / math.log(2) ** 2))
+        bits += -bits % 8
+        hashes = max(1, round(bits / max(len(codes), 1) * math.log(2)))
+        bloom = bytearray(bits // 8)
+        for code in codes:
+            for position in _bloom_positions(code, bits, hashes):
+                bloom[position // 8] |= 1 << (position % 8)
+
+        tickets = _pack(sorted({code_hash(code) for code in codes}))
+        used = _pack(sorted(used))
+        manifest = {
+            'format': FORMAT_VERSION,
+            'event': event_id,
+            'version': hashlib.sha256(f'{tickets}:{used}'.encode()).hexdigest()[:16],
+            'generated_at': timezone.now().isoformat(),
+            'hash_bytes': 8,
+            'tickets': tickets,
+            'used': used,
+            'bloom': {'bits': bits, 'hashes': hashes, 'data': base64.b64encode(bloom).decode()},
+        }
+        return {'manifest': manifest, 'signature': _signature(manifest)}
+
+    @staticmethod
+    def get(event_id):
+        """``build`` cached for ``GATE_MANIFEST_CACHE_SECONDS``; syncs invalidate it"""
+        signed = cache.get(_cache_key(event_id))
+        if signed is None:
+            signed = GateManifest.build(event_id)
+            cache.set(_cache_key(event_id), signed, getattr(settings, 'GATE_MANIFEST_CACHE_SECONDS', 30))
+        return signed
+
+    @staticmethod
+    def verify(signed):
+        """Whether a downloaded manifest is intact"""
+        return constant_time_compare(signed.get('signature', ''), _signature(signed.get('manifest', {})))
+
+    @staticmethod
+    def check(manifest, code):
+        """
+        What a device concludes offline for a scanned ``code``: ``'valid'``,
+        ``'already_used'`` or ``'unknown'``. Reference for scanner apps.
+        """
+        bloom = manifest['bloom']
+        data = base64.b64decode(bloom['data'])
+        if not all(data[p // 8] & (1 << (p % 8)) for p in _bloom_positions(code, bloom['bits'], bloom['hashes'])):
+            return UNKNOWN
+        value = code_hash(code)
+        for name, status in (('used', ALREADY_USED), ('tickets', 'valid')):
+            hashes = _unpack(manifest[name])
+            index = bisect.bisect_left(hashes, value)
+            if index < len(hashes) and hashes[index] == value:
+                return status
+        return UNKNOWN
+
+    @staticmethod
+    def merge_used(event_id, entries):
+        """
+        Apply a device's admitted tickets. ``entries`` are dicts with a
+        ``code``, and optionally ``used_at`` (ISO 8601) and ``gate``.
+        Returns ``{'merged': n, 'conflicts': [...]}``.
+        """
+        conflicts = []
+        now = timezone.now()
+        scans = {}  # ticket id -> earliest scan
+        legacy = {}
+
+        def scan_time(entry):
+            try:
+                used_at = parse_datetime(str(entry.get('used_at') or ''))
+            except ValueError:
+                used_at = None
+            if used_at is not None and timezone.is_naive(used_at):
+                used_at = timezone.make_aware(used_at)
+            return min(used_at, now) if used_at else now
+
+        def record(ticket_id, entry):
+            scan = dict(entry, used_at=scan_time(entry))
+            earlier = scans.get(ticket_id)
+            if earlier is not None:
+                first, second = sorted([earlier, scan], key=lambda item: item['used_at'])
+                scans[ticket_id] = first
+                conflicts.append({
+                    'code': second['code'], 'reason': DUPLICATE,
+                    'gate': second.get('gate'), 'used_at': first['used_at'], 'first_gate': first.get('gate'),
+                })
+            else:
+                scans[ticket_id] = scan
+
+        for entry in entries:
+            code = str(entry.get('code', ''))
+            decoded = ticket_codes.decode(code)
+            if decoded is not None and decoded[1] == event_id:
+                record(decoded[0], entry)
+            elif decoded is None and ticket_codes.is_legacy(code):
+                legacy.setdefault(code, []).append(entry)
+            else:
+                conflicts.append({'code': code, 'reason': UNKNOWN, 'gate': entry.get('gate')})
+
+        if legacy:
+            found = dict(Ticket.objects.filter(
+                ticket_number__in=legacy, order_item__event_id=event_id
+            ).values_list('ticket_number', 'pk'))
+            for number, number_entries in legacy.items():
+                for entry in number_entries:
+                    if number in found:
+                        record(found[number], entry)
+                    else:
+                        conflicts.append({'code': number, 'reason': UNKNOWN, 'gate': entry.get('gate')})
+
+        merged = 0
+        if scans:
+            with transaction.atomic():
+                current = {
+                    ticket_id: (is_used, used_at)
+                    for ticket_id, is_used, used_at in Ticket.objects.select_for_update()
+                    .filter(pk__in=scans, order_item__event_id=event_id)
+                    .order_by('pk')
+                    .values_list('pk', 'is_used', 'used_at')
+                }
+                fresh = [ticket_id for ticket_id in scans if ticket_id in current and not current[ticket_id][0]]
+                for ticket_id, scan in scans.items():
+                    if ticket_id not in current:
+                        conflicts.append({'code': scan['code'], 'reason': UNKNOWN, 'gate': scan.get('gate')})
+                    elif current[ticket_id][0]:
+                        conflicts.append({
+                            'code': scan['code'], 'reason': ALREADY_USED,
+                            'gate': scan.get('gate'), 'used_at': current[ticket_id][1],
+                        })
+                if fresh:
+                    merged = Ticket.objects.filter(pk__in=fresh, is_used=False).update(
+                        is_used=True,
+                        used_at=Case(
+                            *[When(pk=ticket_id, then=Value(scans[ticket_id]['used_at'])) for ticket_id in fresh],
+                            output_field=DateTimeField(),
+                        ),
+                    )
+            cache.delete(_cache_key(event_id))
+        return {'merged': merged, 'conflicts': conflicts}
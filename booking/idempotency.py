@@ -0,0 +1,54 @@
+# booking/idempotency.py
+"""Idempotent PayPal capture: one capture per PayPal order id, later requests get the stored response."""
+
+from contextlib import contextmanager
+
+from django.db import connection
+from django.http import JsonResponse
+
+from .models import CaptureResult
+
+# Advisory lock namespace (first key of the two-key form) for captures
+LOCK_NAMESPACE = 7301
+
+
+@contextmanager
+def capture_lock(paypal_order_id):
+    """Hold a session-level advisory lock for ``paypal_order_id``"""
+    if connection.vendor != 'postgresql':
+        # The unique constraints still stop duplicates elsewhere
+        yield
+        return
+
+    with connection.cursor() as cursor:
+        cursor.execute('SELECT pg_advisory_lock(%s, hashtext(%s))', [LOCK_NAMESPACE, paypal_order_id])
+    try:
+        yield
+    finally:
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT pg_advisory_unlock(%s, hashtext(%s))', [LOCK_NAMESPACE, paypal_order_id])
+
+
+class CaptureIdempotency:
+    """Stores and replays capture responses"""
+
+    @staticmethod
+    def replay(paypal_order_id):
+        """The stored response for ``paypal_order_id``, or None on first capture"""
+        result = CaptureResult.objects.filter(paypal_order_id=paypal_order_id).first()
+        if result is None:
+            return None
+        response = JsonResponse(result.response, status=result.status_code)
+        response['Idempotent-Replayed'] = 'true'
+        return response
+
+    @staticmethod
+    def respond(paypal_order_id, payload, status=200, order=None):
+        """Record the outcome of a capture and return it as a response"""
+        CaptureResult.objects.create(
+            paypal_order_id=paypal_order_id,
+            status_code=status,
+            response=payload,
+            order=order,
+        )
+        return JsonResponse(payload, status=status)
@@ -0,0 +1,388 @@
+# booking/inventory.py
+"""Stock reservation, cart holds and sharded stock counters for ticket types."""
+
+from collections import Counter
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import F, Subquery, Sum
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from event_management.models import Event, TicketType
+
+from .models import InventoryShard, TicketHold
+
+DEFAULT_SWEEP_BATCH_SIZE = 1000
+DEFAULT_SHARD_COUNT = 8
+SHARD_SUM_CACHE_SECONDS = 2
+SHARD_FLAG_CACHE_SECONDS = 60
+
+
+class InsufficientInventory(Exception):
+    """Raised when one or more ticket types can't cover the requested quantity"""
+
+    def __init__(self, failures):
+        self.failures = failures
+        super().__init__(
+            'Not enough tickets: ' + ', '.join(
+                f"{f['ticket_type']} ({f['available']} left, {f['requested']} requested)" for f in failures
+            )
+        )
+
+
+def _quantities(lines):
+    """Merge ``(ticket_type or id, quantity)`` pairs into ``{id: quantity}``"""
+    totals = Counter()
+    for ticket_type, quantity in lines:
+        ticket_type_id = getattr(ticket_type, 'pk', ticket_type)
+        if quantity > 0:
+            totals[ticket_type_id] += quantity
+    return totals
+
+
+class InventoryService:
+    """Reserves and releases ticket stock"""
+
+    @staticmethod
+    def reserve(lines, cart=None):
+        """
+        Take stock for every ``(ticket_type, quantity)`` in ``lines``, all or
+        nothing. Stock held by other carts is not available; ``cart``'s own
+        holds are. Raises ``InsufficientInventory`` listing every ticket type
+        that couldn't be covered; nothing is reserved in that case.
+        """
+        quantities = _quantities(lines)
+        if not quantities:
+            return
+
+        now = timezone.now()
+        sharded = ShardedInventory.sharded_ids(quantities)
+        with transaction.atomic():
+            failed = []
+            for ticket_type_id in sorted(quantities):
+                quantity = quantities[ticket_type_id]
+                if ticket_type_id in sharded:
+                    if not ShardedInventory.take(ticket_type_id, quantity, exclude_cart=cart, now=now):
+                        failed.append(ticket_type_id)
+                    continue
+                held = Coalesce(Subquery(
+                    HoldService.active_holds(ticket_type_id, exclude_cart=cart, now=now)
+                    .values('ticket_type')
+                    .annotate(total=Sum('quantity'))
+                    .values('total')
+                ), 0)
+                updated = TicketType.objects.filter(
+                    pk=ticket_type_id,
+                    quantity_sold__lte=F('quantity_available') - quantity - held,
+                ).update(quantity_sold=F('quantity_sold') + quantity)
+                if not updated:
+                    failed.append(ticket_type_id)
+
+            if failed:
+                # Leaving the atomic block with an exception undoes the
+                # ticket types that did succeed
+                raise InsufficientInventory(_failures(failed, quantities, cart))
+
+            # Sharded sales reach the event when the shards are synced
+            InventoryService._adjust_events(
+                {pk: quantity for pk, quantity in quantities.items() if pk not in sharded}, sign=1
+            )
+
+    @staticmethod
+    def release(lines):
+        """Give back stock taken by ``reserve`` (e.g. when payment fails)"""
+        quantities = _quantities(lines)
+        if not quantities:
+            return
+
+        sharded = ShardedInventory.sharded_ids(quantities)
+        with transaction.atomic():
+            for ticket_type_id in sorted(quantities):
+                if ticket_type_id in sharded:
+                    ShardedInventory.give_back(ticket_type_id, quantities[ticket_type_id])
+                    continue
+                TicketType.objects.filter(pk=ticket_type_id).update(
+                    quantity_sold=F('quantity_sold') - quantities[ticket_type_id]
+                )
+            InventoryService._adjust_events(
+                {pk: quantity for pk, quantity in quantities.items() if pk not in sharded}, sign=-1
+            )
+
+    @staticmethod
+    def _adjust_events(quantities, sign):
+        if not quantities:
+            return
+        per_event = Counter()
+        rows = TicketType.objects.filter(pk__in=quantities).values_list('pk', 'event_id')
+        for ticket_type_id, event_id in rows:
+            per_event[event_id] += quantities[ticket_type_id]
+        for event_id in sorted(per_event):
+            Event.objects.filter(pk=event_id).update(
+                tickets_sold=F('tickets_sold') + sign * per_event[event_id]
+            )
+
+
+def _failure(ticket_type, requested, available):
+    return {
+        'ticket_type_id': ticket_type.pk,
+        'ticket_type': ticket_type.name,
+        'event': ticket_type.event.title,
+        'requested': requested,
+        'available': max(0, available),
+    }
+
+
+def _failures(ticket_type_ids, quantities, cart=None):
+    rows = TicketType.objects.filter(pk__in=ticket_type_ids).select_related('event')
+    return [
+        _failure(ticket_type, quantities[ticket_type.pk], HoldService.available(ticket_type, cart))
+        for ticket_type in sorted(rows, key=lambda ticket_type: ticket_type.pk)
+    ]
+
+
+def _unsold(ticket_type, cached=True):
+    """Stock not yet sold, from the shards when the ticket type is sharded"""
+    remaining = None
+    if ShardedInventory.is_sharded(ticket_type.pk):
+        remaining = ShardedInventory.remaining(ticket_type.pk, cached=cached)
+    if remaining is None:
+        return ticket_type.quantity_available - ticket_type.quantity_sold
+    return remaining
+
+
+def _forget(ticket_type_id):
+    """Drop the cached shard state after enabling or disabling sharding"""
+    cache.delete_many([f'inventory_shards:{ticket_type_id}:{name}' for name in ('remaining', 'sharded')])
+
+
+def _cart_key(cart):
+    """Holds are keyed by session key; accept a cart or the key itself"""
+    return getattr(cart, 'session_key', cart)
+
+
+def hold_duration():
+    return timedelta(minutes=getattr(settings, 'CART_HOLD_MINUTES', 10))
+
+
+class HoldService:
+    """Time-limited holds on ticket stock for carts"""
+
+    @staticmethod
+    def active_holds(ticket_type, exclude_cart=None, now=None):
+        holds = TicketHold.objects.filter(
+            ticket_type=ticket_type, expires_at__gt=now or timezone.now()
+        ).order_by()
+        if exclude_cart is not None:
+            holds = holds.exclude(cart_key=_cart_key(exclude_cart))
+        return holds
+
+    @staticmethod
+    def held_quantity(ticket_type, exclude_cart=None, now=None):
+        """Tickets held by active holds (index-only sum)"""
+        holds = HoldService.active_holds(ticket_type, exclude_cart, now)
+        return holds.aggregate(total=Sum('quantity'))['total'] or 0
+
+    @staticmethod
+    def available(ticket_type, cart=None):
+        """Tickets ``cart`` could still take: not sold and not held by anyone else"""
+        return _unsold(ticket_type) - HoldService.held_quantity(ticket_type, exclude_cart=cart)
+
+    @staticmethod
+    def place(cart, ticket_type, quantity):
+        """
+        Hold ``quantity`` tickets of ``ticket_type`` for ``cart``, replacing
+        its previous hold and restarting the clock. Raises
+        ``InsufficientInventory`` if they aren't available.
+        """
+        ticket_type_id = getattr(ticket_type, 'pk', ticket_type)
+        if quantity <= 0:
+            HoldService.release(cart, ticket_type_id)
+            return None
+
+        with transaction.atomic():
+            # Serialise hold placement per ticket type for this short check
+            ticket_type = TicketType.objects.select_for_update().select_related('event').get(pk=ticket_type_id)
+            now = timezone.now()
+            held = HoldService.held_quantity(ticket_type_id, exclude_cart=cart, now=now)
+            available = _unsold(ticket_type, cached=False) - held
+            if quantity > available:
+                raise InsufficientInventory([_failure(ticket_type, quantity, available)])
+
+            hold, created = TicketHold.objects.update_or_create(
+                cart_key=_cart_key(cart),
+                ticket_type_id=ticket_type_id,
+                defaults={'quantity': quantity, 'expires_at': now + hold_duration()},
+            )
+        return hold
+
+    @staticmethod
+    def hold_cart(cart):
+        """
+        (Re)hold every item in ``cart`` for a fresh hold period, e.g. before
+        sending the buyer to PayPal. Raises ``InsufficientInventory`` listing
+        the items that can no longer be held.
+        """
+        failures = []
+        for ticket_type_id, quantity in sorted(cart.lines.items()):
+            try:
+                HoldService.place(cart, ticket_type_id, quantity)
+            except InsufficientInventory as e:
+                failures.extend(e.failures)
+        if failures:
+            raise InsufficientInventory(failures)
+
+    @staticmethod
+    def release(cart, ticket_type=None):
+        holds = TicketHold.objects.filter(cart_key=_cart_key(cart))
+        if ticket_type is not None:
+            holds = holds.filter(ticket_type=ticket_type)
+        holds.delete()
+
+    @staticmethod
+    def release_expired(batch_size=DEFAULT_SWEEP_BATCH_SIZE, now=None):
+        """Delete expired holds in batches; returns how many were deleted"""
+        now = now or timezone.now()
+        released = 0
+        while True:
+            pks = list(
+                TicketHold.objects.filter(expires_at__lte=now)
+                .order_by('expires_at')
+                .values_list('pk', flat=True)[:batch_size]
+            )
+            if not pks:
+                return released
+            released += TicketHold.objects.filter(pk__in=pks).delete()[0]
+
+
+class ShardedInventory:
+    """Ticket stock split across ``InventoryShard`` rows"""
+
+    @staticmethod
+    def sharded_ids(ticket_type_ids):
+        """The subset of ``ticket_type_ids`` in sharded mode"""
+        return set(
+            InventoryShard.objects.filter(ticket_type_id__in=list(ticket_type_ids))
+            .values_list('ticket_type_id', flat=True).distinct()
+        )
+
+    @staticmethod
+    def is_sharded(ticket_type_id):
+        """
+        Whether the ticket type is in sharded mode, cached so hold checks on
+        ordinary ticket types skip the shard table. ``reserve`` and
+        ``release`` use ``sharded_ids`` instead, which is never stale.
+        """
+        key = f'inventory_shards:{ticket_type_id}:sharded'
+        sharded = cache.get(key)
+        if sharded is None:
+            sharded = InventoryShard.objects.filter(ticket_type_id=ticket_type_id).exists()
+            cache.set(key, sharded, SHARD_FLAG_CACHE_SECONDS)
+        return sharded
+
+    @staticmethod
+    def remaining(ticket_type_id, cached=True):
+        """Unsold stock across the shards, or None if the ticket type isn't sharded"""
+        key = f'inventory_shards:{ticket_type_id}:remaining'
+        if cached:
+            value = cache.get(key)
+            if value is not None:
+                return value[0]
+        shards = InventoryShard.objects.filter(ticket_type_id=ticket_type_id)
+        total = shards.aggregate(total=Sum('remaining'))['total']
+        # Cached as a tuple so "not sharded" (None) is cached too
+        cache.set(key, (total,), SHARD_SUM_CACHE_SECONDS)
+        return total
+
+    @staticmethod
+    def take(ticket_type_id, quantity, exclude_cart=None, now=None):
+        """
+        Sell ``quantity`` from one free shard; must run inside a transaction.
+        Returns False when the stock (less other carts' holds) can't cover it.
+        """
+        shards = InventoryShard.objects.filter(ticket_type_id=ticket_type_id)
+        held = HoldService.held_quantity(ticket_type_id, exclude_cart=exclude_cart, now=now)
+        if held and (shards.aggregate(total=Sum('remaining'))['total'] or 0) - held < quantity:
+            return False
+
+        # Fullest shard nobody else is selling from right now
+        shard = (
+            shards.select_for_update(skip_locked=True)
+            .filter(remaining__gte=quantity)
+            .order_by('-remaining')
+            .first()
+        )
+        if shard is None:
+            return ShardedInventory._take_rebalancing(ticket_type_id, quantity)
+        shards.filter(pk=shard.pk).update(remaining=F('remaining') - quantity, sold=F('sold') + quantity)
+        return True
+
+    @staticmethod
+    def _take_rebalancing(ticket_type_id, quantity):
+        """Lock every shard, take ``quantity`` and spread what's left evenly"""
+        shards = list(
+            InventoryShard.objects.select_for_update().filter(ticket_type_id=ticket_type_id).order_by('index')
+        )
+        total = sum(shard.remaining for shard in shards)
+        if total < quantity:
+            return False
+        share, extra = divmod(total - quantity, len(shards))
+        for i, shard in enumerate(shards):
+            shard.remaining = share + (1 if i < extra else 0)
+        shards[0].sold += quantity
+        InventoryShard.objects.bulk_update(shards, ['remaining', 'sold'])
+        return True
+
+    @staticmethod
+    def give_back(ticket_type_id, quantity):
+        """Return released stock to a shard"""
+        shards = InventoryShard.objects.filter(ticket_type_id=ticket_type_id)
+        shard = shards.select_for_update(skip_locked=True).order_by('remaining').first()
+        if shard is None:
+            shard = shards.select_for_update().order_by('index').first()
+        shards.filter(pk=shard.pk).update(remaining=F('remaining') + quantity, sold=F('sold') - quantity)
+
+    @staticmethod
+    def enable(ticket_type, shards=DEFAULT_SHARD_COUNT):
+        """Split the ticket type's unsold stock across ``shards`` rows (re-splits if already sharded)"""
+        ticket_type_id = getattr(ticket_type, 'pk', ticket_type)
+        with transaction.atomic():
+            ShardedInventory.disable(ticket_type_id)
+            ticket_type = TicketType.objects.select_for_update().get(pk=ticket_type_id)
+            unsold = max(0, ticket_type.quantity_available - ticket_type.quantity_sold)
+            share, extra = divmod(unsold, shards)
+            InventoryShard.objects.bulk_create([
+                InventoryShard(ticket_type_id=ticket_type_id, index=i, remaining=share + (1 if i < extra else 0))
+                for i in range(shards)
+            ])
+        _forget(ticket_type_id)
+
+    @staticmethod
+    def disable(ticket_type):
+        """Fold the shards back into the ticket type and delete them"""
+        ticket_type_id = getattr(ticket_type, 'pk', ticket_type)
+        with transaction.atomic():
+            ShardedInventory.sync(ticket_type_id)
+            InventoryShard.objects.filter(ticket_type_id=ticket_type_id).delete()
+        _forget(ticket_type_id)
+
+    @staticmethod
+    def sync(ticket_type):
+        """
+        Move sales recorded on the shards into ``TicketType.quantity_sold``
+        and ``Event.tickets_sold``; returns how many were moved.
+        """
+        ticket_type_id = getattr(ticket_type, 'pk', ticket_type)
+        with transaction.atomic():
+            shards = list(
+                InventoryShard.objects.select_for_update().filter(ticket_type_id=ticket_type_id).order_by('index')
+            )
+            sold = sum(shard.sold for shard in shards)
+            if not sold:
+                return 0
+            InventoryShard.objects.filter(pk__in=[shard.pk for shard in shards]).update(sold=0)
+            TicketType.objects.filter(pk=ticket_type_id).update(quantity_sold=F('quantity_sold') + sold)
+            InventoryService._adjust_events({ticket_type_id: sold}, sign=1)
+        return sold
@@ -0,0 +1,34 @@
+# booking/issuance.py
+"""Bulk ticket issuance."""
+
+import uuid
+
+from .models import Ticket
+
+
+def ticket_number(order_number, ticket_type_id):
+    return f"TKT{order_number}-{ticket_type_id}-{uuid.uuid4().hex[:8].upper()}"
+
+
+class TicketIssuer:
+    """Creates the tickets for paid order items"""
+
+    @staticmethod
+    def issue(order_items, reserve=False):
+        """
+        Create ``quantity`` tickets for every order item in one insert and
+        return them. With ``reserve=True`` stock is taken first (raises
+        ``booking.inventory.InsufficientInventory`` when sold out).
+        """
+        order_items = list(order_items)
+        if reserve:
+            from .inventory import InventoryService
+            InventoryService.reserve([(item.ticket_type_id, item.quantity) for item in order_items])
+
+        tickets = [
+            Ticket(order_item=item, ticket_number=ticket_number(item.order.order_number, item.ticket_type_id))
+            for item in order_items
+            for _ in range(item.quantity)
+        ]
+        Ticket.objects.bulk_create(tickets)
+        return tickets
@@ -0,0 +1,29 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+from booking.gate_manifest import GateManifest
+from event_management.models import Event
+
+
+class Command(BaseCommand):
+    help = 'Write the signed offline gate manifest for an event, for loading onto scanner devices'
+
+    def add_arguments(self, parser):
+        parser.add_argument('event_id', type=int)
+        parser.add_argument(
+            '--output',
+            help='File to write (default: gate-manifest-<event_id>.json)',
+        )
+
+    def handle(self, *args, **options):
+        event = Event.objects.filter(pk=options['event_id']).first()
+        if event is None:
+            raise CommandError(f'Unknown event: {options["event_id"]}')
+
+        signed = GateManifest.build(event.pk)
+        path = options['output'] or f'gate-manifest-{event.pk}.json'
+        with open(path, 'w') as handle:
+            json.dump(signed, handle)
+        self.stdout.write(self.style.SUCCESS(
+            f'✓ Wrote manifest version {signed["manifest"]["version"]} for {event} to {path}'
+        ))
@@ -0,0 +1,20 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from booking.validation import ScannerAuth
+
+
+class Command(BaseCommand):
+    help = "Issue an API key for a scanner device that scans with a user's permissions"
+
+    def add_arguments(self, parser):
+        parser.add_argument('username')
+        parser.add_argument('name', help='Label for the device, e.g. "North gate 1"')
+
+    def handle(self, *args, **options):
+        user = get_user_model().objects.filter(username=options['username']).first()
+        if user is None:
+            raise CommandError(f'Unknown user: {options["username"]}')
+
+        device, key = ScannerAuth.issue(user, options['name'])
+        self.stdout.write(self.style.SUCCESS(f'✓ Issued a key for {device}; it will not be shown again:'))
+        self.stdout.write(key)
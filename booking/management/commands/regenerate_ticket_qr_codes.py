@@ -0,0 +1,42 @@
+from django.core.management.base import BaseCommand, CommandError
+from booking.models import Ticket
+from booking.qr import QRCache
+from booking.ticket_codes import scan_codes
+from event_management.models import Event
+
+
+class Command(BaseCommand):
+    help = 'Render the QR codes of every ticket for the given events across a process pool'
+
+    def add_arguments(self, parser):
+        parser.add_argument('event_ids', nargs='+', type=int)
+        parser.add_argument(
+            '--workers',
+            type=int,
+            help='Worker processes (default: QR_RENDER_WORKERS or one per CPU)',
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            help='Tickets per worker task (default: QR_RENDER_CHUNK_SIZE)',
+        )
+        parser.add_argument(
+            '--missing-only',
+            action='store_true',
+            help='Skip tickets whose QR code is already cached',
+        )
+
+    def handle(self, *args, **options):
+        events = Event.objects.filter(pk__in=options['event_ids'])
+        missing = set(options['event_ids']) - {event.pk for event in events}
+        if missing:
+            raise CommandError(f'Unknown events: {", ".join(map(str, sorted(missing)))}')
+
+        for event in events:
+            rendered = QRCache.render_many(
+                scan_codes(Ticket.objects.filter(order_item__event=event)),
+                force=not options['missing_only'],
+                workers=options['workers'],
+                chunk_size=options['chunk_size'],
+            )
+            self.stdout.write(self.style.SUCCESS(f'✓ Rendered {rendered} QR codes for {event}'))
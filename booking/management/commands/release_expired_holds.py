@@ -0,0 +1,30 @@
+import time
+
+from django.core.management.base import BaseCommand
+from booking.inventory import DEFAULT_SWEEP_BATCH_SIZE, HoldService
+
+
+class Command(BaseCommand):
+    help = 'Delete expired cart holds in batches (run from cron, or with --every)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=DEFAULT_SWEEP_BATCH_SIZE,
+            help=f'Holds deleted per statement (default: {DEFAULT_SWEEP_BATCH_SIZE})',
+        )
+        parser.add_argument(
+            '--every',
+            type=int,
+            default=0,
+            help='Keep running and sweep every N seconds',
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            released = HoldService.release_expired(batch_size=options['batch_size'])
+            self.stdout.write(self.style.SUCCESS(f'✓ Released {released} expired holds'))
+            if not options['every']:
+                break
+            time.sleep(options['every'])
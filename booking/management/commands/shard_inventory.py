@@ -0,0 +1,38 @@
+from django.core.management.base import BaseCommand, CommandError
+from booking.inventory import DEFAULT_SHARD_COUNT, ShardedInventory
+from event_management.models import TicketType
+
+
+class Command(BaseCommand):
+    help = 'Split hot ticket types into sharded stock counters (or merge them back with --merge)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('ticket_type_ids', nargs='+', type=int)
+        parser.add_argument(
+            '--shards',
+            type=int,
+            default=DEFAULT_SHARD_COUNT,
+            help=f'Counter rows per ticket type (default: {DEFAULT_SHARD_COUNT})',
+        )
+        parser.add_argument(
+            '--merge',
+            action='store_true',
+            help='Fold the shards back into the ticket type and turn sharding off',
+        )
+
+    def handle(self, *args, **options):
+        if options['shards'] < 1:
+            raise CommandError('--shards must be at least 1')
+
+        ticket_types = TicketType.objects.select_related('event').filter(pk__in=options['ticket_type_ids'])
+        missing = set(options['ticket_type_ids']) - {ticket_type.pk for ticket_type in ticket_types}
+        if missing:
+            raise CommandError(f'Unknown ticket types: {", ".join(map(str, sorted(missing)))}')
+
+        for ticket_type in ticket_types:
+            if options['merge']:
+                ShardedInventory.disable(ticket_type)
+                self.stdout.write(self.style.SUCCESS(f'✓ Merged shards for {ticket_type}'))
+            else:
+                ShardedInventory.enable(ticket_type, shards=options['shards'])
+                self.stdout.write(self.style.SUCCESS(f'✓ Split {ticket_type} into {options["shards"]} shards'))
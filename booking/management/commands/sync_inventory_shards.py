@@ -0,0 +1,26 @@
+import time
+
+from django.core.management.base import BaseCommand
+from booking.inventory import ShardedInventory
+from booking.models import InventoryShard
+
+
+class Command(BaseCommand):
+    help = 'Fold sales recorded on inventory shards into ticket type and event totals'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--every',
+            type=int,
+            default=0,
+            help='Keep running and sync every N seconds',
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            ticket_type_ids = InventoryShard.objects.values_list('ticket_type_id', flat=True).distinct()
+            synced = sum(ShardedInventory.sync(ticket_type_id) for ticket_type_id in ticket_type_ids)
+            self.stdout.write(self.style.SUCCESS(f'✓ Synced {synced} sharded sales'))
+            if not options['every']:
+                break
+            time.sleep(options['every'])
@@ -0,0 +1,35 @@
+# Generated by Django 5.0.2 on 2026-10-18 09:06
+
+import django.core.validators
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('booking', '0001_initial'),
+        ('event_management', '0007_image_variants'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TicketHold',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('quantity', models.PositiveIntegerField(validators=[django.core.validators.MinValueValidator(1)])),
+                ('expires_at', models.DateTimeField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('cart', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='holds', to='booking.cart')),
+                ('ticket_type', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='holds', to='event_management.tickettype')),
+            ],
+            options={
+                'db_table': 'booking_ticket_hold',
+                'indexes': [models.Index(fields=['ticket_type', 'expires_at'], include=('quantity',), name='ticket_hold_active_idx'), models.Index(fields=['expires_at'], name='ticket_hold_expires_idx')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='tickethold',
+            constraint=models.UniqueConstraint(fields=('cart', 'ticket_type'), name='ticket_hold_cart_ticket_type_unique'),
+        ),
+    ]
@@ -0,0 +1,41 @@
+# Generated by Django 5.0.2 on 2026-10-18 09:09
+
+from django.db import migrations, models
+
+
+def copy_session_keys(apps, schema_editor):
+    TicketHold = apps.get_model('booking', 'TicketHold')
+    Cart = apps.get_model('booking', 'Cart')
+    TicketHold.objects.update(
+        cart_key=models.Subquery(Cart.objects.filter(pk=models.OuterRef('cart_id')).values('session_key'))
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('booking', '0002_ticket_hold'),
+        ('event_management', '0007_image_variants'),
+    ]
+
+    operations = [
+        migrations.RemoveConstraint(
+            model_name='tickethold',
+            name='ticket_hold_cart_ticket_type_unique',
+        ),
+        migrations.AddField(
+            model_name='tickethold',
+            name='cart_key',
+            field=models.CharField(default='', max_length=255),
+            preserve_default=False,
+        ),
+        migrations.RunPython(copy_session_keys, migrations.RunPython.noop),
+        migrations.RemoveField(
+            model_name='tickethold',
+            name='cart',
+        ),
+        migrations.AddConstraint(
+            model_name='tickethold',
+            constraint=models.UniqueConstraint(fields=('cart_key', 'ticket_type'), name='ticket_hold_cart_ticket_type_unique'),
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.0.2 on 2026-10-18 09:15
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('booking', '0003_ticket_hold_cart_key'),
+        ('event_management', '0008_waiting_room'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='InventoryShard',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('index', models.PositiveSmallIntegerField()),
+                ('remaining', models.PositiveIntegerField(default=0)),
+                ('sold', models.IntegerField(default=0)),
+                ('ticket_type', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='inventory_shards', to='event_management.tickettype')),
+            ],
+            options={
+                'db_table': 'booking_inventory_shard',
+                'ordering': ['ticket_type', 'index'],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='inventoryshard',
+            constraint=models.UniqueConstraint(fields=('ticket_type', 'index'), name='inventory_shard_ticket_type_index_unique'),
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 5.0.2 on 2026-10-18 09:22
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('booking', '0005_capture_idempotency'),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name='order',
+            name='qr_code',
+        ),
+        migrations.RemoveField(
+            model_name='ticket',
+            name='qr_code',
+        ),
+    ]
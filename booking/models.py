@@ -3,27 +3,51 @@
 from django.db import models
 from django.contrib.auth import get_user_model
 from django.core.validators import MinValueValidator
+from django.db.models import DecimalField, F, Sum, Value
+from django.db.models.functions import Coalesce
 from django.utils import timezone
+from django.utils.functional import cached_property
 from event_management.models import Event, TicketType  # Added TicketType import
-import uuid
-import qrcode
-from io import BytesIO
-from django.core.files import File
-from PIL import Image
 import secrets
 import string
-import base64
 from decimal import Decimal
 from payments.platform_fees import calculate_platform_fee as calc_fee
 
 User = get_user_model()
 
 
+CART_PRICE_FIELD = DecimalField(max_digits=12, decimal_places=2)
+
+
+def cart_totals(prefix=''):
+    """``Sum`` expressions for a cart's item count and price (``prefix`` reaches the items)"""
+    return {
+        'total_items': Coalesce(Sum(f'{prefix}quantity'), 0),
+        'total_price': Coalesce(
+            Sum(F(f'{prefix}quantity') * F(f'{prefix}ticket_type__price'), output_field=CART_PRICE_FIELD),
+            Value(Decimal('0.00')),
+            output_field=CART_PRICE_FIELD,
+        ),
+    }
+
+
+class CartQuerySet(models.QuerySet):
+    def with_totals(self):
+        """Annotate ``annotated_total_items``/``annotated_total_price`` in the same query"""
+        totals = cart_totals('items__')
+        return self.annotate(
+            annotated_total_items=totals['total_items'],
+            annotated_total_price=totals['total_price'],
+        )
+
+
 class Cart(models.Model):
     """Session-based shopping cart"""
     session_key = models.CharField(max_length=255, unique=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+
+    objects = CartQuerySet.as_manager()
     
     class Meta:
         db_table = 'booking_cart'
@@ -32,17 +56,25 @@ class Cart(models.Model):
     def __str__(self):
         return f"Cart {self.session_key}"
     
+    @cached_property
+    def totals(self):
+        """Item count and price, from ``with_totals()`` or one aggregate query"""
+        if hasattr(self, 'annotated_total_items'):
+            return {'total_items': self.annotated_total_items, 'total_price': self.annotated_total_price}
+        return self.items.aggregate(**cart_totals())
+    
     @property
     def total_price(self):
-        return sum(item.subtotal for item in self.items.all())
+        return self.totals['total_price']
     
     @property
     def total_items(self):
-        return sum(item.quantity for item in self.items.all())
+        return self.totals['total_items']
     
     def clear(self):
         """Clear all items from cart"""
         self.items.all().delete()
+        self.__dict__.pop('totals', None)
 
 
 class CartItem(models.Model):
@@ -72,6 +104,78 @@ class CartItem(models.Model):
         return self.subtotal
 
 
+class TicketHold(models.Model):
+    """
+    Tickets set aside for a cart until ``expires_at``. Active holds count
+    against availability (see booking.inventory.HoldService); expired ones
+    are ignored and later deleted by ``release_expired_holds``.
+    """
+    # Session key of the cart, whichever storage backend it lives in
+    cart_key = models.CharField(max_length=255)
+    ticket_type = models.ForeignKey(TicketType, on_delete=models.CASCADE, related_name='holds')
+    quantity = models.PositiveIntegerField(validators=[MinValueValidator(1)])
+    expires_at = models.DateTimeField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        db_table = 'booking_ticket_hold'
+        constraints = [
+            models.UniqueConstraint(fields=['cart_key', 'ticket_type'], name='ticket_hold_cart_ticket_type_unique'),
+        ]
+        indexes = [
+            # Active holds per ticket type, summed without touching the table
+            models.Index(fields=['ticket_type', 'expires_at'], include=['quantity'],
+                         name='ticket_hold_active_idx'),
+            # Sweeper
+            models.Index(fields=['expires_at'], name='ticket_hold_expires_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.quantity}x {self.ticket_type_id} for cart {self.cart_key} until {self.expires_at}"
+
+
+class InventoryShard(models.Model):
+    """
+    A slice of a ticket type's unsold stock. Ticket types in sharded mode
+    sell from these rows instead of updating ``TicketType.quantity_sold``
+    (see booking.inventory.ShardedInventory); ``sold`` counts sales not yet
+    folded back into the ticket type.
+    """
+    ticket_type = models.ForeignKey(TicketType, on_delete=models.CASCADE, related_name='inventory_shards')
+    index = models.PositiveSmallIntegerField()
+    remaining = models.PositiveIntegerField(default=0)
+    sold = models.IntegerField(default=0)
+
+    class Meta:
+        db_table = 'booking_inventory_shard'
+        ordering = ['ticket_type', 'index']
+        constraints = [
+            models.UniqueConstraint(fields=['ticket_type', 'index'], name='inventory_shard_ticket_type_index_unique'),
+        ]
+
+    def __str__(self):
+        return f"Shard {self.index} of {self.ticket_type_id}: {self.remaining} left"
+
+
+class ScannerDevice(models.Model):
+    """
+    A door-scanning app. It calls the scan API with ``Authorization: Token
+    <key>`` and acts with its user's scan permissions (see
+    booking.validation.ScannerAuth); only a hash of the key is stored.
+    """
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='scanner_devices')
+    name = models.CharField(max_length=100)
+    key_hash = models.CharField(max_length=64, unique=True, editable=False)
+    is_active = models.BooleanField(default=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        db_table = 'booking_scanner_device'
+
+    def __str__(self):
+        return f"{self.name} ({self.user})"
+
+
 class Order(models.Model):
     """Order containing purchased tickets"""
     STATUS_CHOICES = [
@@ -85,7 +189,6 @@ class Order(models.Model):
     order_number = models.CharField(max_length=32, unique=True, editable=False)
     user = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='orders')
     email = models.EmailField()  # For guest checkouts
-    qr_code = models.TextField(blank=True, null=True)
     
     # Billing information
     first_name = models.CharField(max_length=100)
@@ -113,6 +216,14 @@ class Order(models.Model):
     class Meta:
         db_table = 'booking_order'
         ordering = ['-created_at']
+        constraints = [
+            # One order per captured PayPal order (see booking.idempotency)
+            models.UniqueConstraint(
+                fields=['paypal_order_id'],
+                condition=~models.Q(paypal_order_id=''),
+                name='order_paypal_order_id_unique',
+            ),
+        ]
     
     def __str__(self):
         return f"Order {self.order_number}"
@@ -157,50 +268,32 @@ class Order(models.Model):
         self.paid_at = timezone.now()
         self.save()
         
-        # Generate tickets for all order items
-        for item in self.items.all():
-            item.generate_tickets()
+        # Generate tickets for all order items in one go
+        from .issuance import TicketIssuer
+        TicketIssuer.issue(self.items.select_related('order'), reserve=True)
 
     @property
     def customer_email(self):
         """Alias for email - used in templates and utils"""
         return self.email
-    
-    @property
-    def generate_qr_code(self):
-        """Generate QR code for this ticket that opens validation URL when scanned"""
-        from django.urls import reverse
-        from django.conf import settings
-
-        qr = qrcode.QRCode(
-            version=1,
-            error_correction=qrcode.constants.ERROR_CORRECT_L,
-            box_size=10,
-            border=5,
-        )
 
-        # Generate the validation URL
-        validation_path = reverse('booking:validate_ticket', kwargs={'ticket_code': self.ticket_number})
-
-        # Create full URL - make sure this matches your actual domain
-        base_url = getattr(settings, 'BASE_URL', 'http://localhost:8000')
-        validation_url = f"{base_url}{validation_path}"
-
-        # IMPORTANT: Add only the URL, not a dictionary
-        qr.add_data(validation_url)
-        qr.make(fit=True)
-
-        img = qr.make_image(fill_color="black", back_color="white")
+class CaptureResult(models.Model):
+    """
+    The response given the first time a PayPal order was captured; retries
+    of the same capture get it replayed (see booking.idempotency).
+    """
+    paypal_order_id = models.CharField(max_length=255, unique=True)
+    status_code = models.PositiveSmallIntegerField()
+    response = models.JSONField()
+    order = models.ForeignKey(Order, on_delete=models.SET_NULL, null=True, blank=True, related_name='capture_results')
+    created_at = models.DateTimeField(auto_now_add=True)
 
-        # Convert to base64 string for TextField storage
-        buffer = BytesIO()
-        img.save(buffer, format='PNG')
-        img_str = base64.b64encode(buffer.getvalue()).decode()
+    class Meta:
+        db_table = 'booking_capture_result'
 
-        self.qr_code = img_str
-        self.save()
+    def __str__(self):
+        return f"Capture {self.paypal_order_id}: {self.status_code}"
 
-        return self.qr_code
 
 class OrderItem(models.Model):
     """Individual ticket type booking in an order"""
@@ -231,33 +324,27 @@ class OrderItem(models.Model):
     def subtotal(self):
         return self.quantity * self.price
         
-    def generate_tickets(self):
-        """Generate tickets for this order item"""
-        tickets = []
-        for i in range(self.quantity):
-            ticket = Ticket.objects.create(
-                order_item=self,
-                ticket_number=self.generate_ticket_number()
-            )
-            ticket.generate_qr_code()
-            tickets.append(ticket)
-        
-        # Update quantity sold on ticket type
-        self.ticket_type.quantity_sold += self.quantity
-        self.ticket_type.save()
-        
-        return tickets
+    def generate_tickets(self, reserve=True):
+        """
+        Generate tickets for this order item (see booking.issuance).
+
+        Stock is taken first with a conditional UPDATE (raises
+        ``booking.inventory.InsufficientInventory`` when sold out). Pass
+        ``reserve=False`` when the caller already reserved it.
+        """
+        from .issuance import TicketIssuer
+        return TicketIssuer.issue([self], reserve=reserve)
     
     def generate_ticket_number(self):
         """Generate unique ticket number"""
-        return f"TKT{self.order.order_number}-{self.ticket_type.id}-{uuid.uuid4().hex[:8].upper()}"
+        from .issuance import ticket_number
+        return ticket_number(self.order.order_number, self.ticket_type_id)
 
 
 class Ticket(models.Model):
     """Individual ticket with QR code"""
     order_item = models.ForeignKey(OrderItem, on_delete=models.CASCADE, related_name='tickets')
     ticket_number = models.CharField(max_length=64, unique=True)
-    qr_code = models.TextField(blank=True, null=True) 
     is_used = models.BooleanField(default=False)
     used_at = models.DateTimeField(null=True, blank=True)
     
@@ -281,46 +368,32 @@ class Ticket(models.Model):
         """Get the ticket type from order item"""
         return self.order_item.ticket_type
     
-    def generate_qr_code(self):
-        """Generate QR code for this ticket that mobile devices can scan and open"""
+    @property
+    def code(self):
+        """Signed scan code (see booking.ticket_codes)"""
+        from .ticket_codes import encode
+        return encode(self.pk, self.order_item.event_id)
+
+    @property
+    def qr_url(self):
+        """URL of this ticket's QR code image (rendered on demand)"""
         from django.urls import reverse
-        from django.conf import settings
-        
-        qr = qrcode.QRCode(
-            version=1,
-            error_correction=qrcode.constants.ERROR_CORRECT_L,
-            box_size=10,
-            border=5,
-        )
-        
-        # Generate the validation URL path
-        validation_path = reverse('booking:validate_ticket', kwargs={'ticket_code': self.ticket_number})
-        
-        # Create full URL that mobile devices can open
-        base_url = getattr(settings, 'BASE_URL', 'http://localhost:8000')
-        validation_url = f"{base_url}{validation_path}"
-        
-        # CRITICAL: Add only the clean URL, not a dictionary or JSON
-        qr.add_data(validation_url)
-        qr.make(fit=True)
-        
-        img = qr.make_image(fill_color="black", back_color="white")
-        
-        # Convert to base64 string for TextField storage
-        buffer = BytesIO()
-        img.save(buffer, format='PNG')
-        img_str = base64.b64encode(buffer.getvalue()).decode()
-        
-        self.qr_code = img_str
-        self.save()
-        
-        return self.qr_code
+        return reverse('booking:ticket_qr_code', kwargs={'code': self.code})
+
+    def generate_qr_code(self):
+        """PNG bytes of the QR code that mobile devices can scan and open"""
+        from .qr import QRCache
+        return QRCache.get(self.code)
         
     def mark_as_used(self):
-        """Mark ticket as used"""
+        """Mark ticket as used; returns False if it already was"""
+        from .validation import TicketValidator
+        now = timezone.now()
+        if not TicketValidator.admit(self.pk, now):
+            return False
         self.is_used = True
-        self.used_at = timezone.now()
-        self.save()
+        self.used_at = now
+        return True
 
 
 class GuestCheckout(models.Model):
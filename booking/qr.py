@@ -0,0 +1,152 @@
+# booking/qr.py
+"""On-demand ticket QR codes, cached in a bounded LRU in front of CACHES['qr']."""
+
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from io import BytesIO
+
+import qrcode
+from django.conf import settings
+from django.core.cache import caches
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from django.urls import reverse
+
+# Bump whenever the rendering below changes, so cached copies and ETags go stale
+RENDER_VERSION = 1
+
+QR_RENDER_CHUNK_SIZE = 250
+
+
+def qr_payload(code):
+    """What the QR code for ticket ``code`` encodes: its validation URL"""
+    validation_path = reverse('booking:validate_ticket', kwargs={'ticket_code': code})
+    base_url = getattr(settings, 'BASE_URL', 'http://localhost:8000')
+    # Only the plain URL, so phones open it directly
+    return f"{base_url}{validation_path}"
+
+
+def render_png(payload):
+    """PNG bytes of a QR code encoding ``payload``"""
+    qr = qrcode.QRCode(
+        version=1,
+        error_correction=qrcode.constants.ERROR_CORRECT_L,
+        box_size=10,
+        border=5,
+    )
+    qr.add_data(payload)
+    qr.make(fit=True)
+
+    buffer = BytesIO()
+    qr.make_image(fill_color="black", back_color="white").save(buffer, format='PNG')
+    return buffer.getvalue()
+
+
+def _render_chunk(jobs):
+    """Worker: ``[(digest, payload)]`` -> ``[(digest, png)]``"""
+    return [(digest, render_png(payload)) for digest, payload in jobs]
+
+
+def _digest(payload):
+    return hashlib.sha256(f'{RENDER_VERSION}:{payload}'.encode()).hexdigest()[:32]
+
+
+def qr_etag(code):
+    """Strong ETag of the QR image for ticket ``code``"""
+    return f'"{_digest(qr_payload(code))}"'
+
+
+def _disk_cache():
+    return caches['qr'] if 'qr' in settings.CACHES else None
+
+
+class QRCache:
+    """Bounded LRU of rendered QR codes, backed by ``CACHES['qr']``"""
+
+    _images = OrderedDict()
+    _lock = threading.Lock()
+
+    @staticmethod
+    def _remember(digest, png):
+        with QRCache._lock:
+            QRCache._images[digest] = png
+            QRCache._images.move_to_end(digest)
+            while len(QRCache._images) > getattr(settings, 'QR_CACHE_SIZE', 1024):
+                QRCache._images.popitem(last=False)
+
+    @staticmethod
+    def get(code):
+        """PNG bytes for ticket ``code``, rendered only on a cache miss"""
+        payload = qr_payload(code)
+        digest = _digest(payload)
+        with QRCache._lock:
+            png = QRCache._images.get(digest)
+            if png is not None:
+                QRCache._images.move_to_end(digest)
+                return png
+
+        disk = _disk_cache()
+        key = f'qr:{digest}'
+        png = disk.get(key) if disk is not None else None
+        if png is None:
+            png = render_png(payload)
+            if disk is not None:
+                disk.set(key, png, None)
+        QRCache._remember(digest, png)
+        return png
+
+    @staticmethod
+    def render_many(codes, force=False, workers=None, chunk_size=None):
+        """
+        Render the QR codes for ticket ``codes`` into the cache, skipping
+        ones already on disk unless ``force``. Returns how many were rendered.
+        """
+        jobs = {}
+        for code in codes:
+            payload = qr_payload(code)
+            jobs.setdefault(_digest(payload), payload)
+
+        disk = _disk_cache()
+        if disk is not None and not force:
+            cached = disk.get_many([f'qr:{digest}' for digest in jobs])
+            jobs = {digest: payload for digest, payload in jobs.items() if f'qr:{digest}' not in cached}
+        if not jobs:
+            return 0
+
+        jobs = list(jobs.items())
+        chunk_size = chunk_size or getattr(settings, 'QR_RENDER_CHUNK_SIZE', QR_RENDER_CHUNK_SIZE)
+        chunks = [jobs[start:start + chunk_size] for start in range(0, len(jobs), chunk_size)]
+        workers = min(workers or getattr(settings, 'QR_RENDER_WORKERS', None) or os.cpu_count() or 1, len(chunks))
+
+        def store(rendered):
+            if disk is not None:
+                disk.set_many({f'qr:{digest}': png for digest, png in rendered}, None)
+            for digest, png in rendered:
+                QRCache._remember(digest, png)
+
+        if workers <= 1:
+            for chunk in chunks:
+                store(_render_chunk(chunk))
+        else:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                for rendered in pool.map(_render_chunk, chunks):
+                    store(rendered)
+        return len(jobs)
+
+    @staticmethod
+    def clear():
+        with QRCache._lock:
+            QRCache._images.clear()
+        disk = _disk_cache()
+        if disk is not None:
+            disk.clear()
+
+
+@receiver(setting_changed)
+def _reset_qr_cache(setting, **kwargs):
+    if setting in ('QR_CACHE_SIZE', 'BASE_URL', 'CACHES'):
+        with QRCache._lock:
+            QRCache._images.clear()
@@ -1,3 +1,1136 @@
-from django.test import TestCase
+import json
+import os
+import tempfile
+import threading
+import time
+from datetime import timedelta
+from decimal import Decimal
+from io import StringIO
+from unittest import skipUnless
+from unittest.mock import patch
 
-# Create your tests here.
+from django.core import signing
+from django.core.management import call_command
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.contrib.sessions.models import Session
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, RequestFactory, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from authentication.models import Organizer, User
+from booking import ticket_codes
+from booking.cart import SessionCart
+from booking.cart_storage import DatabaseCartStorage, RedisCartStorage
+from booking.gate_manifest import GateManifest, signing_secret
+from booking.issuance import TicketIssuer
+from booking.inventory import HoldService, InsufficientInventory, InventoryService, ShardedInventory
+from booking.models import CaptureResult, Cart, CartItem, InventoryShard, Order, OrderItem, Ticket, TicketHold
+from booking.qr import QRCache, qr_payload, render_png
+from booking.validation import ScannerAuth, TicketValidator
+from booking.waiting_room import TOKEN_SALT, WaitingRoom, cookie_name
+from event_management.models import Category, Event, TicketType
+
+try:
+    import fakeredis
+except ImportError:
+    fakeredis = None
+
+
+class BookingTestMixin:
+    """Helpers for building an event with ticket types."""
+
+    @classmethod
+    def create_event(cls, title='Harbour Gig'):
+        user = User.objects.create_user(
+            username='organizer', email='organizer@example.com', password='pass12345', is_staff=True
+        )
+        organizer = Organizer.objects.create(
+            user=user,
+            company_name='Organizer Ltd',
+            business_email='organizer@example.com',
+            business_phone='01534 000000',
+            address_line_1='1 Liberation Square',
+            city='St Helier',
+            postal_code='JE2 3AB',
+            description='Test organizer',
+        )
+        category = Category.objects.create(name='Music', slug='music')
+        return Event.objects.create(
+            title=title,
+            description=f'{title} description',
+            venue='Fort Regent',
+            address='St Helier, Jersey',
+            date=timezone.now() + timedelta(days=7),
+            price=Decimal('10.00'),
+            category=category,
+            organizer=organizer,
+            is_approved=True,
+            status='approved',
+        )
+
+    @classmethod
+    def create_ticket_type(cls, event, name='General', quantity=10, sold=0, price='10.00'):
+        return TicketType.objects.create(
+            event=event,
+            name=name,
+            price=Decimal(price),
+            quantity_available=quantity,
+            quantity_sold=sold,
+            sale_ends=event.date,
+        )
+
+    @classmethod
+    def create_order_items(cls, *lines):
+        """Items of one new order, for ``(ticket_type, quantity)`` lines"""
+        order = Order.objects.create(
+            email='buyer@example.com', first_name='Ann', last_name='Buyer', total_amount=Decimal('10.00')
+        )
+        return [
+            OrderItem.objects.create(order=order, event=ticket_type.event, ticket_type=ticket_type,
+                                     quantity=quantity, price=ticket_type.price)
+            for ticket_type, quantity in lines
+        ]
+
+    @classmethod
+    def create_tickets(cls, event, quantity=1, **ticket_type_kwargs):
+        """Issued tickets of a new ticket type for ``event``"""
+        ticket_type = cls.create_ticket_type(event, **ticket_type_kwargs)
+        return TicketIssuer.issue(cls.create_order_items((ticket_type, quantity)))
+
+
+class InventoryServiceTests(BookingTestMixin, TestCase):
+    """Tests for conditional-UPDATE stock reservation."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.event = cls.create_event()
+        cls.general = cls.create_ticket_type(cls.event, quantity=10, sold=8)
+        cls.vip = cls.create_ticket_type(cls.event, name='VIP', quantity=5)
+
+    def test_reserve_takes_stock_and_updates_event(self):
+        InventoryService.reserve([(self.general, 2), (self.vip, 1), (self.vip.pk, 1)])
+
+        self.general.refresh_from_db()
+        self.vip.refresh_from_db()
+        self.event.refresh_from_db()
+        self.assertEqual(self.general.quantity_sold, 10)
+        self.assertEqual(self.vip.quantity_sold, 2)
+        self.assertEqual(self.event.tickets_sold, 4)
+
+    def test_reserve_is_all_or_nothing_and_reports_failures(self):
+        with self.assertRaises(InsufficientInventory) as raised:
+            InventoryService.reserve([(self.vip, 2), (self.general, 3)])
+
+        self.assertEqual(raised.exception.failures, [{
+            'ticket_type_id': self.general.pk,
+            'ticket_type': 'General',
+            'event': 'Harbour Gig',
+            'requested': 3,
+            'available': 2,
+        }])
+        self.vip.refresh_from_db()
+        self.event.refresh_from_db()
+        self.assertEqual(self.vip.quantity_sold, 0)
+        self.assertEqual(self.event.tickets_sold, 0)
+
+    def test_release_gives_stock_back(self):
+        InventoryService.reserve([(self.vip, 3)])
+        InventoryService.release([(self.vip, 3)])
+
+        self.vip.refresh_from_db()
+        self.event.refresh_from_db()
+        self.assertEqual(self.vip.quantity_sold, 0)
+        self.assertEqual(self.event.tickets_sold, 0)
+
+    @patch('booking.views.PayPalClient')
+    def test_capture_refuses_sold_out_carts_before_charging(self, MockClient):
+        session = self.client.session
+        session['checkout_data'] = {'email': 'buyer@example.com', 'first_name': 'Ann', 'last_name': 'Buyer'}
+        session.save()
+        cart = Cart.objects.create(session_key=session.session_key)
+        CartItem.objects.create(cart=cart, event=self.event, ticket_type=self.general, quantity=3)
+
+        response = self.client.post(
+            reverse('booking:capture_ticket_payment'), {'order_id': 'PAYPAL-1'},
+            content_type='application/json', secure=True,
+        )
+
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response.json()['unavailable'][0]['available'], 2)
+        MockClient.return_value.capture_order.assert_not_called()
+
+    @patch('booking.views.PayPalClient')
+    def test_failed_capture_releases_the_reservation(self, MockClient):
+        MockClient.return_value.capture_order.return_value = {'success': False, 'error': 'declined'}
+        session = self.client.session
+        session['checkout_data'] = {'email': 'buyer@example.com', 'first_name': 'Ann', 'last_name': 'Buyer'}
+        session.save()
+        cart = Cart.objects.create(session_key=session.session_key)
+        CartItem.objects.create(cart=cart, event=self.event, ticket_type=self.vip, quantity=2)
+
+        response = self.client.post(
+            reverse('booking:capture_ticket_payment'), {'order_id': 'PAYPAL-2'},
+            content_type='application/json', secure=True,
+        )
+
+        self.assertEqual(response.status_code, 400)
+        self.vip.refresh_from_db()
+        self.assertEqual(self.vip.quantity_sold, 0)
+
+
+class HoldServiceTests(BookingTestMixin, TestCase):
+    """Tests for time-limited cart holds."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.event = cls.create_event()
+        cls.ticket_type = cls.create_ticket_type(cls.event, quantity=5, sold=1)
+
+    def add_to_cart(self, client, quantity):
+        return client.post(reverse('booking:add_to_cart'), {
+            'event_id': self.event.pk, 'ticket_type_id': self.ticket_type.pk, 'quantity': quantity,
+        }, secure=True).json()
+
+    def test_adding_to_a_cart_holds_stock_from_other_carts(self):
+        self.assertTrue(self.add_to_cart(self.client, 3)['success'])
+
+        other = self.client_class()
+        response = self.add_to_cart(other, 2)
+        self.assertFalse(response['success'])
+        self.assertEqual(response['error'], 'Only 1 tickets available')
+        self.assertTrue(self.add_to_cart(other, 1)['success'])
+        self.assertEqual(TicketHold.objects.get(cart_key=other.session.session_key).quantity, 1)
+
+    def test_expired_holds_stop_counting_and_are_swept(self):
+        stale = Cart.objects.create(session_key='stale')
+        HoldService.place(stale, self.ticket_type, 4)
+        TicketHold.objects.update(expires_at=timezone.now() - timedelta(seconds=1))
+
+        self.assertEqual(HoldService.available(self.ticket_type), 4)
+
+        out = StringIO()
+        call_command('release_expired_holds', batch_size=1, stdout=out)
+        self.assertIn('Released 1 expired holds', out.getvalue())
+        self.assertFalse(TicketHold.objects.exists())
+
+    def test_held_quantity_is_a_single_aggregate(self):
+        for key in ('a', 'b', 'c'):
+            HoldService.place(Cart.objects.create(session_key=key), self.ticket_type, 1)
+
+        with self.assertNumQueries(1):
+            self.assertEqual(HoldService.held_quantity(self.ticket_type), 3)
+
+    def test_placing_holds_on_unsharded_stock_skips_the_shard_table(self):
+        cache.clear()
+        HoldService.place(Cart.objects.create(session_key='first'), self.ticket_type, 1)
+
+        cart = Cart.objects.create(session_key='second')
+        with CaptureQueriesContext(connection) as queries:
+            HoldService.place(cart, self.ticket_type, 1)
+        self.assertFalse([query for query in queries if 'booking_inventory_shard' in query['sql']])
+
+    def test_reserve_honours_other_carts_holds(self):
+        mine = Cart.objects.create(session_key='mine')
+        theirs = Cart.objects.create(session_key='theirs')
+        HoldService.place(mine, self.ticket_type, 2)
+        HoldService.place(theirs, self.ticket_type, 2)
+
+        with self.assertRaises(InsufficientInventory):
+            InventoryService.reserve([(self.ticket_type, 3)], cart=mine)
+        InventoryService.reserve([(self.ticket_type, 2)], cart=mine)
+
+        self.ticket_type.refresh_from_db()
+        self.assertEqual(self.ticket_type.quantity_sold, 3)
+
+    def test_removing_an_item_releases_its_hold(self):
+        self.add_to_cart(self.client, 2)
+
+        self.client.post(reverse('booking:remove_from_cart'), {'item_id': self.ticket_type.pk}, secure=True)
+
+        self.assertFalse(TicketHold.objects.exists())
+
+
+class CartStorageTestMixin(BookingTestMixin):
+    """The same cart behaviour, whichever backend stores it"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.event = cls.create_event()
+        cls.general = cls.create_ticket_type(cls.event, price='10.00')
+        cls.vip = cls.create_ticket_type(cls.event, name='VIP', price='25.50')
+
+    def make_storage(self):
+        raise NotImplementedError
+
+    def session_cart(self, storage):
+        request = RequestFactory().get('/')
+        request.session = self.client.session.__class__()
+        return SessionCart(request, storage=storage)
+
+    def test_lines_quantities_and_totals(self):
+        storage = self.make_storage()
+        cart = self.session_cart(storage)
+        self.assertEqual(cart.total_items, 0)
+        self.assertIsNone(cart.session_key)
+
+        cart.set_quantity(self.general, 2)
+        cart.set_quantity(self.vip.pk, 1)
+        cart.set_quantity(self.general, 3)
+
+        cart = SessionCart(cart.request, storage=storage)
+        self.assertEqual(cart.lines, {self.general.pk: 3, self.vip.pk: 1})
+        self.assertEqual(cart.total_items, 4)
+        self.assertEqual(cart.total_price, Decimal('55.50'))
+        self.assertEqual([item.id for item in cart.items], [self.vip.pk, self.general.pk])
+        self.assertEqual(cart.items[0].event, self.event)
+
+        cart.set_quantity(self.vip, 0)
+        self.assertEqual(cart.lines, {self.general.pk: 3})
+        cart.remove(self.general)
+        self.assertEqual(cart.lines, {})
+
+        cart.set_quantity(self.vip, 1)
+        cart.clear()
+        self.assertEqual(SessionCart(cart.request, storage=storage).total_items, 0)
+
+
+class DatabaseCartStorageTests(CartStorageTestMixin, TestCase):
+    def make_storage(self):
+        return DatabaseCartStorage()
+
+    def test_reading_an_empty_cart_creates_no_rows(self):
+        self.client.get(reverse('booking:cart'), secure=True)
+
+        self.assertFalse(Cart.objects.exists())
+
+
+@skipUnless(fakeredis, 'fakeredis is not installed')
+class RedisCartStorageTests(CartStorageTestMixin, TestCase):
+    def make_storage(self):
+        return RedisCartStorage(client=fakeredis.FakeRedis(), timeout=60)
+
+    def test_carts_expire_with_the_session(self):
+        storage = self.make_storage()
+        storage.set_quantity('abc', self.general.pk, 2)
+
+        self.assertEqual(storage.client.ttl('cart:abc'), 60)
+
+    def test_cart_endpoints_write_no_cart_rows(self):
+        storage = self.make_storage()
+        with patch('booking.cart.get_cart_storage', return_value=storage):
+            response = self.client.post(reverse('booking:add_to_cart'), {
+                'event_id': self.event.pk, 'ticket_type_id': self.vip.pk, 'quantity': 2,
+            }, secure=True).json()
+            self.client.post(reverse('booking:update_cart'), {
+                'item_id': self.vip.pk, 'quantity': 3,
+            }, secure=True)
+
+        self.assertEqual(response['cart_total'], '51.00')
+        self.assertEqual(storage.get_lines(self.client.session.session_key), {self.vip.pk: 3})
+        self.assertEqual(TicketHold.objects.get().quantity, 3)
+        self.assertFalse(Cart.objects.exists())
+        self.assertFalse(CartItem.objects.exists())
+
+
+class CartContextTests(BookingTestMixin, TestCase):
+    """The cart context processor stays off the database"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.event = cls.create_event()
+        cls.ticket_type = cls.create_ticket_type(cls.event)
+
+    def render_home(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('home'), secure=True)
+        self.assertEqual(response.status_code, 200)
+        return response, [q['sql'] for q in queries if 'booking_cart' in q['sql']]
+
+    def test_first_visit_creates_no_session_or_cart(self):
+        response, cart_queries = self.render_home()
+
+        self.assertEqual(cart_queries, [])
+        self.assertFalse(Session.objects.exists())
+        self.assertFalse(Cart.objects.exists())
+
+    def test_count_comes_from_the_session_after_mutations(self):
+        self.client.post(reverse('booking:add_to_cart'), {
+            'event_id': self.event.pk, 'ticket_type_id': self.ticket_type.pk, 'quantity': 3,
+        }, secure=True)
+        self.assertEqual(self.client.session['cart_items_count'], 3)
+
+        response, cart_queries = self.render_home()
+        self.assertEqual(cart_queries, [])
+        self.assertEqual(str(response.context['cart_items_count']), '3')
+
+        self.client.post(reverse('booking:remove_from_cart'), {'item_id': self.ticket_type.pk}, secure=True)
+        self.assertEqual(self.client.session['cart_items_count'], 0)
+
+
+class CartTotalsTests(BookingTestMixin, TestCase):
+    """Cart totals are SQL aggregates, whatever the number of items"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.event = cls.create_event()
+        cls.ticket_types = [
+            cls.create_ticket_type(cls.event, name=f'Tier {n}', price=f'{n}.50') for n in range(1, 6)
+        ]
+        cls.admin = User.objects.create_superuser(username='admin', email='admin@example.com', password='pass12345')
+
+    def fill_cart(self, session_key, count):
+        cart = Cart.objects.create(session_key=session_key)
+        for ticket_type in self.ticket_types[:count]:
+            CartItem.objects.create(cart=cart, event=self.event, ticket_type=ticket_type, quantity=2)
+        return cart
+
+    def test_totals_are_one_memoised_aggregate(self):
+        cart = self.fill_cart('five', 5)
+
+        with self.assertNumQueries(1):
+            self.assertEqual(cart.total_items, 10)
+            self.assertEqual(cart.total_price, Decimal('35.00'))
+        self.assertEqual(Cart.objects.with_totals().get(pk=cart.pk).total_price, Decimal('35.00'))
+        self.assertEqual(Cart.objects.create(session_key='empty').total_price, Decimal('0.00'))
+
+    def test_admin_changelist_queries_do_not_grow_with_carts(self):
+        self.client.force_login(self.admin)
+        url = reverse('admin:booking_cart_changelist')
+        self.fill_cart('one', 1)
+        with CaptureQueriesContext(connection) as few:
+            self.client.get(url, secure=True)
+
+        for n in range(2, 6):
+            self.fill_cart(f'cart-{n}', n)
+        with CaptureQueriesContext(connection) as many:
+            response = self.client.get(url, secure=True)
+
+        self.assertContains(response, '£35.00')
+        self.assertEqual(len(few), len(many))
+
+    def test_cart_endpoints_cost_constant_queries(self):
+        def update_cost(item_count):
+            client = self.client_class()
+            for ticket_type in self.ticket_types[:item_count]:
+                client.post(reverse('booking:add_to_cart'), {
+                    'event_id': self.event.pk, 'ticket_type_id': ticket_type.pk, 'quantity': 1,
+                }, secure=True)
+            with CaptureQueriesContext(connection) as queries:
+                response = client.post(reverse('booking:update_cart'), {
+                    'item_id': self.ticket_types[0].pk, 'quantity': 2,
+                }, secure=True)
+            self.assertTrue(response.json()['success'])
+            return len(queries)
+
+        self.assertEqual(update_cost(1), update_cost(5))
+
+
+class WaitingRoomTests(BookingTestMixin, TestCase):
+    """Queue tokens and rate-limited admission"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.event = cls.create_event()
+        cls.event.waiting_room_enabled = True
+        cls.event.waiting_room_rate = 2
+        cls.event.save()
+        cls.ticket_type = cls.create_ticket_type(cls.event)
+
+    def setUp(self):
+        cache.clear()
+
+    def test_visitors_are_admitted_at_the_configured_rate(self):
+        tokens = [WaitingRoom.join(self.event.pk, f'visitor-{n}', now=1000.0) for n in range(5)]
+
+        def status(n, now):
+            return WaitingRoom.status(self.event.pk, tokens[n], f'visitor-{n}', now=now)
+
+        def admitted(now):
+            return [status(n, now)['admitted'] for n in range(5)]
+
+        self.assertEqual(admitted(1000.0), [True, True, False, False, False])
+        self.assertEqual(admitted(1030.0), [True, True, True, False, False])
+        self.assertEqual(status(4, 1030.0)['wait_seconds'], 60)
+        self.assertEqual(status(4, 1030.0)['ahead'], 2)
+        self.assertEqual(admitted(1060.0), [True] * 4 + [False])
+
+    def test_idle_time_does_not_build_up_admissions(self):
+        early = WaitingRoom.join(self.event.pk, 'early', now=1000.0)
+        self.assertTrue(WaitingRoom.status(self.event.pk, early, 'early', now=1000.0)['admitted'])
+
+        # The crowd arrives an hour later
+        crowd = [WaitingRoom.join(self.event.pk, 'crowd', now=4600.0) for _ in range(10)]
+
+        def admitted(now):
+            return [WaitingRoom.status(self.event.pk, token, 'crowd', now=now)['admitted'] for token in crowd]
+
+        self.assertEqual(admitted(4600.0), [True] + [False] * 9)
+        self.assertEqual(admitted(4660.0), [True] * 3 + [False] * 7)
+        self.assertEqual(admitted(4720.0), [True] * 5 + [False] * 5)
+
+    def test_every_visitor_gets_their_own_slot(self):
+        # Each join claims a slot with one atomic incr, so no two visitors share one
+        tokens = [WaitingRoom.join(self.event.pk, 'visitor', now=1000.0) for _ in range(6)]
+        admit_at = [signing.loads(token, salt=TOKEN_SALT)['a'] for token in tokens]
+
+        self.assertEqual(admit_at, [1000.0, 1000.0, 1030.0, 1060.0, 1090.0, 1120.0])
+        with self.assertNumQueries(0):
+            WaitingRoom.status(self.event.pk, tokens[-1], 'visitor', now=1060.0)
+        self.assertEqual(cache.get('waiting_room:%d:slots' % self.event.pk), 6)
+
+    def test_tokens_are_signed_and_tied_to_the_visitor_and_current_line(self):
+        token = WaitingRoom.join(self.event.pk, 'visitor')
+        self.assertEqual(WaitingRoom.position(self.event.pk, token, 'visitor'), 1)
+        self.assertIsNone(WaitingRoom.position(self.event.pk, token + 'x', 'visitor'))
+        self.assertIsNone(WaitingRoom.position(self.event.pk + 1, token, 'visitor'))
+        self.assertIsNone(WaitingRoom.position(self.event.pk, token, 'someone-else'))
+        self.assertIsNone(WaitingRoom.position(self.event.pk, token, None))
+
+        WaitingRoom.reset(self.event.pk)
+        self.assertIsNone(WaitingRoom.status(self.event.pk, token, 'visitor'))
+
+    def test_queued_visitors_cannot_shop_until_admitted(self):
+        for n in range(2):
+            WaitingRoom.join(self.event.pk, f'visitor-{n}')
+
+        response = self.client.get(self.event.get_absolute_url(), secure=True)
+        self.assertRedirects(response, reverse('booking:waiting_room', args=[self.event.pk]),
+                             fetch_redirect_response=False)
+
+        response = self.client.get(reverse('booking:waiting_room', args=[self.event.pk]), secure=True)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['status']['position'], 3)
+
+        with CaptureQueriesContext(connection) as queries:
+            status = self.client.get(reverse('booking:waiting_room_status', args=[self.event.pk]), secure=True)
+        self.assertEqual(status.json()['ahead'], 1)
+        # Only the session is loaded and saved; the queue itself lives in the cache
+        sql = [query['sql'] for query in queries if 'SAVEPOINT' not in query['sql']]
+        self.assertTrue(all('django_session' in statement for statement in sql))
+
+        added = self.client.post(reverse('booking:add_to_cart'), {
+            'event_id': self.event.pk, 'ticket_type_id': self.ticket_type.pk, 'quantity': 1,
+        }, secure=True).json()
+        self.assertFalse(added['success'])
+        self.assertIn('queue_url', added)
+        self.assertFalse(TicketHold.objects.exists())
+
+    def test_missing_or_bad_event_ids_are_rejected_before_the_queue_check(self):
+        for event_id in ('', 'abc'):
+            added = self.client.post(reverse('booking:add_to_cart'), {
+                'event_id': event_id, 'ticket_type_id': self.ticket_type.pk,
+            }, secure=True).json()
+            self.assertEqual(added, {'success': False, 'error': 'Event is required'})
+            response = self.client.post(reverse('booking:quick_add_to_cart'), {'event_id': event_id}, secure=True)
+            self.assertEqual(response.status_code, 404)
+        response = self.client.post(reverse('booking:quick_add_to_cart'), secure=True)
+        self.assertEqual(response.status_code, 404)
+
+    def test_queue_cookies_only_work_in_the_session_that_joined(self):
+        WaitingRoom.join(self.event.pk, 'visitor-0')
+        WaitingRoom.join(self.event.pk, 'visitor-1')
+        self.client.get(reverse('booking:waiting_room', args=[self.event.pk]), secure=True)
+        url = reverse('booking:waiting_room_status', args=[self.event.pk])
+        self.assertEqual(self.client.get(url, secure=True).status_code, 200)
+
+        other = Client()
+        other.cookies[cookie_name(self.event.pk)] = self.client.cookies[cookie_name(self.event.pk)].value
+        self.assertEqual(other.get(url, secure=True).status_code, 403)
+
+        # Logging in keeps the place in line
+        user = User.objects.create_user(username='buyer', email='buyer@example.com', password='x')
+        self.client.force_login(user)
+        self.assertEqual(self.client.get(url, secure=True).json()['position'], 3)
+
+    def test_admitted_visitors_go_straight_through(self):
+        response = self.client.get(reverse('booking:waiting_room', args=[self.event.pk]), secure=True)
+        self.assertRedirects(response, self.event.get_absolute_url(), fetch_redirect_response=False)
+        self.assertIn(cookie_name(self.event.pk), response.cookies)
+
+        added = self.client.post(reverse('booking:add_to_cart'), {
+            'event_id': self.event.pk, 'ticket_type_id': self.ticket_type.pk, 'quantity': 1,
+        }, secure=True).json()
+        self.assertTrue(added['success'])
+
+
+class ShardedInventoryTests(BookingTestMixin, TestCase):
+    """Stock split across shard rows"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.event = cls.create_event()
+        cls.ticket_type = cls.create_ticket_type(cls.event, quantity=12, sold=2)
+
+    def setUp(self):
+        cache.clear()
+        ShardedInventory.enable(self.ticket_type, shards=4)
+
+    def shard_remaining(self):
+        return list(InventoryShard.objects.order_by('index').values_list('remaining', flat=True))
+
+    def test_enable_splits_unsold_stock(self):
+        self.assertEqual(self.shard_remaining(), [3, 3, 2, 2])
+        self.assertEqual(ShardedInventory.remaining(self.ticket_type.pk), 10)
+        self.assertIsNone(ShardedInventory.remaining(self.create_ticket_type(self.event, name='Other').pk))
+
+    def test_reserve_sells_from_one_shard_without_touching_the_ticket_type(self):
+        InventoryService.reserve([(self.ticket_type, 2)])
+
+        self.assertEqual(sorted(self.shard_remaining()), [1, 2, 2, 3])
+        self.ticket_type.refresh_from_db()
+        self.event.refresh_from_db()
+        self.assertEqual(self.ticket_type.quantity_sold, 2)
+        self.assertEqual(self.event.tickets_sold, 0)
+
+        out = StringIO()
+        call_command('sync_inventory_shards', stdout=out)
+        self.assertIn('Synced 2 sharded sales', out.getvalue())
+        self.ticket_type.refresh_from_db()
+        self.event.refresh_from_db()
+        self.assertEqual(self.ticket_type.quantity_sold, 4)
+        self.assertEqual(self.event.tickets_sold, 2)
+
+    def test_rebalances_when_no_shard_is_big_enough(self):
+        InventoryService.reserve([(self.ticket_type, 5)])
+
+        self.assertEqual(self.shard_remaining(), [2, 1, 1, 1])
+        with self.assertRaises(InsufficientInventory) as raised:
+            InventoryService.reserve([(self.ticket_type, 6)])
+        self.assertEqual(raised.exception.failures[0]['available'], 5)
+
+        InventoryService.reserve([(self.ticket_type, 5)])
+        self.assertEqual(sum(self.shard_remaining()), 0)
+
+    def test_release_and_merge_restore_the_ticket_type(self):
+        InventoryService.reserve([(self.ticket_type, 4)])
+        InventoryService.release([(self.ticket_type, 1)])
+        self.assertEqual(sum(self.shard_remaining()), 7)
+
+        call_command('shard_inventory', str(self.ticket_type.pk), '--merge', stdout=StringIO())
+
+        self.assertFalse(InventoryShard.objects.exists())
+        self.ticket_type.refresh_from_db()
+        self.assertEqual(self.ticket_type.quantity_sold, 5)
+
+    def test_holds_count_against_sharded_stock(self):
+        HoldService.place(Cart.objects.create(session_key='other'), self.ticket_type, 8)
+        with self.assertRaises(InsufficientInventory):
+            HoldService.place(Cart.objects.create(session_key='late'), self.ticket_type, 3)
+
+        with self.assertRaises(InsufficientInventory):
+            InventoryService.reserve([(self.ticket_type, 3)])
+        InventoryService.reserve([(self.ticket_type, 2)])
+
+
+class CaptureTestMixin(BookingTestMixin):
+    """A session with checkout data and a cart ready for capture"""
+
+    COMPLETED = {'success': True, 'status': 'COMPLETED', 'capture_id': 'CAPTURE-1'}
+
+    def prepare_checkout(self, client, ticket_type, quantity=2):
+        session = client.session
+        session['checkout_data'] = {'email': 'buyer@example.com', 'first_name': 'Ann', 'last_name': 'Buyer'}
+        session.save()
+        cart = Cart.objects.create(session_key=session.session_key)
+        CartItem.objects.create(cart=cart, event=ticket_type.event, ticket_type=ticket_type, quantity=quantity)
+        return session.session_key
+
+    def capture(self, client, order_id='PAYPAL-9'):
+        return client.post(
+            reverse('booking:capture_ticket_payment'), {'order_id': order_id},
+            content_type='application/json', secure=True,
+        )
+
+
+@patch('booking.views.send_order_confirmation_email')
+@patch('booking.views.PayPalClient')
+class CaptureIdempotencyTests(CaptureTestMixin, TestCase):
+    """Retried captures are replayed, not repeated"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.event = cls.create_event()
+        cls.ticket_type = cls.create_ticket_type(cls.event)
+
+    def test_retries_replay_the_first_response(self, MockClient, send_email):
+        MockClient.return_value.capture_order.return_value = self.COMPLETED
+        self.prepare_checkout(self.client, self.ticket_type)
+
+        first = self.capture(self.client)
+        second = self.capture(self.client)
+
+        self.assertEqual(first.status_code, 200)
+        self.assertEqual(second.json(), first.json())
+        self.assertEqual(second['Idempotent-Replayed'], 'true')
+        MockClient.return_value.capture_order.assert_called_once_with('PAYPAL-9')
+        send_email.assert_called_once()
+        order = Order.objects.get()
+        self.assertEqual(CaptureResult.objects.get().order, order)
+        self.assertEqual(order.items.get().tickets.count(), 2)
+
+    def test_declined_captures_are_not_stored(self, MockClient, send_email):
+        MockClient.return_value.capture_order.side_effect = [{'success': False, 'error': 'declined'}, self.COMPLETED]
+        self.prepare_checkout(self.client, self.ticket_type)
+
+        self.assertEqual(self.capture(self.client).status_code, 400)
+        self.assertFalse(CaptureResult.objects.exists())
+        self.assertEqual(self.capture(self.client).status_code, 200)
+        self.assertEqual(Order.objects.count(), 1)
+
+
+class TicketCodeTests(TestCase):
+    """Signed ticket codes round-trip and can't be altered"""
+
+    def test_codes_are_compact_and_round_trip(self):
+        code = ticket_codes.encode(2 ** 40 + 5, 123456)
+        self.assertEqual(len(code), 32)
+        self.assertRegex(code, '^[A-Z2-7]+$')
+        self.assertEqual(ticket_codes.decode(code), (2 ** 40 + 5, 123456))
+        self.assertEqual(ticket_codes.decode(code.lower()), (2 ** 40 + 5, 123456))
+
+    def test_codes_signed_with_another_secret_are_rejected(self):
+        code = ticket_codes.encode(7, 3)
+        with override_settings(TICKET_CODE_SECRET='rotated'):
+            self.assertIsNone(ticket_codes.decode(code))
+        self.assertIsNone(ticket_codes.decode('not a code'))
+        self.assertIsNone(ticket_codes.decode('1' * 32))
+
+
+class TicketIssuerTests(BookingTestMixin, TestCase):
+    """Tickets are issued in bulk"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.event = cls.create_event()
+        cls.general = cls.create_ticket_type(cls.event, quantity=100)
+        cls.vip = cls.create_ticket_type(cls.event, name='VIP', quantity=10)
+
+    def order_items(self, *quantities):
+        return self.create_order_items(*zip([self.general, self.vip], quantities))
+
+    def test_group_bookings_cost_the_same_queries_as_single_tickets(self):
+        single = self.order_items(1)
+        with CaptureQueriesContext(connection) as one:
+            TicketIssuer.issue(single)
+
+        group = self.order_items(50, 3)
+        with CaptureQueriesContext(connection) as many:
+            tickets = TicketIssuer.issue(group)
+
+        self.assertEqual(len(one), len(many))
+        self.assertEqual(len(tickets), 53)
+        self.assertEqual(len({ticket.ticket_number for ticket in tickets}), 53)
+        self.assertTrue(tickets[0].ticket_number.startswith(f'TKT{group[0].order.order_number}-{self.general.pk}-'))
+        self.assertEqual(Ticket.objects.filter(order_item__order=group[0].order).count(), 53)
+
+    def test_reserve_moves_stock_once_per_ticket_type(self):
+        order = self.order_items(4, 2)[0].order
+
+        order.mark_as_paid()
+
+        self.general.refresh_from_db()
+        self.vip.refresh_from_db()
+        self.assertEqual((self.general.quantity_sold, self.vip.quantity_sold), (4, 2))
+        self.assertEqual(Ticket.objects.count(), 6)
+
+
+class TicketQRCodeTests(BookingTestMixin, TestCase):
+    """QR images are rendered on demand and cached"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.event = cls.create_event()
+        cls.ticket = cls.create_tickets(cls.event)[0]
+
+    def setUp(self):
+        QRCache.clear()
+
+    def get(self, ticket, **headers):
+        return self.client.get(ticket.qr_url, secure=True, headers=headers)
+
+    def test_images_are_rendered_once_and_revalidated_with_etags(self):
+        with patch('booking.qr.render_png', wraps=render_png) as render:
+            first = self.get(self.ticket)
+            second = self.get(self.ticket)
+            revalidated = self.get(self.ticket, if_none_match=first['ETag'])
+
+        self.assertEqual(first.status_code, 200)
+        self.assertEqual(first['Content-Type'], 'image/png')
+        self.assertTrue(first.content.startswith(b'\x89PNG'))
+        self.assertFalse(first['ETag'].startswith('W/'))
+        self.assertEqual(second.content, first.content)
+        self.assertEqual(revalidated.status_code, 304)
+        render.assert_called_once_with(qr_payload(self.ticket.code))
+
+    def test_unknown_tickets_are_not_rendered(self):
+        response = self.client.get(
+            reverse('booking:ticket_qr_code', kwargs={'code': 'A' * 32}), secure=True
+        )
+        self.assertEqual(response.status_code, 404)
+
+    @override_settings(QR_CACHE_SIZE=1)
+    def test_memory_cache_is_bounded_and_backed_by_disk(self):
+        with patch('booking.qr.render_png', return_value=b'png') as render:
+            QRCache.get('TKT-A')
+            QRCache.get('TKT-B')
+            self.assertEqual(len(QRCache._images), 1)
+            self.assertEqual(QRCache.get('TKT-A'), b'png')
+        self.assertEqual(render.call_count, 2)
+
+    def test_batches_render_in_worker_processes(self):
+        numbers = [self.ticket.code, 'TKT-A', 'TKT-B', 'TKT-C']
+        self.assertEqual(QRCache.render_many(numbers[:1], workers=1), 1)
+
+        self.assertEqual(QRCache.render_many(numbers, force=False, workers=2, chunk_size=2), 3)
+        self.assertEqual(QRCache.render_many(numbers, force=False, workers=2), 0)
+        QRCache._images.clear()
+        with patch('booking.qr.render_png') as render:
+            self.assertTrue(QRCache.get('TKT-C').startswith(b'\x89PNG'))
+        render.assert_not_called()
+
+    def test_regenerate_command_renders_every_ticket_of_an_event(self):
+        out = StringIO()
+        call_command('regenerate_ticket_qr_codes', str(self.event.pk), '--workers', '1', stdout=out)
+        self.assertIn('Rendered 1 QR codes', out.getvalue())
+
+
+class ValidateTicketTests(BookingTestMixin, TestCase):
+    """Door scanning admits each ticket once, for permitted users only"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.event = cls.create_event()
+        cls.ticket = cls.create_tickets(cls.event, name='Standing')[0]
+        cls.organizer = cls.event.organizer.user
+        cls.organizer.is_staff = False
+        cls.organizer.save()
+        cls.stranger = User.objects.create_user(username='stranger', email='stranger@example.com', password='x')
+
+    def setUp(self):
+        cache.clear()
+
+    def scan(self, method='post', code=None, **headers):
+        url = reverse('booking:validate_ticket', kwargs={'ticket_code': code or self.ticket.code})
+        return getattr(self.client, method)(url, secure=True, headers={'accept': 'application/json', **headers})
+
+    def test_qr_codes_open_the_validation_url(self):
+        self.assertEqual(
+            qr_payload(self.ticket.code),
+            f'{settings.BASE_URL}/booking/validate/{self.ticket.code}/',
+        )
+
+    def test_organizer_admits_a_ticket_once(self):
+        self.client.force_login(self.organizer)
+
+        self.assertEqual(self.scan('get').json()['status'], 'valid')
+        first = self.scan()
+        second = self.scan()
+
+        self.assertEqual(first.status_code, 200)
+        self.assertEqual(first.json()['status'], 'admitted')
+        self.assertEqual(second.status_code, 409)
+        self.assertEqual(second.json()['status'], 'already_used')
+        self.ticket.refresh_from_db()
+        self.assertTrue(self.ticket.is_used)
+        self.assertIsNotNone(self.ticket.used_at)
+
+    def test_scans_take_two_queries_once_permission_is_cached(self):
+        self.client.force_login(self.organizer)
+        self.scan('get')
+        with CaptureQueriesContext(connection) as queries:
+            TicketValidator.validate(self.organizer, self.ticket.code, admit=True)
+        self.assertEqual(len(queries), 2)
+
+    def test_other_users_and_unknown_codes_are_rejected(self):
+        self.assertEqual(self.scan().status_code, 401)
+        self.assertEqual(self.scan(accept='text/html').status_code, 302)
+
+        self.client.force_login(self.stranger)
+        self.assertEqual(self.scan().status_code, 403)
+        self.client.force_login(self.organizer)
+        self.assertEqual(self.scan(code='TKT-FORGED').status_code, 404)
+        self.assertFalse(Ticket.objects.get(pk=self.ticket.pk).is_used)
+
+    def test_forged_codes_are_rejected_without_a_query(self):
+        code = self.ticket.code
+        tampered = ticket_codes.encode(self.ticket.pk + 1, self.event.pk)[:20] + code[20:]
+        with self.assertNumQueries(0):
+            self.assertEqual(TicketValidator.validate(self.organizer, tampered), ('not_found', None))
+            self.assertEqual(TicketValidator.validate(self.organizer, code[:-1]), ('not_found', None))
+
+    def test_legacy_ticket_numbers_work_until_the_window_closes(self):
+        self.client.force_login(self.organizer)
+        today = timezone.localdate()
+        with override_settings(TICKET_LEGACY_CODES_UNTIL=str(today)):
+            self.assertEqual(self.scan('get', code=self.ticket.ticket_number).json()['status'], 'valid')
+        with override_settings(TICKET_LEGACY_CODES_UNTIL=str(today - timedelta(days=1))):
+            self.assertEqual(self.scan('get', code=self.ticket.ticket_number).status_code, 404)
+
+    def test_html_page_offers_to_admit_valid_tickets(self):
+        self.client.force_login(self.organizer)
+        response = self.scan('get', accept='text/html')
+        self.assertContains(response, 'Valid ticket')
+        self.assertContains(response, 'Admit')
+
+    def test_scanner_api_authenticates_devices_by_key_without_csrf(self):
+        _, key = ScannerAuth.issue(self.organizer, 'North gate')
+        device, stranger_key = ScannerAuth.issue(self.stranger, 'Stray phone')
+        client = Client(enforce_csrf_checks=True)
+        url = reverse('booking:scan_ticket', kwargs={'ticket_code': self.ticket.code})
+
+        def scan(key=None):
+            headers = {'authorization': f'Token {key}'} if key else {}
+            return client.post(url, secure=True, headers=headers)
+
+        self.assertEqual(scan().status_code, 401)
+        self.assertEqual(scan('wrong').status_code, 401)
+        self.assertEqual(scan(stranger_key).status_code, 403)
+        device.is_active = False
+        device.save()
+        self.assertEqual(scan(stranger_key).status_code, 401)
+
+        response = scan(key)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['status'], 'admitted')
+        self.assertEqual(scan(key).json()['status'], 'already_used')
+
+    def test_issue_scanner_key_command(self):
+        stdout = StringIO()
+        call_command('issue_scanner_key', 'stranger', 'Box office', stdout=stdout)
+
+        key = stdout.getvalue().split()[-1]
+        request = RequestFactory().get('/', headers={'authorization': f'Token {key}'})
+        self.assertEqual(ScannerAuth.authenticate(request), self.stranger)
+
+
+class GateManifestTests(BookingTestMixin, TestCase):
+    """Offline manifests validate locally and used deltas merge once"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.event = cls.create_event()
+        cls.tickets = cls.create_tickets(cls.event, quantity=4)
+        cls.staff = cls.event.organizer.user
+
+    def setUp(self):
+        cache.clear()
+
+    def test_manifest_is_signed_and_validates_offline(self):
+        Ticket.objects.filter(pk=self.tickets[0].pk).update(is_used=True, used_at=timezone.now())
+        signed = GateManifest.build(self.event.pk)
+        manifest = signed['manifest']
+
+        self.assertTrue(GateManifest.verify(json.loads(json.dumps(signed))))
+        self.assertEqual(GateManifest.check(manifest, self.tickets[0].code), 'already_used')
+        self.assertEqual(GateManifest.check(manifest, self.tickets[1].code), 'valid')
+        self.assertEqual(GateManifest.check(manifest, self.tickets[1].ticket_number), 'valid')
+        self.assertEqual(GateManifest.check(manifest, ticket_codes.encode(999999, self.event.pk)), 'unknown')
+
+        manifest['used'] = ''
+        self.assertFalse(GateManifest.verify(signed))
+
+    def test_manifests_need_their_own_secret(self):
+        for secret in ('', settings.SECRET_KEY):
+            with self.subTest(secret=secret), override_settings(GATE_MANIFEST_SECRET=secret):
+                with self.assertRaises(ImproperlyConfigured):
+                    signing_secret()
+                with self.assertRaises(ImproperlyConfigured):
+                    GateManifest.build(self.event.pk)
+
+    def test_version_changes_when_tickets_are_used(self):
+        before = GateManifest.build(self.event.pk)['manifest']['version']
+        self.assertEqual(GateManifest.build(self.event.pk)['manifest']['version'], before)
+        self.tickets[0].mark_as_used()
+        self.assertNotEqual(GateManifest.build(self.event.pk)['manifest']['version'], before)
+
+    def test_used_deltas_merge_in_one_update_and_report_conflicts(self):
+        first, second, third, _ = self.tickets
+        Ticket.objects.filter(pk=third.pk).update(is_used=True, used_at=timezone.now())
+        scanned_at = timezone.now() - timedelta(minutes=5)
+        entries = [
+            {'code': first.code, 'used_at': scanned_at.isoformat(), 'gate': 'north'},
+            {'code': first.code, 'used_at': timezone.now().isoformat(), 'gate': 'south'},
+            {'code': second.ticket_number, 'gate': 'north'},
+            {'code': third.code, 'gate': 'south'},
+            {'code': 'A' * 32, 'gate': 'south'},
+        ]
+
+        with self.assertNumQueries(5):  # legacy lookup, savepoint, lock, update, release
+            report = GateManifest.merge_used(self.event.pk, entries)
+
+        self.assertEqual(report['merged'], 2)
+        reasons = {(conflict['reason'], conflict['gate']) for conflict in report['conflicts']}
+        self.assertEqual(reasons, {('duplicate', 'south'), ('already_used', 'south'), ('unknown', 'south')})
+        first.refresh_from_db()
+        self.assertEqual(first.used_at, scanned_at)
+        self.assertTrue(Ticket.objects.get(pk=second.pk).is_used)
+
+        again = GateManifest.merge_used(self.event.pk, entries[:1])
+        self.assertEqual(again['merged'], 0)
+        self.assertEqual(again['conflicts'][0]['reason'], 'already_used')
+
+    def test_endpoints_require_a_device_key_and_support_etags(self):
+        _, key = ScannerAuth.issue(self.staff, 'North gate')
+        client = Client(enforce_csrf_checks=True, headers={'authorization': f'Token {key}'})
+        url = reverse('booking:gate_manifest', kwargs={'event_id': self.event.pk})
+        sync_url = reverse('booking:gate_sync', kwargs={'event_id': self.event.pk})
+        self.client.force_login(self.staff)
+        self.assertEqual(self.client.get(url, secure=True).status_code, 401)
+        self.assertEqual(self.client.post(sync_url, {'used': []}, content_type='application/json',
+                                          secure=True).status_code, 401)
+
+        response = client.get(url, secure=True)
+        etag = response['ETag']
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(client.get(url, secure=True, headers={'if-none-match': etag}).status_code, 304)
+
+        response = client.post(
+            sync_url, {'used': [{'code': self.tickets[0].code, 'gate': 'east'}]},
+            content_type='application/json', secure=True,
+        )
+        self.assertEqual(response.json(), {'merged': 1, 'conflicts': []})
+        self.assertNotEqual(client.get(url, secure=True)['ETag'], etag)
+
+    def test_devices_need_scan_permission_for_the_event(self):
+        stranger = User.objects.create_user(username='stranger', email='stranger@example.com', password='x')
+        _, key = ScannerAuth.issue(stranger, 'Stray phone')
+        response = self.client.get(
+            reverse('booking:gate_manifest', kwargs={'event_id': self.event.pk}),
+            secure=True, headers={'authorization': f'Token {key}'},
+        )
+        self.assertEqual(response.status_code, 403)
+
+    def test_export_command_writes_the_manifest(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'manifest.json')
+            call_command('export_gate_manifest', str(self.event.pk), '--output', path, stdout=StringIO())
+            with open(path) as handle:
+                self.assertTrue(GateManifest.verify(json.load(handle)))
+
+
+class ConcurrentReservationTests(BookingTestMixin, TransactionTestCase):
+    """Concurrent buyers can't oversell the last tickets."""
+
+    def test_parallel_reservations_never_oversell(self):
+        event = self.create_event()
+        ticket_type = self.create_ticket_type(event, quantity=5)
+        results = []
+        barrier = threading.Barrier(8)
+
+        def buy():
+            barrier.wait()
+            try:
+                InventoryService.reserve([(ticket_type.pk, 1)])
+                results.append(True)
+            except InsufficientInventory:
+                results.append(False)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=buy) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        ticket_type.refresh_from_db()
+        event.refresh_from_db()
+        self.assertEqual(results.count(True), 5)
+        self.assertEqual(ticket_type.quantity_sold, 5)
+        self.assertEqual(event.tickets_sold, 5)
+
+    def test_parallel_reservations_never_oversell_sharded_stock(self):
+        event = self.create_event()
+        ticket_type = self.create_ticket_type(event, quantity=10)
+        ShardedInventory.enable(ticket_type, shards=3)
+        results = []
+        barrier = threading.Barrier(8)
+
+        def buy():
+            barrier.wait()
+            try:
+                InventoryService.reserve([(ticket_type.pk, 2)])
+                results.append(True)
+            except InsufficientInventory:
+                results.append(False)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=buy) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        ShardedInventory.sync(ticket_type)
+        ticket_type.refresh_from_db()
+        self.assertEqual(results.count(True), 5)
+        self.assertEqual(ticket_type.quantity_sold, 10)
+        self.assertFalse(InventoryShard.objects.filter(remaining__gt=0).exists())
+
+
+class ConcurrentScanTests(BookingTestMixin, TransactionTestCase):
+    """Two gates scanning one ticket at once admit it once"""
+
+    def test_parallel_scans_admit_once(self):
+        event = self.create_event()
+        ticket = self.create_tickets(event)[0]
+        staff = event.organizer.user
+        statuses = []
+        barrier = threading.Barrier(4)
+
+        def scan():
+            barrier.wait()
+            try:
+                statuses.append(TicketValidator.validate(staff, ticket.code, admit=True)[0])
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=scan) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(sorted(statuses), ['admitted', 'already_used', 'already_used', 'already_used'])
+
+
+class ConcurrentCaptureTests(CaptureTestMixin, TransactionTestCase):
+    """Simultaneous captures of one PayPal order create one order"""
+
+    @patch('booking.views.send_order_confirmation_email')
+    @patch('booking.views.PayPalClient')
+    def test_duplicate_submissions_wait_and_replay(self, MockClient, send_email):
+        def slow_capture(order_id):
+            time.sleep(0.2)
+            return self.COMPLETED
+        MockClient.return_value.capture_order.side_effect = slow_capture
+
+        event = self.create_event()
+        session_key = self.prepare_checkout(self.client, self.create_ticket_type(event))
+        responses = []
+        barrier = threading.Barrier(3)
+
+        def submit():
+            client = Client()
+            client.cookies[settings.SESSION_COOKIE_NAME] = session_key
+            barrier.wait()
+            try:
+                responses.append(self.capture(client))
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=submit) for _ in range(3)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual([response.status_code for response in responses], [200, 200, 200])
+        self.assertEqual(len({response.content for response in responses}), 1)
+        MockClient.return_value.capture_order.assert_called_once()
+        self.assertEqual(Order.objects.count(), 1)
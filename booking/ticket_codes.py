@@ -0,0 +1,59 @@
+# booking/ticket_codes.py
+"""Compact HMAC-signed ticket codes that can be checked without a query."""
+
+import base64
+import binascii
+import datetime
+import struct
+
+from django.conf import settings
+from django.utils import timezone
+from django.utils.crypto import constant_time_compare, salted_hmac
+
+KEY_SALT = 'booking.ticket_codes'
+LEGACY_PREFIX = 'TKT'
+CODE_LENGTH = 32
+MAC_BYTES = 10
+
+
+def _mac(body):
+    secret = getattr(settings, 'TICKET_CODE_SECRET', None) or None
+    return salted_hmac(KEY_SALT, body, secret=secret, algorithm='sha256').digest()[:MAC_BYTES]
+
+
+def encode(ticket_id, event_id):
+    """The signed code for ticket ``ticket_id`` of event ``event_id``"""
+    body = struct.pack('>Q', ticket_id)[2:] + struct.pack('>I', event_id)
+    return base64.b32encode(body + _mac(body)).decode()
+
+
+def decode(code):
+    """``(ticket_id, event_id)`` if ``code`` is a genuine signed code, else None"""
+    if len(code) != CODE_LENGTH:
+        return None
+    try:
+        raw = base64.b32decode(code.upper())
+    except (binascii.Error, ValueError):
+        return None
+    body, mac = raw[:-MAC_BYTES], raw[-MAC_BYTES:]
+    if not constant_time_compare(mac, _mac(body)):
+        return None
+    return struct.unpack('>Q', b'\0\0' + body[:6])[0], struct.unpack('>I', body[6:])[0]
+
+
+def is_legacy(code):
+    """Whether ``code`` is an old-style ticket number that is still accepted"""
+    if not code.startswith(LEGACY_PREFIX):
+        return False
+    until = getattr(settings, 'TICKET_LEGACY_CODES_UNTIL', None)
+    if not until:
+        return True
+    if isinstance(until, str):
+        until = datetime.date.fromisoformat(until)
+    return timezone.localdate() <= until
+
+
+def scan_codes(tickets):
+    """Signed codes for a ``Ticket`` queryset, without loading the tickets"""
+    for ticket_id, event_id in tickets.values_list('pk', 'order_item__event_id').iterator():
+        yield encode(ticket_id, event_id)
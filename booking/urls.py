@@ -12,6 +12,10 @@ urlpatterns = [
     path('cart/remove/', views.remove_from_cart, name='remove_from_cart'),
     path('quick-add/', views.quick_add_to_cart, name='quick_add_to_cart'),
     
+    # Waiting room for high-demand on-sales
+    path('queue/<int:event_id>/', views.waiting_room, name='waiting_room'),
+    path('queue/<int:event_id>/status/', views.waiting_room_status, name='waiting_room_status'),
+    
     # Checkout URLs
     path('checkout/', views.checkout_view, name='checkout'),
     
@@ -23,6 +27,13 @@ urlpatterns = [
     path('order/<int:order_id>/success/', views.order_success, name='order_success'),
     path('order/<str:order_number>/tickets/', views.download_tickets, name='download_tickets'),
     path('ticket/<int:ticket_id>/download/', views.download_single_ticket, name='download_single_ticket'),
+    path('ticket/<str:code>/qr.png', views.ticket_qr_code, name='ticket_qr_code'),
+    
+    # Door scanning
+    path('validate/<str:ticket_code>/', views.validate_ticket, name='validate_ticket'),
+    path('api/scan/<str:ticket_code>/', views.scan_ticket, name='scan_ticket'),
+    path('gate/<int:event_id>/manifest/', views.gate_manifest, name='gate_manifest'),
+    path('gate/<int:event_id>/sync/', views.gate_sync, name='gate_sync'),
     
     # User order history
     path('orders/', views.order_history, name='order_history'),
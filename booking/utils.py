@@ -185,7 +185,6 @@ def generate_single_ticket_pdf(ticket):
     from reportlab.pdfgen import canvas
     from reportlab.lib import colors
     from PIL import Image
-    import base64
     from io import BytesIO
     
     buffer = BytesIO()
@@ -218,17 +217,14 @@ def generate_single_ticket_pdf(ticket):
     p.drawString(60, height - 250, f"Order: {ticket.order.order_number}")
     p.drawString(60, height - 270, f"Purchaser: {ticket.order.customer_name}")
     
-    # QR Code
-    if ticket.qr_code:
-        # Decode base64 QR code
-        qr_data = base64.b64decode(ticket.qr_code)
-        qr_image = Image.open(BytesIO(qr_data))
-        
-        # Draw QR code
-        p.drawInlineImage(qr_image, width - 240, height - 320, width=150, height=150)
-        
-        p.setFont("Helvetica", 10)
-        p.drawString(width - 235, height - 340, "Scan at entrance")
+    # QR Code (from the shared cache, rendered if this ticket has none yet)
+    qr_image = Image.open(BytesIO(ticket.generate_qr_code()))
+    
+    # Draw QR code
+    p.drawInlineImage(qr_image, width - 240, height - 320, width=150, height=150)
+    
+    p.setFont("Helvetica", 10)
+    p.drawString(width - 235, height - 340, "Scan at entrance")
     
     # Instructions
     p.setFont("Helvetica", 10)
@@ -0,0 +1,122 @@
+# booking/validation.py
+"""Ticket validation at the door."""
+
+import hashlib
+import secrets
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import F
+from django.utils import timezone
+
+from event_management.models import Event
+
+from . import ticket_codes
+from .models import ScannerDevice, Ticket
+
+NOT_FOUND = 'not_found'
+FORBIDDEN = 'forbidden'
+VALID = 'valid'
+ADMITTED = 'admitted'
+ALREADY_USED = 'already_used'
+
+STATUS_CODES = {NOT_FOUND: 404, FORBIDDEN: 403, VALID: 200, ADMITTED: 200, ALREADY_USED: 409}
+
+
+def _permission_key(user_id, event_id):
+    return f'ticket_scan:{user_id}:{event_id}'
+
+
+class TicketValidator:
+    """Looks up and admits tickets for door scanning"""
+
+    @staticmethod
+    def can_scan(user, event_id):
+        """Whether ``user`` may validate tickets for the event (cached)"""
+        if not user.is_authenticated:
+            return False
+        if user.is_staff:
+            return True
+        key = _permission_key(user.pk, event_id)
+        allowed = cache.get(key)
+        if allowed is None:
+            allowed = Event.objects.filter(pk=event_id, organizer__user_id=user.pk).exists()
+            cache.set(key, allowed, getattr(settings, 'TICKET_SCAN_PERMISSION_TIMEOUT', 300))
+        return allowed
+
+    @staticmethod
+    def admit(ticket_id, now=None):
+        """Mark the ticket used unless it already is; returns whether this call did"""
+        return bool(
+            Ticket.objects.filter(pk=ticket_id, is_used=False).update(is_used=True, used_at=now or timezone.now())
+        )
+
+    @staticmethod
+    def validate(user, ticket_code, admit=False):
+        """
+        ``(status, ticket)`` for a scanned code, where ``ticket`` is a small
+        dict for the response (None when the code is unknown). With
+        ``admit=True`` a valid ticket is marked used.
+        """
+        tickets = Ticket.objects.values(
+            'pk', 'ticket_number', 'is_used', 'used_at',
+            event_id=F('order_item__event_id'),
+            event=F('order_item__event__title'),
+            ticket_type=F('order_item__ticket_type__name'),
+        )
+        decoded = ticket_codes.decode(ticket_code)
+        if decoded is not None:
+            ticket_id, event_id = decoded
+            # Signed codes name their event, so permission is checked first
+            if not TicketValidator.can_scan(user, event_id):
+                return FORBIDDEN, None
+            ticket = tickets.filter(pk=ticket_id, order_item__event_id=event_id).first()
+        elif ticket_codes.is_legacy(ticket_code):
+            ticket = tickets.filter(ticket_number=ticket_code).first()
+        else:
+            # Forged or mistyped: rejected without a query
+            return NOT_FOUND, None
+
+        if ticket is None:
+            return NOT_FOUND, None
+        if not TicketValidator.can_scan(user, ticket['event_id']):
+            return FORBIDDEN, None
+        if ticket['is_used']:
+            return ALREADY_USED, ticket
+        if not admit:
+            return VALID, ticket
+
+        now = timezone.now()
+        if not TicketValidator.admit(ticket['pk'], now):
+            # Another gate admitted it between the lookup and the update
+            return ALREADY_USED, ticket
+        ticket.update(is_used=True, used_at=now)
+        return ADMITTED, ticket
+
+
+def _key_hash(key):
+    return hashlib.sha256(key.encode()).hexdigest()
+
+
+class ScannerAuth:
+    """API keys for scanner devices, sent as ``Authorization: Token <key>``"""
+
+    @staticmethod
+    def issue(user, name):
+        """A new device for ``user``; returns ``(device, key)``, the key is shown only once"""
+        key = secrets.token_urlsafe(32)
+        return ScannerDevice.objects.create(user=user, name=name, key_hash=_key_hash(key)), key
+
+    @staticmethod
+    def authenticate(request):
+        """The user a request's device key acts for, or None"""
+        scheme, _, key = request.headers.get('Authorization', '').partition(' ')
+        key = key.strip()
+        if scheme.lower() != 'token' or not key:
+            return None
+        device = (
+            ScannerDevice.objects.select_related('user')
+            .filter(key_hash=_key_hash(key), is_active=True, user__is_active=True)
+            .first()
+        )
+        return device.user if device else None
@@ -1,44 +1,57 @@
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required
-from django.http import JsonResponse, HttpResponse, HttpResponseForbidden
-from django.views.decorators.http import require_POST
+from django.contrib.auth.views import redirect_to_login
+from django.http import Http404, JsonResponse, HttpResponse, HttpResponseForbidden
+from django.views.decorators.cache import cache_control
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import condition, require_GET, require_http_methods, require_POST
 from django.contrib import messages
 from django.urls import reverse
 from django.db import transaction, models
 from django.conf import settings
 from django.utils import timezone
+from django.utils.functional import SimpleLazyObject
+from django.utils.http import parse_etags
 from decimal import Decimal
+from functools import wraps
 import json
+import math
 import qrcode
 from io import BytesIO
 import base64
 import logging
 
 from event_management.models import Event, TicketType
-from .models import Cart, CartItem, Order, OrderItem, Ticket
+from .cart import SessionCart
+from .models import Order, OrderItem, Ticket
+from .inventory import HoldService, InsufficientInventory, InventoryService
+from .idempotency import CaptureIdempotency, capture_lock
+from .issuance import TicketIssuer
+from . import ticket_codes
+from .gate_manifest import GateManifest
+from .qr import QRCache, qr_etag
+from .validation import ADMITTED, STATUS_CODES, ScannerAuth, TicketValidator
+from .waiting_room import WaitingRoom, cookie_name, token_max_age
 from .utils import send_order_confirmation_email, generate_tickets_pdf, generate_single_ticket_pdf
 from payments.paypal_client import PayPalClient, format_amount
 
 logger = logging.getLogger(__name__)
 
 
-def get_or_create_cart(request):
-    """Get or create cart based on session"""
-    session_key = request.session.session_key
-    if not session_key:
-        request.session.create()
-        session_key = request.session.session_key
-    
-    cart, created = Cart.objects.get_or_create(session_key=session_key)
-    return cart
+def get_cart(request):
+    """Cart for the session, from the configured cart storage"""
+    return SessionCart(request)
 
 
 def cart_context(request):
-    """Context processor for cart"""
-    cart = get_or_create_cart(request)
+    """
+    Context processor for cart. Nothing is read until a template uses it,
+    and the navbar count comes from the session, not the cart storage.
+    """
+    cart = get_cart(request)
     return {
         'cart': cart,
-        'cart_items_count': cart.total_items
+        'cart_items_count': SimpleLazyObject(lambda: cart.items_count)
     }
 
 
@@ -56,27 +69,35 @@ def add_to_cart(request):
         if not ticket_type_id:
             return JsonResponse({'success': False, 'error': 'Ticket type is required'})
         
+        if not str(event_id or '').isdigit():
+            return JsonResponse({'success': False, 'error': 'Event is required'})
+        
+        # Checked before any event query so a queued crowd stays off the database
+        if not WaitingRoom.is_admitted(request, int(event_id)):
+            return JsonResponse({
+                'success': False,
+                'error': 'This event has a waiting room. Please wait for your turn.',
+                'queue_url': reverse('booking:waiting_room', args=[event_id]),
+            })
+        
         event = get_object_or_404(Event, id=event_id, is_active=True)
         ticket_type = get_object_or_404(TicketType, id=ticket_type_id, event=event)
-        cart = get_or_create_cart(request)
-        
-        # ✅ FIXED: Check if this specific ticket type already in cart
-        cart_item, created = CartItem.objects.get_or_create(
-            cart=cart,
-            ticket_type=ticket_type,  # Use ticket_type instead of event
-            defaults={'quantity': 0, 'event': event}
-        )
+        cart = get_cart(request)
+        cart.ensure_session_key()
+        in_cart = cart.quantity_of(ticket_type)
         
-        # Check availability
-        if cart_item.quantity + quantity > ticket_type.quantity_available:
+        # Hold the tickets for this cart (sold and held tickets aren't available)
+        try:
+            HoldService.place(cart, ticket_type, in_cart + quantity)
+        except InsufficientInventory as e:
+            available = e.failures[0]['available']
             return JsonResponse({
                 'success': False, 
-                'error': f'Only {ticket_type.quantity_available - cart_item.quantity} tickets available'
+                'error': f'Only {max(0, available - in_cart)} tickets available'
             })
         
         # Update quantity
-        cart_item.quantity += quantity
-        cart_item.save()
+        cart.set_quantity(ticket_type, in_cart + quantity)
         
         return JsonResponse({
             'success': True,
@@ -96,18 +117,30 @@ def quick_add_to_cart(request):
     event_id = request.POST.get('event_id')
     ticket_type_id = request.POST.get('ticket_type_id', 1)  # Default to first ticket type
     
+    if not str(event_id or '').isdigit():
+        raise Http404("Event not found")
+    if not WaitingRoom.is_admitted(request, int(event_id)):
+        return HttpResponse(
+            '<div id="cart-message" hx-swap-oob="true" class="position-fixed top-0 end-0 p-3">'
+            '<div class="toast show" role="alert"><div class="toast-body">'
+            f'<a href="{reverse("booking:waiting_room", args=[event_id])}">Join the queue</a> for this event'
+            '</div></div></div>'
+        )
+    
     event = get_object_or_404(Event, id=event_id)
     ticket_type = get_object_or_404(TicketType, id=ticket_type_id, event=event)
-    cart = get_or_create_cart(request)
-    
-    # ✅ FIXED: Create or update cart item with ticket_type
-    cart_item, created = CartItem.objects.get_or_create(
-        cart=cart,
-        ticket_type=ticket_type,  # Use ticket_type instead of event
-        defaults={'quantity': 0, 'event': event}
-    )
-    cart_item.quantity += 1
-    cart_item.save()
+    cart = get_cart(request)
+    cart.ensure_session_key()
+    in_cart = cart.quantity_of(ticket_type)
+    try:
+        HoldService.place(cart, ticket_type, in_cart + 1)
+    except InsufficientInventory:
+        return HttpResponse(
+            '<div id="cart-message" hx-swap-oob="true" class="position-fixed top-0 end-0 p-3">'
+            '<div class="toast show" role="alert"><div class="toast-body">Sorry, no more tickets are available</div></div>'
+            '</div>'
+        )
+    cart.set_quantity(ticket_type, in_cart + 1)
     
     # Return HTML that updates multiple parts of the page
     response = HttpResponse()
@@ -158,10 +191,10 @@ def quick_add_to_cart(request):
 
 def cart_view(request):
     """Display cart page - FIXED to include ticket_type"""
-    cart = get_or_create_cart(request)
+    cart = get_cart(request)
     context = {
         'cart': cart,
-        'cart_items': cart.items.select_related('event', 'ticket_type').all()  # ✅ Added ticket_type
+        'cart_items': cart.items
     }
     return render(request, 'booking/cart.html', context)
 
@@ -170,34 +203,35 @@ def cart_view(request):
 def update_cart(request):
     """Update cart item quantity via AJAX - FIXED for TicketType"""
     try:
-        item_id = request.POST.get('item_id')
+        # Cart items are identified by their ticket type
+        ticket_type_id = int(request.POST.get('item_id'))
         quantity = int(request.POST.get('quantity'))
         
-        cart = get_or_create_cart(request)
-        cart_item = get_object_or_404(CartItem, id=item_id, cart=cart)
+        cart = get_cart(request)
+        if not cart.quantity_of(ticket_type_id):
+            raise Http404('Item not in cart')
         
         if quantity > 0:
-            # ✅ FIXED: Check available tickets using ticket_type
-            available = cart_item.ticket_type.quantity_available
-            if quantity > available:
+            # Re-hold the new quantity (sold and held tickets aren't available)
+            try:
+                HoldService.place(cart, ticket_type_id, quantity)
+            except InsufficientInventory as e:
                 return JsonResponse({
                     'success': False,
-                    'error': f'Only {available} tickets available'
+                    'error': f"Only {e.failures[0]['available']} tickets available"
                 })
             
-            cart_item.quantity = quantity
-            cart_item.save()
+            cart.set_quantity(ticket_type_id, quantity)
         else:
-            cart_item.delete()
-        
-        # Recalculate totals
-        cart.refresh_from_db()
+            HoldService.release(cart, ticket_type_id)
+            cart.remove(ticket_type_id)
         
+        item = next((item for item in cart.items if item.id == ticket_type_id), None)
         return JsonResponse({
             'success': True,
             'cart_count': cart.total_items,
             'cart_total': str(cart.total_price),
-            'item_total': str(cart_item.subtotal) if quantity > 0 else '0.00'
+            'item_total': str(item.subtotal) if item else '0.00'
         })
         
     except Exception as e:
@@ -209,13 +243,13 @@ def update_cart(request):
 def remove_from_cart(request):
     """Remove item from cart via AJAX"""
     try:
-        item_id = request.POST.get('item_id')
-        cart = get_or_create_cart(request)
-        cart_item = get_object_or_404(CartItem, id=item_id, cart=cart)
-        cart_item.delete()
-        
-        # Recalculate totals
-        cart.refresh_from_db()
+        # Cart items are identified by their ticket type
+        ticket_type_id = int(request.POST.get('item_id'))
+        cart = get_cart(request)
+        if not cart.quantity_of(ticket_type_id):
+            raise Http404('Item not in cart')
+        HoldService.release(cart, ticket_type_id)
+        cart.remove(ticket_type_id)
         
         return JsonResponse({
             'success': True,
@@ -231,17 +265,21 @@ def remove_from_cart(request):
 
 def checkout_view(request):
     """Display checkout page with PayPal - FIXED for TicketType"""
-    cart = get_or_create_cart(request)
+    cart = get_cart(request)
     
     if cart.total_items == 0:
         messages.warning(request, 'Your cart is empty')
         return redirect('event_management:event_list')
     
+    queued_event_id = _queued_event_id(request, cart)
+    if queued_event_id:
+        return redirect('booking:waiting_room', event_id=queued_event_id)
+    
     # ✅ FIXED: Build cart items using actual ticket types
     cart_items = []
     total = Decimal('0.00')
     
-    for item in cart.items.select_related('event', 'ticket_type').all():
+    for item in cart.items:
         # Format for your checkout template using actual ticket type data
         cart_items.append({
             'event': {
@@ -284,7 +322,7 @@ def create_ticket_order(request):
     """Create PayPal order for ticket purchase"""
     try:
         data = json.loads(request.body)
-        cart = get_or_create_cart(request)
+        cart = get_cart(request)
         
         if cart.total_items == 0:
             return JsonResponse({'error': 'Cart is empty'}, status=400)
@@ -295,7 +333,23 @@ def create_ticket_order(request):
             if not data.get(field):
                 return JsonResponse({'error': f'{field.replace("_", " ").title()} is required'}, status=400)
         
-        # Calculate total from database cart
+        queued_event_id = _queued_event_id(request, cart)
+        if queued_event_id:
+            return JsonResponse({
+                'error': 'Please wait for your turn in the queue',
+                'queue_url': reverse('booking:waiting_room', args=[queued_event_id]),
+            }, status=403)
+        
+        # Hold everything for a fresh period while the buyer is at PayPal
+        try:
+            HoldService.hold_cart(cart)
+        except InsufficientInventory as e:
+            return JsonResponse({
+                'error': 'Some tickets in your cart are no longer available',
+                'unavailable': e.failures,
+            }, status=409)
+        
+        # Calculate total from the stored cart
         total = cart.total_price
         
         # Store customer data in session for later use
@@ -350,31 +404,69 @@ def capture_ticket_payment(request):
         if not order_id:
             return JsonResponse({'error': 'Order ID is required'}, status=400)
         
-        # Get checkout data from session
-        checkout_data = request.session.get('checkout_data', {})
-        cart = get_or_create_cart(request)
-        
-        if not checkout_data:
-            return JsonResponse({'error': 'Session expired. Please try again.'}, status=400)
-        
-        if cart.total_items == 0:
-            return JsonResponse({'error': 'Cart is empty'}, status=400)
+        # Duplicate submissions wait here, then get the first response replayed
+        with capture_lock(order_id):
+            replayed = CaptureIdempotency.replay(order_id)
+            if replayed is not None:
+                logger.info(f"Replaying capture response for {order_id}")
+                return replayed
+            return _capture_ticket_payment(request, order_id)
         
-        # Verify and capture the payment with PayPal
-        paypal_client = PayPalClient()
+    except json.JSONDecodeError:
+        return JsonResponse({'error': 'Invalid JSON data'}, status=400)
+    except Exception as e:
+        logger.error(f"Capture payment error: {str(e)}")
+        return JsonResponse({'error': 'Payment processing failed'}, status=500)
+
+
+def _capture_ticket_payment(request, order_id):
+    """Capture ``order_id``; runs under ``capture_lock`` with no stored result"""
+    # Get checkout data from session
+    checkout_data = request.session.get('checkout_data', {})
+    cart = get_cart(request)
+
+    if not checkout_data:
+        return JsonResponse({'error': 'Session expired. Please try again.'}, status=400)
+
+    if cart.total_items == 0:
+        return JsonResponse({'error': 'Cart is empty'}, status=400)
+
+    cart_items = cart.items
+    reserved = [(item.ticket_type, item.quantity) for item in cart_items]
+
+    # Take the stock before charging, so a sold-out ticket type is
+    # never paid for. Only this short transaction holds row locks.
+    try:
+        InventoryService.reserve(reserved, cart=cart)
+    except InsufficientInventory as e:
+        logger.info(f"Capture refused for {order_id}: {e}")
+        return JsonResponse({
+            'error': 'Some tickets in your cart are no longer available',
+            'unavailable': e.failures,
+        }, status=409)
+
+    # Verify and capture the payment with PayPal
+    paypal_client = PayPalClient()
+    try:
         capture_result = paypal_client.capture_order(order_id)
+    except Exception:
+        InventoryService.release(reserved)
+        raise
 
-        if not capture_result.get('success') or capture_result.get('status') != 'COMPLETED':
-            logger.error(
-                f"PayPal capture failed for {order_id}: {capture_result.get('error')}"
-            )
-            return JsonResponse({'error': 'Payment verification failed'}, status=400)
+    if not capture_result.get('success') or capture_result.get('status') != 'COMPLETED':
+        logger.error(
+            f"PayPal capture failed for {order_id}: {capture_result.get('error')}"
+        )
+        InventoryService.release(reserved)
+        # Not stored: PayPal lets a declined order be captured again
+        return JsonResponse({'error': 'Payment verification failed'}, status=400)
 
-        payer_id = None
-        if capture_result.get('response') and getattr(capture_result['response'], 'payer', None):
-            payer_id = capture_result['response'].payer.payer_id
+    payer_id = None
+    if capture_result.get('response') and getattr(capture_result['response'], 'payer', None):
+        payer_id = capture_result['response'].payer.payer_id
 
-        # Create booking order
+    # Create booking order
+    try:
         with transaction.atomic():
             order = Order.objects.create(
                 user=request.user if request.user.is_authenticated else None,
@@ -389,44 +481,102 @@ def capture_ticket_payment(request):
                 paid_at=timezone.now(),
                 total_amount=cart.total_price
             )
-            
+
             # ✅ FIXED: Create order items from cart with ticket_type
-            for cart_item in cart.items.all():
-                order_item = OrderItem.objects.create(
+            order_items = OrderItem.objects.bulk_create([
+                OrderItem(
                     order=order,
                     event=cart_item.event,
                     ticket_type=cart_item.ticket_type,  # ✅ FIXED: Include ticket_type
                     quantity=cart_item.quantity,
                     price=cart_item.ticket_type.price  # ✅ FIXED: Use ticket_type price
                 )
-                # Generate tickets using the model method
-                order_item.generate_tickets()
-            
-            # Clear cart
-            cart.items.all().delete()
-            
+                for cart_item in cart_items
+            ])
+            # Stock was reserved above, before the capture; QR codes are
+            # rendered after commit
+            TicketIssuer.issue(order_items)
+
+            # Clear cart; the holds have become sales
+            cart.clear()
+            HoldService.release(cart)
+
             # Clear session data
             if 'checkout_data' in request.session:
                 del request.session['checkout_data']
             
-            # Send confirmation email
-            try:
-                send_order_confirmation_email(order)
-            except Exception as e:
-                logger.error(f"Email error: {e}")
-        
-        logger.info(f"Ticket payment captured: {order_id}, order: {order.order_number}")
-        
-        return JsonResponse({
-            'success': True,
-            'redirect_url': reverse('booking:order_success', kwargs={'order_id': order.id})
-        })
-        
-    except json.JSONDecodeError:
-        return JsonResponse({'error': 'Invalid JSON data'}, status=400)
+            response = CaptureIdempotency.respond(order_id, {
+                'success': True,
+                'redirect_url': reverse('booking:order_success', kwargs={'order_id': order.id})
+            }, order=order)
+    except Exception:
+        # The payment was taken but there is no order: give the stock
+        # back and leave a trail for a manual refund
+        logger.exception(f"Order creation failed after capturing {order_id}; refund required")
+        InventoryService.release(reserved)
+        return CaptureIdempotency.respond(order_id, {'error': 'Payment processing failed'}, status=500)
+
+    # Send confirmation email
+    try:
+        send_order_confirmation_email(order)
     except Exception as e:
-        logger.error(f"Capture payment error: {str(e)}")
-        return JsonResponse({'error': 'Payment processing failed'}, status=500)
+        logger.error(f"Email error: {e}")
+
+    logger.info(f"Ticket payment captured: {order_id}, order: {order.order_number}")
+
+    return response
+
+
+def _queued_event_id(request, cart):
+    """First event in the cart whose waiting room hasn't admitted this visitor yet"""
+    for event_id in sorted({item.event.pk for item in cart.items}):
+        if not WaitingRoom.is_admitted(request, event_id):
+            return event_id
+    return None
+
+
+def waiting_room(request, event_id):
+    """Waiting page for an event with a queue; joins the line on the first visit"""
+    event = get_object_or_404(Event.objects.only('pk', 'title', 'slug'), pk=event_id)
+    token = request.COOKIES.get(cookie_name(event.pk))
+    visitor = WaitingRoom.visitor_id(request, create=True)
+    status = WaitingRoom.status(event.pk, token, visitor)
+    if status is None:
+        token = WaitingRoom.join(event.pk, visitor)
+        status = WaitingRoom.status(event.pk, token, visitor)
+    
+    if status['admitted']:
+        response = redirect(event.get_absolute_url())
+    else:
+        response = render(request, 'booking/waiting_room.html', {
+            'event': event,
+            'status': status,
+            'wait_minutes': max(1, math.ceil((status['wait_seconds'] or 0) / 60)),
+            'poll_seconds': getattr(settings, 'WAITING_ROOM_POLL_SECONDS', 5),
+        })
+    if token:
+        response.set_cookie(
+            cookie_name(event.pk), token, max_age=token_max_age(),
+            secure=request.is_secure(), httponly=True, samesite='Lax',
+        )
+    return response
+
+
+def waiting_room_status(request, event_id):
+    """Polled by the waiting page; answered from the session and the cache"""
+    status = WaitingRoom.status(
+        event_id, request.COOKIES.get(cookie_name(event_id)), WaitingRoom.visitor_id(request)
+    )
+    if status is None:
+        response = JsonResponse({
+            'admitted': False,
+            'error': 'Not in the queue',
+            'queue_url': reverse('booking:waiting_room', args=[event_id]),
+        }, status=403)
+    else:
+        response = JsonResponse(status)
+    response['Cache-Control'] = 'no-store'
+    return response
 
 
 def order_success(request, order_id):
@@ -481,6 +631,118 @@ def download_single_ticket(request, ticket_id):
     return response
 
 
+@require_GET
+@cache_control(private=True, max_age=60 * 60 * 24)
+@condition(etag_func=lambda request, code: qr_etag(code))
+def ticket_qr_code(request, code):
+    """
+    QR code image for a ticket, rendered on first view and cached. It only
+    encodes the code that is already in the URL, so no login is needed;
+    codes that don't verify 404 without a query, so nothing else gets
+    rendered or cached.
+    """
+    if ticket_codes.decode(code) is None:
+        raise Http404("Ticket not found")
+    return HttpResponse(QRCache.get(code), content_type='image/png')
+
+
+def scanner_api(view):
+    """
+    For JSON endpoints called by scanner devices: they authenticate with a
+    device key rather than a session, so there is no cookie to forge and
+    CSRF checks don't apply.
+    """
+    @csrf_exempt
+    @wraps(view)
+    def wrapped(request, *args, **kwargs):
+        user = ScannerAuth.authenticate(request)
+        if user is None:
+            response = JsonResponse({'status': 'login_required'}, status=401)
+            response['WWW-Authenticate'] = 'Token'
+            return response
+        request.user = user
+        return view(request, *args, **kwargs)
+    return wrapped
+
+
+def _scan_response(status, ticket):
+    payload = {'status': status}
+    if ticket:
+        payload.update(
+            ticket=ticket['ticket_number'],
+            event=ticket['event'],
+            ticket_type=ticket['ticket_type'],
+            used_at=ticket['used_at'],
+        )
+    response = JsonResponse(payload, status=STATUS_CODES[status])
+    response['Cache-Control'] = 'no-store'
+    return response
+
+
+@require_http_methods(['GET', 'POST'])
+def validate_ticket(request, ticket_code):
+    """
+    Door scanning from a logged-in browser. GET shows whether a ticket is
+    valid; POST admits it, at most once. Scanner apps use ``scan_ticket``.
+    """
+    wants_json = 'application/json' in request.headers.get('Accept', '')
+    if not request.user.is_authenticated:
+        if wants_json:
+            return JsonResponse({'status': 'login_required'}, status=401)
+        return redirect_to_login(request.get_full_path())
+
+    status, ticket = TicketValidator.validate(request.user, ticket_code, admit=request.method == 'POST')
+    if wants_json:
+        return _scan_response(status, ticket)
+    response = render(request, 'booking/validate_ticket.html', {
+        'status': status,
+        'ticket': ticket,
+        'ticket_code': ticket_code,
+        'admitted': status == ADMITTED,
+    }, status=STATUS_CODES[status])
+    response['Cache-Control'] = 'no-store'
+    return response
+
+
+@scanner_api
+@require_http_methods(['GET', 'POST'])
+def scan_ticket(request, ticket_code):
+    """Scanner app API: GET checks a ticket, POST admits it at most once"""
+    return _scan_response(*TicketValidator.validate(request.user, ticket_code, admit=request.method == 'POST'))
+
+
+@scanner_api
+@require_GET
+def gate_manifest(request, event_id):
+    """Signed offline manifest for scanner devices at the event's gates"""
+    if not TicketValidator.can_scan(request.user, event_id):
+        return JsonResponse({'error': 'Not allowed to scan for this event'}, status=403)
+    signed = GateManifest.get(event_id)
+    etag = f'"{signed["manifest"]["version"]}"'
+    if etag in parse_etags(request.headers.get('If-None-Match', '')):
+        response = HttpResponse(status=304)
+    else:
+        response = JsonResponse(signed)
+    response['ETag'] = etag
+    response['Cache-Control'] = 'private, no-cache'
+    return response
+
+
+@scanner_api
+@require_POST
+def gate_sync(request, event_id):
+    """Merge a scanner device's batch of admitted tickets; reports conflicts"""
+    if not TicketValidator.can_scan(request.user, event_id):
+        return JsonResponse({'error': 'Not allowed to scan for this event'}, status=403)
+    try:
+        entries = json.loads(request.body)['used']
+    except (ValueError, KeyError, TypeError):
+        return JsonResponse({'error': 'Expected {"used": [...]}'}, status=400)
+    if not isinstance(entries, list) or not all(isinstance(entry, dict) for entry in entries):
+        return JsonResponse({'error': 'Expected {"used": [...]}'}, status=400)
+    return JsonResponse(GateManifest.merge_used(event_id, entries))
+
+
 @login_required
 def order_history(request):
     """Display user's order history"""
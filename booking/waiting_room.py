@@ -0,0 +1,142 @@
+# booking/waiting_room.py
+"""Virtual waiting room: signed queue tokens and rate-limited admission, kept in the cache."""
+
+import math
+import secrets
+import time
+
+from django.conf import settings
+from django.core import signing
+from django.core.cache import cache
+
+from event_management.models import Event
+
+TOKEN_SALT = 'booking.waiting_room'
+COOKIE_PREFIX = 'waiting_room_'
+VISITOR_SESSION_KEY = 'waiting_room_visitor'
+CONFIG_TIMEOUT = 30          # seconds an event's waiting room settings are cached
+QUEUE_TIMEOUT = 60 * 60 * 24  # a line is forgotten a day after it opened
+
+
+def _key(event_id, name):
+    return f'waiting_room:{event_id}:{name}'
+
+
+def cookie_name(event_id):
+    return f'{COOKIE_PREFIX}{event_id}'
+
+
+def token_max_age():
+    return getattr(settings, 'WAITING_ROOM_TOKEN_MAX_AGE', 60 * 60 * 3)
+
+
+class WaitingRoom:
+    """Queue tokens and admission for events with a waiting room"""
+
+    @staticmethod
+    def config(event_id):
+        """``(enabled, rate per minute)`` for the event, cached for a few seconds"""
+        config = cache.get(_key(event_id, 'config'))
+        if config is None:
+            row = Event.objects.filter(pk=event_id).values_list(
+                'waiting_room_enabled', 'waiting_room_rate'
+            ).first()
+            config = tuple(row) if row else (False, 0)
+            cache.set(_key(event_id, 'config'), config, CONFIG_TIMEOUT)
+        return config
+
+    @staticmethod
+    def visitor_id(request, create=False):
+        """
+        The id queue tokens are bound to, kept in the session so it survives
+        logging in; with ``create`` one is made if the session has none.
+        """
+        visitor = request.session.get(VISITOR_SESSION_KEY)
+        if visitor is None and create:
+            visitor = request.session[VISITOR_SESSION_KEY] = secrets.token_urlsafe(16)
+        return visitor
+
+    @staticmethod
+    def join(event_id, visitor, now=None):
+        """
+        Take the next place in line for ``visitor``; returns a signed token.
+        Each visitor claims a slot with one atomic ``incr``. Slot ``n`` is
+        admitted ``n - rate`` ticks (60 / rate seconds each) after the line
+        opened, so the first ``rate`` visitors go straight in.
+        """
+        now = now if now is not None else time.time()
+        rate = WaitingRoom.config(event_id)[1]
+        cache.add(_key(event_id, 'opened'), now, QUEUE_TIMEOUT)
+        cache.add(_key(event_id, 'joined'), 0, QUEUE_TIMEOUT)
+        cache.add(_key(event_id, 'slots'), 0, QUEUE_TIMEOUT)
+        opened = cache.get(_key(event_id, 'opened'), now)
+
+        # After the line sits idle, skip the slots nobody claimed so they
+        # aren't banked; only the first visitor in a tick moves it on
+        tick = int(max(0, now - opened) * rate / 60)
+        behind = tick - max(0, cache.get(_key(event_id, 'slots'), 0) + 1 - rate)
+        if behind > 0 and cache.add(_key(event_id, f'caught_up:{opened}:{tick}'), True, 60):
+            cache.incr(_key(event_id, 'slots'), behind)
+
+        slot = cache.incr(_key(event_id, 'slots'))
+        position = cache.incr(_key(event_id, 'joined'))
+        admit_at = opened + max(0, slot - rate) * 60 / rate if rate > 0 else None
+        return signing.dumps(
+            {'e': event_id, 'p': position, 'o': opened, 'a': admit_at, 'v': visitor}, salt=TOKEN_SALT
+        )
+
+    @staticmethod
+    def _load(event_id, token, visitor):
+        if not token or not visitor:
+            return None
+        try:
+            data = signing.loads(token, salt=TOKEN_SALT, max_age=token_max_age())
+        except signing.BadSignature:
+            return None
+        # Tokens of another visitor, or from a line that has since been reset, don't count
+        if data.get('e') != event_id or data.get('v') != visitor:
+            return None
+        if data.get('o') != cache.get(_key(event_id, 'opened')):
+            return None
+        return data
+
+    @staticmethod
+    def position(event_id, token, visitor):
+        """Place in line for ``token``, or None if it isn't a current token of ``visitor`` for this event"""
+        data = WaitingRoom._load(event_id, token, visitor)
+        return data['p'] if data else None
+
+    @staticmethod
+    def status(event_id, token, visitor, now=None):
+        """Polling payload for ``token``, or None if the token isn't valid; read-only"""
+        enabled, rate = WaitingRoom.config(event_id)
+        if not enabled:
+            return {'admitted': True, 'position': None, 'ahead': 0, 'wait_seconds': 0}
+        data = WaitingRoom._load(event_id, token, visitor)
+        if data is None:
+            return None
+        if data['a'] is None or not rate:
+            return {'admitted': False, 'position': data['p'], 'ahead': data['p'], 'wait_seconds': None}
+        now = now if now is not None else time.time()
+        wait_seconds = max(0, math.ceil(data['a'] - now))
+        return {
+            'admitted': wait_seconds == 0,
+            'position': data['p'],
+            'ahead': math.ceil(wait_seconds * rate / 60),
+            'wait_seconds': wait_seconds,
+        }
+
+    @staticmethod
+    def is_admitted(request, event_id):
+        """Whether this visitor may shop for the event now"""
+        if not WaitingRoom.config(event_id)[0]:
+            return True
+        status = WaitingRoom.status(
+            event_id, request.COOKIES.get(cookie_name(event_id)), WaitingRoom.visitor_id(request)
+        )
+        return bool(status and status['admitted'])
+
+    @staticmethod
+    def reset(event_id):
+        """Close the line; the next visitor starts a new one"""
+        cache.delete_many([_key(event_id, name) for name in ('config', 'opened', 'joined', 'slots')])
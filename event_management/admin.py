@@ -15,7 +15,7 @@ class CategoryAdmin(admin.ModelAdmin):
 class EventAdmin(admin.ModelAdmin):
     list_display = ('title', 'organizer', 'category', 'date', 'venue', 'price', 
                     'is_approved', 'is_featured', 'is_active', 'status_display')
-    list_filter = ('is_approved', 'category', 'is_featured', 'is_active', 'date')
+    list_filter = ('is_approved', 'category', 'is_featured', 'is_active', 'waiting_room_enabled', 'date')
     search_fields = ('title', 'description', 'venue', 'organizer__company_name')
     prepopulated_fields = {'slug': ('title',)}
     date_hierarchy = 'date'
@@ -26,7 +26,7 @@ class EventAdmin(admin.ModelAdmin):
         return qs.select_related('category', 'organizer', 'approved_by')
     
     # Admin actions
-    actions = ['approve_events', 'reject_events']
+    actions = ['approve_events', 'reject_events', 'recalculate_listing_fees', 'reset_waiting_rooms']
     
     def approve_events(self, request, queryset):
         count = 0
@@ -45,6 +45,28 @@ class EventAdmin(admin.ModelAdmin):
         self.message_user(request, f'{count} events rejected.')
     reject_events.short_description = 'Reject selected events'
     
+    def recalculate_listing_fees(self, request, queryset):
+        from .pricing import PricingService
+        events = list(queryset.filter(listing_paid=False).only('pk', 'capacity', 'price'))
+        quotes = PricingService.quote_fees(
+            [event.capacity for event in events],
+            [event.price for event in events],
+        )
+        for event, (fee, tier_name) in zip(events, quotes):
+            event.listing_fee = fee
+            event.listing_tier = tier_name
+        Event.objects.bulk_update(events, ['listing_fee', 'listing_tier'], batch_size=500)
+        self.message_user(request, f'Listing fees recalculated for {len(events)} unpaid events.')
+    recalculate_listing_fees.short_description = 'Recalculate listing fees (unpaid listings)'
+
+    def reset_waiting_rooms(self, request, queryset):
+        from booking.waiting_room import WaitingRoom
+        event_ids = list(queryset.values_list('pk', flat=True))
+        for event_id in event_ids:
+            WaitingRoom.reset(event_id)
+        self.message_user(request, f'Waiting room queues reset for {len(event_ids)} events.')
+    reset_waiting_rooms.short_description = 'Reset waiting room queues'
+
     # Custom display
     def status_display(self, obj):
         return obj.status_display
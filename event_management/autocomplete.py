@@ -0,0 +1,122 @@
+# event_management/autocomplete.py
+"""Typeahead suggestions for the event list search box."""
+
+import threading
+import time
+from collections import OrderedDict
+
+from .models import Category, Event
+
+MIN_PREFIX_LENGTH = 2
+MAX_PREFIX_LENGTH = 50
+TRIGRAM_MIN_LENGTH = 3
+SUGGESTION_LIMIT = 6
+
+
+class PrefixCache:
+    """Thread-safe LRU of prefix -> suggestions with a short TTL"""
+
+    def __init__(self, maxsize=512, ttl=60):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            expires, value = entry
+            if expires < time.monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+_prefix_cache = PrefixCache()
+_category_cache = PrefixCache(maxsize=1, ttl=60 * 10)
+
+
+def normalize_prefix(prefix):
+    return ' '.join((prefix or '').replace('\x00', '').split()).lower()[:MAX_PREFIX_LENGTH]
+
+
+def _categories():
+    categories = _category_cache.get('all')
+    if categories is None:
+        categories = list(Category.objects.values('name', 'slug'))
+        _category_cache.set('all', categories)
+    return categories
+
+
+def _event_suggestions(prefix):
+    events = Event.public.order_by('date', 'id')
+    found = list(events.filter(title__istartswith=prefix).values('title', 'slug', 'date')[:SUGGESTION_LIMIT])
+
+    if len(found) < SUGGESTION_LIMIT and len(prefix) >= TRIGRAM_MIN_LENGTH:
+        # Top up with fuzzy word matches ("jaz" -> "Sunset Jazz Night")
+        seen = [event['slug'] for event in found]
+        found += list(
+            events.filter(title__trigram_word_similar=prefix)
+            .exclude(slug__in=seen)
+            .values('title', 'slug', 'date')[:SUGGESTION_LIMIT - len(found)]
+        )
+    return found
+
+
+def _venue_suggestions(prefix):
+    venues = Event.public.order_by('venue').values_list('venue', flat=True).distinct()
+    found = list(venues.filter(venue__istartswith=prefix)[:SUGGESTION_LIMIT])
+
+    if len(found) < SUGGESTION_LIMIT and len(prefix) >= TRIGRAM_MIN_LENGTH:
+        # Same top-up as titles, served by the event_venue_trgm index ("hous" -> "Opera House")
+        found += list(
+            venues.filter(venue__trigram_word_similar=prefix)
+            .exclude(venue__in=found)[:SUGGESTION_LIMIT - len(found)]
+        )
+    return found
+
+
+def _category_suggestions(prefix):
+    return [
+        category for category in _categories()
+        if category['name'].lower().startswith(prefix) or f' {prefix}' in category['name'].lower()
+    ][:SUGGESTION_LIMIT]
+
+
+def suggest(prefix):
+    """
+    Return ``{'events': [...], 'venues': [...], 'categories': [...]}`` for
+    ``prefix``, or empty lists when it is too short to be useful.
+    """
+    prefix = normalize_prefix(prefix)
+    if len(prefix) < MIN_PREFIX_LENGTH:
+        return {'events': [], 'venues': [], 'categories': []}
+
+    suggestions = _prefix_cache.get(prefix)
+    if suggestions is None:
+        suggestions = {
+            'events': _event_suggestions(prefix),
+            'venues': _venue_suggestions(prefix),
+            'categories': _category_suggestions(prefix),
+        }
+        _prefix_cache.set(prefix, suggestions)
+    return suggestions
+
+
+def clear_cache():
+    _prefix_cache.clear()
+    _category_cache.clear()
@@ -0,0 +1,93 @@
+# event_management/facets.py
+"""Facet counts for the event list sidebar."""
+
+import hashlib
+import json
+
+from django.core.cache import cache
+from django.db.models import Count, Q
+
+from .filters import QUICK_FILTERS
+from .models import Category, Event
+
+FACET_CACHE_TIMEOUT = 60
+CATEGORY_CACHE_TIMEOUT = 60 * 10
+
+# Chips shown in the sidebar (template-friendly key -> QUICK_FILTERS name)
+FACET_FLAGS = {
+    'free': 'free',
+    'weekend': 'weekend',
+    'family_friendly': 'family-friendly',
+    'pet_friendly': 'pet-friendly',
+    'offers': 'offers',
+}
+
+
+def _count(q):
+    return Count('id', filter=q) if q else Count('id')
+
+
+class EventFacets:
+    """Computes and caches facet counts for an ``EventFilter``"""
+
+    @staticmethod
+    def categories():
+        """All categories, cached briefly since they rarely change"""
+        categories = cache.get('facets:categories')
+        if categories is None:
+            categories = list(Category.objects.all())
+            cache.set('facets:categories', categories, CATEGORY_CACHE_TIMEOUT)
+        return categories
+
+    @staticmethod
+    def cache_key(event_filter):
+        """Key for the filter state; sort order and cursor don't affect counts"""
+        state = [
+            event_filter.search,
+            event_filter.category,
+            sorted(event_filter.flags),
+            event_filter.date_from,
+            event_filter.date_to,
+            event_filter.price_min,
+            event_filter.price_max,
+        ]
+        digest = hashlib.md5(json.dumps(state, default=str).encode()).hexdigest()
+        return f'facets:{digest}'
+
+    @staticmethod
+    def compute(event_filter, categories=None):
+        """Count every facet for ``event_filter`` in one aggregate query"""
+        if categories is None:
+            categories = EventFacets.categories()
+
+        if event_filter.category:
+            selected = [c.pk for c in categories if c.slug == event_filter.category]
+            category_q = Q(category_id__in=selected)
+        else:
+            category_q = Q()
+        flags_q = event_filter.flags_q()
+
+        # Category counts ignore the selected category; chip counts keep it
+        aggregates = {'total': _count(category_q & flags_q)}
+        for category in categories:
+            aggregates[f'category_{category.pk}'] = _count(Q(category_id=category.pk) & flags_q)
+        for key, name in FACET_FLAGS.items():
+            aggregates[f'flag_{key}'] = _count(category_q & flags_q & QUICK_FILTERS[name]())
+
+        row = Event.public.filter(event_filter.refinements_q()).aggregate(**aggregates)
+
+        return {
+            'total': row['total'],
+            'categories': {c.slug: row[f'category_{c.pk}'] for c in categories},
+            'flags': {key: row[f'flag_{key}'] for key in FACET_FLAGS},
+        }
+
+    @staticmethod
+    def for_filter(event_filter, categories=None):
+        """Return cached facet counts for ``event_filter``"""
+        key = EventFacets.cache_key(event_filter)
+        facets = cache.get(key)
+        if facets is None:
+            facets = EventFacets.compute(event_filter, categories)
+            cache.set(key, facets, FACET_CACHE_TIMEOUT)
+        return facets
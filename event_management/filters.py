@@ -0,0 +1,134 @@
+# event_management/filters.py
+"""Query building for the public event list."""
+
+from datetime import datetime, time, timedelta
+from decimal import Decimal, InvalidOperation
+
+from django.contrib.postgres.search import SearchQuery
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+
+from .models import Event
+from .pagination import DEFAULT_PAGE_SIZE, KeysetPaginator
+from .search import normalize_query
+
+
+def _start_of_day(day):
+    return timezone.make_aware(datetime.combine(day, time.min))
+
+
+def _today_q():
+    today = timezone.localdate()
+    return Q(date__gte=_start_of_day(today), date__lt=_start_of_day(today + timedelta(days=1)))
+
+
+# Quick-filter chips: value in the query string -> Q factory
+QUICK_FILTERS = {
+    'free': lambda: Q(price=0),
+    'weekend': lambda: Q(date__week_day__in=[1, 7]),  # Sunday, Saturday
+    'family-friendly': lambda: Q(family_friendly=True),
+    'pet-friendly': lambda: Q(pet_friendly=True),
+    'offers': lambda: Q(has_offers=True),
+    'today': _today_q,
+    'featured': lambda: Q(is_featured=True),
+    'premium': lambda: Q(is_premium=True),
+}
+
+# Sort options in the template -> keyset ordering (always ending in a unique column)
+SORT_ORDERS = {
+    'date': ['date', 'id'],
+    '-date': ['-date', '-id'],
+    'price': ['price', 'id'],
+    '-price': ['-price', '-id'],
+    'title': ['title', 'id'],
+}
+DEFAULT_SORT = 'date'
+
+
+def _param(params, name):
+    """A query string value with NULs dropped, since Postgres rejects them"""
+    return (params.get(name) or '').replace('\x00', '')
+
+
+def _parse_decimal(value):
+    try:
+        amount = Decimal(value)
+    except (InvalidOperation, TypeError, ValueError):
+        return None
+    return amount if amount.is_finite() and amount >= 0 else None
+
+
+def _parse_date(value):
+    try:
+        return parse_date(value or '')
+    except ValueError:
+        return None
+
+
+class EventFilter:
+    """Filters and sort order for the public event list"""
+
+    def __init__(self, params):
+        self.search = normalize_query(_param(params, 'search'))
+        self.category = _param(params, 'category').strip()
+        self.flags = list(dict.fromkeys(f for f in params.getlist('filter') if f in QUICK_FILTERS))
+        self.date_from = _parse_date(_param(params, 'date_from'))
+        self.date_to = _parse_date(_param(params, 'date_to'))
+        self.price_min = _parse_decimal(_param(params, 'price_min'))
+        self.price_max = _parse_decimal(_param(params, 'price_max'))
+        sort = _param(params, 'sort')
+        self.sort = sort if sort in SORT_ORDERS else DEFAULT_SORT
+        self.show_advanced = _param(params, 'show_advanced') == 'true'
+
+    def refinements_q(self):
+        """Search text plus date and price ranges"""
+        q = Q()
+        if self.search:
+            q &= Q(search_vector=SearchQuery(self.search, search_type='websearch'))
+        if self.date_from:
+            q &= Q(date__gte=_start_of_day(self.date_from))
+        if self.date_to:
+            q &= Q(date__lt=_start_of_day(self.date_to + timedelta(days=1)))
+        if self.price_min is not None:
+            q &= Q(price__gte=self.price_min)
+        if self.price_max is not None:
+            q &= Q(price__lte=self.price_max)
+        return q
+
+    def category_q(self):
+        return Q(category__slug=self.category) if self.category else Q()
+
+    def flags_q(self):
+        q = Q()
+        for name in self.flags:
+            q &= QUICK_FILTERS[name]()
+        return q
+
+    def queryset(self):
+        return Event.public.filter(
+            self.refinements_q() & self.category_q() & self.flags_q()
+        ).select_related('category')
+
+    def paginator(self, per_page=DEFAULT_PAGE_SIZE):
+        # The sort is part of the cursor key so a cursor can't be replayed
+        # against a different ordering
+        return KeysetPaginator(
+            self.queryset(), SORT_ORDERS[self.sort], per_page=per_page, key=f'list{self.sort}'
+        )
+
+    def as_context(self):
+        """Template context describing the active filters"""
+        return {
+            'search_query': self.search,
+            'selected_category': self.category,
+            'selected_filters': self.flags,
+            'show_advanced': self.show_advanced,
+            'current_filters': {
+                'date_from': self.date_from.isoformat() if self.date_from else '',
+                'date_to': self.date_to.isoformat() if self.date_to else '',
+                'price_min': self.price_min if self.price_min is not None else '',
+                'price_max': self.price_max if self.price_max is not None else '',
+                'sort': self.sort,
+            },
+        }
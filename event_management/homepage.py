@@ -0,0 +1,74 @@
+# event_management/homepage.py
+"""Data for the public homepage."""
+
+from datetime import datetime, time, timedelta
+
+from django.core.cache import cache
+from django.db.models import F, Window
+from django.db.models.functions import RowNumber
+from django.utils import timezone
+
+from .models import Event
+
+HOMEPAGE_CACHE_TIMEOUT = 60 * 5
+TODAY_EVENTS_LIMIT = 12
+FEATURED_EVENTS_LIMIT = 6
+TEASERS_PER_CATEGORY = 4
+
+
+class HomepageService:
+    """Builds and caches the homepage context"""
+
+    @staticmethod
+    def cache_key():
+        # Keyed by date so "today" rolls over at midnight without a signal
+        return f'homepage:{timezone.localdate().isoformat()}'
+
+    @staticmethod
+    def build():
+        """Compute the homepage context (four queries)"""
+        events = Event.public.select_related('category')
+        tomorrow = timezone.localdate() + timedelta(days=1)
+        end_of_today = timezone.make_aware(datetime.combine(tomorrow, time.min))
+
+        today_events = list(events.filter(date__lt=end_of_today).order_by('date', 'id')[:TODAY_EVENTS_LIMIT])
+        featured_events = list(events.filter(is_featured=True).order_by('date', 'id')[:FEATURED_EVENTS_LIMIT])
+        premium_events = list(events.filter(is_premium=True).order_by('date', 'id')[:FEATURED_EVENTS_LIMIT])
+
+        # The next few events in every category, in a single windowed query
+        teasers = (
+            events
+            .annotate(category_position=Window(
+                RowNumber(),
+                partition_by=[F('category')],
+                order_by=[F('date').asc(), F('id').asc()],
+            ))
+            .filter(category_position__lte=TEASERS_PER_CATEGORY)
+            .order_by('category__name', 'date', 'id')
+        )
+        category_teasers = []
+        for event in teasers:
+            if not category_teasers or category_teasers[-1]['category'].pk != event.category_id:
+                category_teasers.append({'category': event.category, 'events': []})
+            category_teasers[-1]['events'].append(event)
+
+        return {
+            'today_events': today_events,
+            'featured_events': featured_events,
+            'premium_events': premium_events,
+            'category_teasers': category_teasers,
+        }
+
+    @staticmethod
+    def get_context():
+        """Return the cached homepage context, building it on a miss"""
+        key = HomepageService.cache_key()
+        context = cache.get(key)
+        if context is None:
+            context = HomepageService.build()
+            cache.set(key, context, HOMEPAGE_CACHE_TIMEOUT)
+        return context
+
+    @staticmethod
+    def invalidate():
+        cache.delete(HomepageService.cache_key())
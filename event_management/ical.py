@@ -0,0 +1,120 @@
+# event_management/ical.py
+"""iCalendar (RFC 5545) output for single events and subscription feeds."""
+
+import hashlib
+from datetime import datetime, timezone as dt_timezone
+
+from django.db.models import Count, Max
+
+PRODID = '-//Jersey Events//EN'
+UID_DOMAIN = 'jerseyevents.com'
+MAX_LINE_OCTETS = 75
+FEED_CHUNK_SIZE = 500
+DESCRIPTION_LENGTH = 1000
+FEED_MAX_AGE = 60 * 15
+
+
+def escape_text(value):
+    """Escape a TEXT value: backslash, semicolon, comma and newlines"""
+    return (
+        str(value or '')
+        .replace('\\', '\\\\')
+        .replace(';', '\\;')
+        .replace(',', '\\,')
+        .replace('\r\n', '\\n')
+        .replace('\n', '\\n')
+        .replace('\r', '\\n')
+    )
+
+
+def fold_line(line):
+    """
+    Fold a content line into 75-octet chunks joined by CRLF + space,
+    never splitting a multi-byte UTF-8 character.
+    """
+    if len(line.encode('utf-8')) <= MAX_LINE_OCTETS:
+        return line + '\r\n'
+
+    chunks = []
+    current = ''
+    size = 0
+    limit = MAX_LINE_OCTETS
+    for char in line:
+        width = len(char.encode('utf-8'))
+        if size + width > limit:
+            chunks.append(current)
+            # Continuation lines start with a space, which counts as an octet
+            current, size, limit = '', 0, MAX_LINE_OCTETS - 1
+        current += char
+        size += width
+    chunks.append(current)
+    return '\r\n '.join(chunks) + '\r\n'
+
+
+def format_datetime(value):
+    """UTC DATE-TIME form, e.g. ``20250101T190000Z``"""
+    return value.astimezone(dt_timezone.utc).strftime('%Y%m%dT%H%M%SZ')
+
+
+def event_lines(event, base_url='', dtstamp=None):
+    """Unfolded content lines for one VEVENT"""
+    dtstamp = dtstamp or event.updated_at or datetime.now(dt_timezone.utc)
+    lines = [
+        'BEGIN:VEVENT',
+        f'UID:{event.pk}@{UID_DOMAIN}',
+        f'DTSTAMP:{format_datetime(dtstamp)}',
+        f'DTSTART:{format_datetime(event.date)}',
+        f'DTEND:{format_datetime(event.end_date or event.date)}',
+        f'SUMMARY:{escape_text(event.title)}',
+        f'DESCRIPTION:{escape_text(event.description[:DESCRIPTION_LENGTH])}',
+        f'LOCATION:{escape_text(", ".join(filter(None, [event.venue, event.address])))}',
+    ]
+    if base_url:
+        lines.append(f'URL:{base_url}{event.get_absolute_url()}')
+    if event.category_id:
+        lines.append(f'CATEGORIES:{escape_text(event.category.name)}')
+    if event.updated_at:
+        lines.append(f'LAST-MODIFIED:{format_datetime(event.updated_at)}')
+    lines.append('END:VEVENT')
+    return lines
+
+
+def calendar_header(name=None):
+    lines = [
+        'BEGIN:VCALENDAR',
+        'VERSION:2.0',
+        f'PRODID:{PRODID}',
+        'CALSCALE:GREGORIAN',
+        'METHOD:PUBLISH',
+    ]
+    if name:
+        lines.append(f'X-WR-CALNAME:{escape_text(name)}')
+    return lines
+
+
+def render_event(event, base_url=''):
+    """A complete one-event calendar as a string"""
+    lines = calendar_header() + event_lines(event, base_url) + ['END:VCALENDAR']
+    return ''.join(fold_line(line) for line in lines)
+
+
+def stream_calendar(events, name=None, base_url=''):
+    """Yield a calendar for ``events`` one folded VEVENT at a time"""
+    yield ''.join(fold_line(line) for line in calendar_header(name))
+    for event in events.select_related('category').iterator(chunk_size=FEED_CHUNK_SIZE):
+        yield ''.join(fold_line(line) for line in event_lines(event, base_url))
+    yield fold_line('END:VCALENDAR')
+
+
+def feed_validators(events, key):
+    """
+    Return ``(etag, last_modified)`` for a feed of ``events`` from a single
+    aggregate query; no event rows are fetched.
+    """
+    state = events.order_by().aggregate(count=Count('id'), last_modified=Max('updated_at'))
+    last_modified = state['last_modified']
+    # The count catches events dropping out of the feed (deleted,
+    # unpublished or past), which don't move the max updated_at
+    stamp = last_modified.isoformat() if last_modified else ''
+    etag = hashlib.md5(f"{key}:{state['count']}:{stamp}".encode()).hexdigest()
+    return etag, last_modified
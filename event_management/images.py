@@ -0,0 +1,151 @@
+# event_management/images.py
+"""Responsive image variants for ``Event.image`` and ``EventImage.image``."""
+
+import hashlib
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import close_old_connections, transaction
+from PIL import Image, ImageOps
+
+logger = logging.getLogger(__name__)
+
+# name -> (width, height, srcset widths); renditions are cropped to the box
+VARIANTS = {
+    'thumbnail': (160, 120, [160, 320]),
+    'card': (480, 300, [480, 960]),
+    'detail': (1200, 675, [800, 1200, 1600]),
+    'hero': (1920, 800, [960, 1920]),
+}
+FORMATS = {
+    'webp': ('WEBP', {'quality': 80, 'method': 4}),
+    'jpeg': ('JPEG', {'quality': 82, 'optimize': True, 'progressive': True}),
+}
+VARIANT_DIR = 'events/variants'
+
+_executor = None
+
+
+def _get_executor():
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=getattr(settings, 'IMAGE_VARIANT_WORKERS', 2),
+            thread_name_prefix='image-variants',
+        )
+    return _executor
+
+
+def content_hash(field_file):
+    digest = hashlib.sha256()
+    field_file.open('rb')
+    try:
+        for chunk in field_file.chunks():
+            digest.update(chunk)
+    finally:
+        field_file.close()
+    return digest.hexdigest()[:20]
+
+
+def _rgb(image):
+    """Flatten transparency onto white so the image can be saved as JPEG"""
+    if image.mode in ('RGBA', 'LA') or (image.mode == 'P' and 'transparency' in image.info):
+        image = image.convert('RGBA')
+        background = Image.new('RGB', image.size, (255, 255, 255))
+        background.paste(image, mask=image.getchannel('A'))
+        return background
+    return image.convert('RGB')
+
+
+def _target_widths(widths, source_width):
+    """Requested widths that don't upscale, keeping at least one rendition"""
+    fitting = [w for w in widths if w <= source_width]
+    return fitting or [min(widths[0], source_width)]
+
+
+def generate_variants(field_file):
+    """
+    Write every variant of ``field_file`` and return the manifest stored in
+    ``image_variants``::
+
+        {'source': 'events/x.jpg', 'hash': '...',
+         'card': {'width': 480, 'height': 300,
+                  'webp': [[480, 'events/variants/..webp'], ...], 'jpeg': [...]}}
+    """
+    digest = content_hash(field_file)
+    field_file.open('rb')
+    try:
+        source = ImageOps.exif_transpose(Image.open(field_file))
+        source = _rgb(source)
+    finally:
+        field_file.close()
+
+    manifest = {'source': field_file.name, 'hash': digest}
+    for variant, (width, height, widths) in VARIANTS.items():
+        entry = {'width': width, 'height': height}
+        for extension in FORMATS:
+            entry[extension] = []
+        for target in _target_widths(widths, source.width):
+            size = (target, max(1, round(target * height / width)))
+            rendition = ImageOps.fit(source, size, Image.Resampling.LANCZOS)
+            for extension, (pil_format, options) in FORMATS.items():
+                name = f'{VARIANT_DIR}/{digest[:2]}/{digest}-{variant}-{target}.{extension}'
+                if not default_storage.exists(name):
+                    buffer = BytesIO()
+                    rendition.save(buffer, pil_format, **options)
+                    default_storage.save(name, ContentFile(buffer.getvalue()))
+                entry[extension].append([target, name])
+        manifest[variant] = entry
+    return manifest
+
+
+def needs_variants(instance):
+    image = instance.image
+    return bool(image) and (instance.image_variants or {}).get('source') != image.name
+
+
+def build_variants(model, pk):
+    """Generate and record variants for one row; safe to call repeatedly"""
+    instance = model._default_manager.filter(pk=pk).first()
+    if instance is None or not instance.image:
+        return None
+    manifest = generate_variants(instance.image)
+    # Only record them if the image wasn't replaced while we worked
+    model._default_manager.filter(pk=pk, image=manifest['source']).update(image_variants=manifest)
+    return manifest
+
+
+def _build_logged(model, pk):
+    try:
+        build_variants(model, pk)
+    except Exception:
+        logger.exception('Could not build image variants for %s %s', model.__name__, pk)
+
+
+def _run_job(model, pk):
+    # Worker threads have their own database connections
+    close_old_connections()
+    try:
+        _build_logged(model, pk)
+    finally:
+        close_old_connections()
+
+
+def schedule_variants(instance):
+    """
+    Queue variant generation for ``instance`` after the current
+    transaction commits. Runs inline when ``IMAGE_VARIANTS_ASYNC`` is off.
+    """
+    model, pk = type(instance), instance.pk
+
+    def submit():
+        if getattr(settings, 'IMAGE_VARIANTS_ASYNC', True):
+            _get_executor().submit(_run_job, model, pk)
+        else:
+            _build_logged(model, pk)
+
+    transaction.on_commit(submit)
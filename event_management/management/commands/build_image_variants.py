@@ -0,0 +1,33 @@
+from django.core.management.base import BaseCommand
+from event_management.images import build_variants, needs_variants
+from event_management.models import Event, EventImage
+
+
+class Command(BaseCommand):
+    help = 'Generate responsive image variants for existing event images'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--force',
+            action='store_true',
+            help='Rebuild variants even where they are already recorded',
+        )
+
+    def handle(self, *args, **options):
+        built = failed = 0
+        for model in (Event, EventImage):
+            queryset = model._default_manager.exclude(image='').exclude(image__isnull=True)
+            for instance in queryset.only('pk', 'image', 'image_variants').iterator():
+                if not options['force'] and not needs_variants(instance):
+                    continue
+                try:
+                    build_variants(model, instance.pk)
+                except Exception as exc:
+                    failed += 1
+                    self.stdout.write(self.style.WARNING(f'  {model.__name__} {instance.pk}: {exc}'))
+                else:
+                    built += 1
+
+        self.stdout.write(self.style.SUCCESS(f'✓ Built image variants for {built} images'))
+        if failed:
+            self.stdout.write(self.style.WARNING(f'{failed} images could not be processed'))
@@ -0,0 +1,32 @@
+from django.core.management.base import BaseCommand
+from event_management.recommendations import (
+    DEFAULT_MAX_FEATURES,
+    DEFAULT_TOP_K,
+    RecommendationService,
+)
+
+
+class Command(BaseCommand):
+    help = 'Precompute "similar events" for every public event (run from cron)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--top-k',
+            type=int,
+            default=DEFAULT_TOP_K,
+            help=f'Neighbours stored per event (default: {DEFAULT_TOP_K})',
+        )
+        parser.add_argument(
+            '--max-features',
+            type=int,
+            default=DEFAULT_MAX_FEATURES,
+            help=f'Vocabulary size cap for the TF-IDF vectors (default: {DEFAULT_MAX_FEATURES})',
+        )
+
+    def handle(self, *args, **options):
+        self.stdout.write('Building event recommendations...')
+        written = RecommendationService.build(
+            top_k=options['top_k'],
+            max_features=options['max_features'],
+        )
+        self.stdout.write(self.style.SUCCESS(f'✓ Stored {written} event recommendations'))
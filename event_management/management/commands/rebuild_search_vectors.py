@@ -0,0 +1,50 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from event_management.models import Event
+from event_management.search import event_search_vector
+
+
+class Command(BaseCommand):
+    help = 'Rebuild Event.search_vector in batches (backfills, config changes)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Number of events updated per statement (default: 1000)',
+        )
+        parser.add_argument(
+            '--missing-only',
+            action='store_true',
+            help='Only rebuild events that have no search vector yet',
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        queryset = Event.objects.all()
+        if options['missing_only']:
+            queryset = queryset.filter(search_vector__isnull=True)
+
+        self.stdout.write('Rebuilding search vectors...')
+
+        # Walk the primary key so each batch is an index range, not an OFFSET
+        last_pk = 0
+        rebuilt = 0
+        while True:
+            pks = list(
+                queryset.filter(pk__gt=last_pk)
+                .order_by('pk')
+                .values_list('pk', flat=True)[:batch_size]
+            )
+            if not pks:
+                break
+
+            with transaction.atomic():
+                rebuilt += Event.objects.filter(pk__in=pks).update(
+                    search_vector=event_search_vector()
+                )
+            last_pk = pks[-1]
+            self.stdout.write(f'  {rebuilt} events rebuilt')
+
+        self.stdout.write(self.style.SUCCESS(f'✓ Rebuilt search vectors for {rebuilt} events'))
@@ -0,0 +1,52 @@
+from django.db import migrations
+
+# Keeps Event.search_vector in step with the same weights as
+# event_management.search.event_search_vector(). The vector is only
+# recomputed when a searchable column changes; an UPDATE that leaves them
+# alone (approve, reject, ticket counters) keeps the stored vector even if
+# the ORM wrote a stale NULL for it.
+CREATE_TRIGGER = """
+CREATE OR REPLACE FUNCTION event_management_event_search_vector_update()
+RETURNS trigger AS $$
+BEGIN
+    IF TG_OP = 'UPDATE' THEN
+        IF NEW.title IS NOT DISTINCT FROM OLD.title
+           AND NEW.description IS NOT DISTINCT FROM OLD.description
+           AND NEW.venue IS NOT DISTINCT FROM OLD.venue
+           AND NEW.address IS NOT DISTINCT FROM OLD.address THEN
+            IF NEW.search_vector IS NULL THEN
+                NEW.search_vector := OLD.search_vector;
+            END IF;
+            RETURN NEW;
+        END IF;
+    END IF;
+
+    NEW.search_vector :=
+        setweight(to_tsvector(COALESCE(NEW.title, '')), 'A') ||
+        setweight(to_tsvector(COALESCE(NEW.description, '')), 'B') ||
+        setweight(to_tsvector(COALESCE(NEW.venue, '')), 'C') ||
+        setweight(to_tsvector(COALESCE(NEW.address, '')), 'D');
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER event_management_event_search_vector
+BEFORE INSERT OR UPDATE ON event_management_event
+FOR EACH ROW EXECUTE FUNCTION event_management_event_search_vector_update();
+"""
+
+DROP_TRIGGER = """
+DROP TRIGGER IF EXISTS event_management_event_search_vector ON event_management_event;
+DROP FUNCTION IF EXISTS event_management_event_search_vector_update();
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('event_management', '0002_event_title_trigram'),
+    ]
+
+    operations = [
+        migrations.RunSQL(CREATE_TRIGGER, reverse_sql=DROP_TRIGGER),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 5.0.2 on 2026-10-18 08:53
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('authentication', '0001_initial'),
+        ('event_management', '0003_event_search_vector_trigger'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='event',
+            index=models.Index(condition=models.Q(('is_active', True), ('is_approved', True)), fields=['date', 'id'], name='event_public_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='event',
+            index=models.Index(condition=models.Q(('is_active', True), ('is_approved', True)), fields=['price', 'id'], name='event_public_price_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='event',
+            index=models.Index(condition=models.Q(('is_active', True), ('is_approved', True)), fields=['title', 'id'], name='event_public_title_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='event',
+            index=models.Index(condition=models.Q(('is_active', True), ('is_approved', True)), fields=['category', 'date', 'id'], name='event_public_cat_date_idx'),
+        ),
+    ]
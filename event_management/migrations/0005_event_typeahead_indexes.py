@@ -0,0 +1,30 @@
+# Generated by Django 5.0.2 on 2026-10-18 08:56
+
+import django.contrib.postgres.indexes
+import django.db.models.functions.text
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('authentication', '0001_initial'),
+        ('event_management', '0004_event_public_keyset_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='event',
+            index=models.Index(django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Upper('title'), name='text_pattern_ops'), condition=models.Q(('is_active', True), ('is_approved', True)), name='event_title_prefix_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='event',
+            index=models.Index(django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Upper('venue'), name='text_pattern_ops'), condition=models.Q(('is_active', True), ('is_approved', True)), name='event_venue_prefix_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='event',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['venue'], name='event_venue_trgm', opclasses=['gin_trgm_ops']),
+        ),
+    ]
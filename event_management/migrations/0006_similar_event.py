@@ -0,0 +1,31 @@
+# Generated by Django 5.0.2 on 2026-10-18 08:58
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('event_management', '0005_event_typeahead_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SimilarEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('score', models.FloatField()),
+                ('rank', models.PositiveSmallIntegerField()),
+                ('event', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='similar_events', to='event_management.event')),
+                ('similar', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='recommended_for', to='event_management.event')),
+            ],
+            options={
+                'ordering': ['event', 'rank'],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='similarevent',
+            constraint=models.UniqueConstraint(fields=('event', 'rank'), name='similar_event_rank_unique'),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.0.2 on 2026-10-18 09:13
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('event_management', '0007_image_variants'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='event',
+            name='waiting_room_enabled',
+            field=models.BooleanField(default=False, help_text='Queue visitors and admit them to checkout at a fixed rate'),
+        ),
+        migrations.AddField(
+            model_name='event',
+            name='waiting_room_rate',
+            field=models.PositiveIntegerField(default=100, help_text='Visitors admitted per minute while the waiting room is on'),
+        ),
+    ]
@@ -2,8 +2,9 @@ from django.db import models
 from django.contrib.auth import get_user_model
 from django.utils import timezone
 from django.urls import reverse
-from django.contrib.postgres.search import SearchVectorField, SearchVector
-from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
+from django.contrib.postgres.indexes import GinIndex, OpClass
+from django.db.models.functions import Upper
 import urllib.parse
 from datetime import timedelta
 from urllib.parse import quote_plus
@@ -46,6 +47,7 @@ class Event(models.Model):
     date = models.DateTimeField()
     end_date = models.DateTimeField(null=True, blank=True)
     image = models.ImageField(upload_to='events/', blank=True, null=True)
+    image_variants = models.JSONField(default=dict, blank=True, editable=False)  # see images.py
     category = models.ForeignKey(Category, on_delete=models.CASCADE, related_name='events')
     price = models.DecimalField(max_digits=10, decimal_places=2, default=0.00)
     capacity = models.IntegerField(default=100)
@@ -136,6 +138,16 @@ class Event(models.Model):
     )
     approved_at = models.DateTimeField(null=True, blank=True)
     
+    # Waiting room for high-demand on-sales (booking.waiting_room)
+    waiting_room_enabled = models.BooleanField(
+        default=False,
+        help_text="Queue visitors and admit them to checkout at a fixed rate"
+    )
+    waiting_room_rate = models.PositiveIntegerField(
+        default=100,
+        help_text="Visitors admitted per minute while the waiting room is on"
+    )
+    
     # Metadata
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
@@ -149,6 +161,23 @@ class Event(models.Model):
         ordering = ['date']
         indexes = [
             GinIndex(fields=['search_vector']),
+            GinIndex(fields=['title'], opclasses=['gin_trgm_ops'], name='event_title_trgm'),
+            # Keyset pagination for the public list: one partial index per
+            # sort order, matching the PublicEventManager predicate
+            models.Index(fields=['date', 'id'], name='event_public_date_idx',
+                         condition=models.Q(is_approved=True, is_active=True)),
+            models.Index(fields=['price', 'id'], name='event_public_price_idx',
+                         condition=models.Q(is_approved=True, is_active=True)),
+            models.Index(fields=['title', 'id'], name='event_public_title_idx',
+                         condition=models.Q(is_approved=True, is_active=True)),
+            models.Index(fields=['category', 'date', 'id'], name='event_public_cat_date_idx',
+                         condition=models.Q(is_approved=True, is_active=True)),
+            # Typeahead: istartswith compiles to UPPER(col) LIKE 'PREFIX%'
+            models.Index(OpClass(Upper('title'), name='text_pattern_ops'), name='event_title_prefix_idx',
+                         condition=models.Q(is_approved=True, is_active=True)),
+            models.Index(OpClass(Upper('venue'), name='text_pattern_ops'), name='event_venue_prefix_idx',
+                         condition=models.Q(is_approved=True, is_active=True)),
+            GinIndex(fields=['venue'], opclasses=['gin_trgm_ops'], name='event_venue_trgm'),
         ]
         permissions = [
             ("can_approve_events", "Can approve events"),
@@ -236,16 +265,8 @@ class Event(models.Model):
             if not self.slug:  # If title doesn't produce a valid slug
                 self.slug = f"event-{timezone.now().strftime('%Y%m%d%H%M%S')}"
         
+        # search_vector is maintained by a database trigger (migration 0003)
         super().save(*args, **kwargs)
-        
-        # Update search vector
-        if self.pk:  # Only update if the object has been saved
-            Event.objects.filter(pk=self.pk).update(
-                search_vector=SearchVector('title', weight='A') + 
-                            SearchVector('description', weight='B') +
-                            SearchVector('venue', weight='C') +
-                            SearchVector('address', weight='D')
-            )
     
     @property
     def is_sold_out(self):
@@ -342,12 +363,30 @@ class Event(models.Model):
 class EventImage(models.Model):
     event = models.ForeignKey(Event, on_delete=models.CASCADE, related_name='images')
     image = models.ImageField(upload_to='events/gallery/')
+    image_variants = models.JSONField(default=dict, blank=True, editable=False)  # see images.py
     caption = models.CharField(max_length=200, blank=True)
     order = models.IntegerField(default=0)
     
     class Meta:
         ordering = ['order']
 
+class SimilarEvent(models.Model):
+    """Precomputed "similar events" for an event (see recommendations.py)"""
+    event = models.ForeignKey(Event, on_delete=models.CASCADE, related_name='similar_events')
+    similar = models.ForeignKey(Event, on_delete=models.CASCADE, related_name='recommended_for')
+    score = models.FloatField()
+    rank = models.PositiveSmallIntegerField()
+
+    class Meta:
+        ordering = ['event', 'rank']
+        constraints = [
+            # Also the index event_detail reads through
+            models.UniqueConstraint(fields=['event', 'rank'], name='similar_event_rank_unique'),
+        ]
+
+    def __str__(self):
+        return f'{self.event} -> {self.similar} ({self.score:.3f})'
+
 class PlatformPlan(models.Model):
     """Platform subscription plans for organizers"""
     PLAN_TYPE_CHOICES = [
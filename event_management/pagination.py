@@ -0,0 +1,164 @@
+# event_management/pagination.py
+"""Keyset (cursor) pagination for public event listings."""
+
+import datetime
+import json
+
+from django.core import signing
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Q
+from django.utils.functional import cached_property
+
+DEFAULT_PAGE_SIZE = 12
+
+
+class _CursorEncoder(DjangoJSONEncoder):
+    """Keep full microsecond precision; DjangoJSONEncoder rounds to milliseconds"""
+
+    def default(self, o):
+        if isinstance(o, datetime.datetime):
+            return o.isoformat()
+        return super().default(o)
+
+
+class _CursorSerializer:
+    """JSON serializer that understands dates and decimals in sort keys"""
+
+    def dumps(self, obj):
+        return json.dumps(obj, cls=_CursorEncoder, separators=(',', ':')).encode('latin-1')
+
+    def loads(self, data):
+        return json.loads(data.decode('latin-1'))
+
+
+def keyset_q(ordering, values):
+    """
+    Build the filter selecting rows that sort strictly after ``values``.
+
+    ``ordering`` uses ``order_by`` syntax (``'-date'``, ``'id'``). The result
+    is ``(a > x) OR (a = x AND b > y) ...`` plus an explicit bound on the
+    leading column so Postgres can turn it into an index range scan.
+    """
+    fields = [(name.lstrip('-'), name.startswith('-')) for name in ordering]
+
+    after = Q()
+    for position, (name, descending) in enumerate(fields):
+        lookup = {fields[i][0]: values[i] for i in range(position)}
+        lookup[f"{name}__{'lt' if descending else 'gt'}"] = values[position]
+        after |= Q(**lookup)
+
+    leading, descending = fields[0]
+    bound = Q(**{f"{leading}__{'lte' if descending else 'gte'}": values[0]})
+    return bound & after
+
+
+class KeysetPage:
+    """One page of results, shaped like a Django ``Page`` for the templates"""
+
+    def __init__(self, object_list, paginator, next_cursor=None, is_first_page=True, params=None):
+        self.object_list = object_list
+        self.paginator = paginator
+        self.next_cursor = next_cursor
+        self.is_first_page = is_first_page
+        self.params = params
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __bool__(self):
+        return bool(self.object_list)
+
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def has_previous(self):
+        return not self.is_first_page
+
+    def has_other_pages(self):
+        return self.has_next() or self.has_previous()
+
+    def _querystring(self, cursor):
+        params = self.params.copy() if self.params is not None else None
+        if params is None:
+            return f'cursor={cursor}' if cursor else ''
+        params.pop('cursor', None)
+        params.pop('page', None)
+        if cursor:
+            params['cursor'] = cursor
+        return params.urlencode()
+
+    @property
+    def next_page_query(self):
+        """Query string for the next page, keeping the current filters"""
+        return self._querystring(self.next_cursor)
+
+    @property
+    def first_page_query(self):
+        """Query string for the first page, keeping the current filters"""
+        return self._querystring(None)
+
+
+class KeysetPaginator:
+    """
+    Paginate ``queryset`` by ``ordering`` using signed keyset cursors.
+
+    The last entry of ``ordering`` must be unique (normally ``id``) so the
+    sort key identifies exactly one row. ``key`` namespaces the cursors, so a
+    cursor issued for one listing is rejected by another.
+    """
+
+    def __init__(self, queryset, ordering, per_page=DEFAULT_PAGE_SIZE, key='events'):
+        self.queryset = queryset
+        self.ordering = list(ordering)
+        self.per_page = per_page
+        self.salt = f'event_management.pagination.{key}'
+
+    def encode_cursor(self, values):
+        return signing.dumps(values, salt=self.salt, serializer=_CursorSerializer, compress=True)
+
+    def decode_cursor(self, cursor):
+        """Return the sort key stored in ``cursor``, or None if it is missing or invalid"""
+        if not cursor:
+            return None
+        try:
+            values = signing.loads(cursor, salt=self.salt, serializer=_CursorSerializer)
+        except (signing.BadSignature, ValueError):
+            return None
+        if not isinstance(values, list) or len(values) != len(self.ordering):
+            return None
+        return values
+
+    def owns(self, cursor):
+        """True if ``cursor`` was issued by a paginator with the same key"""
+        return self.decode_cursor(cursor) is not None
+
+    @cached_property
+    def count(self):
+        return self.queryset.count()
+
+    def page(self, cursor=None, params=None):
+        values = self.decode_cursor(cursor)
+        queryset = self.queryset.order_by(*self.ordering)
+        if values is not None:
+            queryset = queryset.filter(keyset_q(self.ordering, values))
+
+        # Fetch one extra row to learn whether there is a next page
+        rows = list(queryset[:self.per_page + 1])
+        next_cursor = None
+        if len(rows) > self.per_page:
+            rows = rows[:self.per_page]
+            last = rows[-1]
+            next_cursor = self.encode_cursor(
+                [getattr(last, name.lstrip('-')) for name in self.ordering]
+            )
+
+        return KeysetPage(
+            rows,
+            paginator=self,
+            next_cursor=next_cursor,
+            is_first_page=values is None,
+            params=params,
+        )
@@ -1,13 +1,69 @@
 # event_management/pricing.py
-# Replace your ENTIRE pricing.py file with this:
+"""Listing fee calculation."""
 
 import os
+import threading
+from bisect import bisect_left
 from decimal import Decimal
 from typing import Tuple
 
+import numpy as np
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+
+FREE_EVENT_TIER = 'Free Event'
+
+# Old fixed-fee behaviour based on capacity tiers (no ticket price given)
+LEGACY_TIER_FEES = {
+    'Community': Decimal('20.00'),
+    'Small': Decimal('40.00'),
+    'Medium': Decimal('75.00'),
+    'Large': Decimal('100.00')
+}
+
+
+class TierTable:
+    """Pricing tiers compiled for lookup, built once from the environment"""
+
+    def __init__(self, tiers, minimum_fee):
+        # Sorted by capacity so bisect finds the first tier that fits
+        self.tiers = sorted(tiers, key=lambda tier: tier['max_capacity'])
+        self.boundaries = [tier['max_capacity'] for tier in self.tiers]
+        self.minimum_fee = minimum_fee
+        self.minimum_pence = int(minimum_fee * 100)
+
+        # Percentages as integers over a common scale (3.5% -> 35 / 10)
+        places = max(max(-tier['percentage'].as_tuple().exponent, 0) for tier in self.tiers)
+        self.percentage_scale = 10 ** places
+        self.scaled_percentages = np.array(
+            [int(tier['percentage'] * self.percentage_scale) for tier in self.tiers], dtype=np.int64
+        )
+        self.names = [tier['name'] for tier in self.tiers]
+
+    def tier_for(self, capacity):
+        index = bisect_left(self.boundaries, capacity)
+        # Default to the largest tier if capacity exceeds all tiers
+        return self.tiers[min(index, len(self.tiers) - 1)]
+
+
+_table = None
+_table_lock = threading.Lock()
+
+
+@receiver(setting_changed)
+def _reset_tier_table(**kwargs):
+    PricingService.reload()
+
+
+def _pence(amount):
+    """Whole pence for ``amount``, or None if it has a fraction of a penny"""
+    pence = Decimal(str(amount)) * 100
+    return int(pence) if pence == pence.to_integral_value() else None
+
+
 class PricingService:
     """Service for calculating event listing fees based on percentage model"""
-    
+
     @staticmethod
     def get_pricing_tiers():
         """Get pricing tiers from environment variables"""
@@ -33,74 +89,122 @@ class PricingService:
                 'percentage': Decimal(os.getenv('TIER_4_PERCENTAGE', '2.5'))
             }
         ]
-    
+
+    @staticmethod
+    def get_tier_table():
+        """The compiled tier table, built on first use"""
+        global _table
+        table = _table
+        if table is None:
+            with _table_lock:
+                if _table is None:
+                    _table = TierTable(
+                        PricingService.get_pricing_tiers(),
+                        Decimal(os.getenv('MINIMUM_PAID_EVENT_FEE', '15')),
+                    )
+                table = _table
+        return table
+
+    @staticmethod
+    def reload():
+        """Forget the compiled tiers so the next lookup re-reads the environment"""
+        global _table
+        with _table_lock:
+            _table = None
+
     @staticmethod
     def calculate_event_fee(capacity, is_free_event=False, ticket_price=None):
         """
         Calculate the listing fee for an event based on capacity and ticket price
-        
+
         Args:
             capacity: Event capacity (int)
             is_free_event: Boolean indicating if event is free
             ticket_price: Price per ticket (Decimal) - if provided, uses percentage-based pricing
-            
+
         Returns:
             Tuple of (fee_amount, tier_name)
         """
-        # Get the appropriate tier based on capacity
-        tiers = PricingService.get_pricing_tiers()
-        tier = None
-        
-        for t in tiers:
-            if capacity <= t['max_capacity']:
-                tier = t
-                break
-        
-        # Default to largest tier if capacity exceeds all tiers
-        if tier is None:
-            tier = tiers[-1]
-        
+        table = PricingService.get_tier_table()
+        tier = table.tier_for(capacity)
+
         # If ticket_price is provided, use percentage-based calculation
         if ticket_price is not None:
             ticket_price = Decimal(str(ticket_price)) if ticket_price else Decimal('0')
-            
+
             # Free events pay no fee
             if ticket_price <= 0 or is_free_event:
-                return Decimal('0.00'), 'Free Event'
-            
+                return Decimal('0.00'), FREE_EVENT_TIER
+
             # Calculate percentage-based fee
             percentage = tier['percentage'] / 100
             total_revenue = ticket_price * Decimal(capacity)
             fee = total_revenue * percentage
-            
+
             # Apply minimum fee for paid events
-            minimum_fee = Decimal(os.getenv('MINIMUM_PAID_EVENT_FEE', '15'))
-            if fee < minimum_fee:
-                fee = minimum_fee
-            
+            if fee < table.minimum_fee:
+                fee = table.minimum_fee
+
             return fee.quantize(Decimal('0.01')), tier['name']
-        
+
         # Legacy behavior when ticket_price is not provided (backward compatibility)
         if is_free_event:
-            return Decimal('0.00'), 'Free Event'
-        
-        # Old fixed-fee behavior based on capacity tiers
-        tier_fees = {
-            'Community': Decimal('20.00'),
-            'Small': Decimal('40.00'), 
-            'Medium': Decimal('75.00'),
-            'Large': Decimal('100.00')
-        }
-        return tier_fees.get(tier['name'], Decimal('20.00')), tier['name']
-    
+            return Decimal('0.00'), FREE_EVENT_TIER
+
+        return LEGACY_TIER_FEES.get(tier['name'], Decimal('20.00')), tier['name']
+
+    @staticmethod
+    def quote_fees(capacities, ticket_prices):
+        """
+        Quote percentage-based listing fees for many events in one call.
+
+        Equivalent to ``calculate_event_fee(capacity, ticket_price=price)``
+        for each pair, but the tier lookup and fee arithmetic run over NumPy
+        arrays in whole pence, so thousands of quotes cost a few vector
+        operations. Returns a list of ``(Decimal fee, tier_name)``.
+        """
+        table = PricingService.get_tier_table()
+        capacities = [int(capacity) for capacity in capacities]
+        pence = [_pence(price or 0) for price in ticket_prices]
+        if len(capacities) != len(pence):
+            raise ValueError('capacities and ticket_prices must be the same length')
+        if not capacities:
+            return []
+
+        # Sub-penny prices don't fit the integer maths; quote those one by one
+        exact = np.array([p is not None for p in pence])
+        capacity = np.array(capacities, dtype=np.int64)
+        price = np.array([p if p is not None else 0 for p in pence], dtype=np.int64)
+
+        tier_index = np.minimum(
+            np.searchsorted(table.boundaries, capacity, side='left'), len(table.tiers) - 1
+        )
+        percentages = table.scaled_percentages[tier_index]
+
+        # fee (pence) = price * capacity * percentage / 100, rounded half-even
+        # like Decimal.quantize; fall back to Python ints if int64 could overflow
+        bound = int(price.max(initial=0)) * int(np.abs(capacity).max(initial=0)) * int(percentages.max())
+        dtype = np.int64 if bound < 2 ** 62 else object
+        numerator = price.astype(dtype) * capacity.astype(dtype) * percentages.astype(dtype)
+        divisor = 100 * table.percentage_scale
+        quotient, remainder = numerator // divisor, numerator % divisor
+        round_up = (2 * remainder > divisor) | ((2 * remainder == divisor) & (quotient % 2 == 1))
+        fee = np.maximum(quotient + round_up, table.minimum_pence)
+        fee = np.where(price > 0, fee, 0)
+
+        quotes = []
+        for i in range(len(capacities)):
+            if not exact[i]:
+                quotes.append(PricingService.calculate_event_fee(
+                    capacities[i], ticket_price=ticket_prices[i]
+                ))
+            elif price[i] <= 0:
+                quotes.append((Decimal('0.00'), FREE_EVENT_TIER))
+            else:
+                quotes.append((Decimal(int(fee[i])).scaleb(-2), table.names[tier_index[i]]))
+        return quotes
+
     @staticmethod
     def get_tier_for_capacity(capacity):
         """Get the pricing tier for a given capacity"""
-        tiers = PricingService.get_pricing_tiers()
-        
-        for tier in tiers:
-            if capacity <= tier['max_capacity']:
-                return tier
-        
-        # Return the largest tier if capacity exceeds all tiers
-        return tiers[-1]
\ No newline at end of file
+        return PricingService.get_tier_table().tier_for(capacity)
@@ -0,0 +1,148 @@
+# event_management/recommendations.py
+""""Similar events" recommendations for the event detail page."""
+
+import re
+from collections import Counter
+
+import numpy as np
+from django.db import transaction
+
+from .models import Event, SimilarEvent
+
+DEFAULT_TOP_K = 6
+DEFAULT_MAX_FEATURES = 4096
+RELATED_EVENTS_LIMIT = 3
+BLOCK_SIZE = 512
+
+# Field weights: a token in the title counts three times, the category twice
+TITLE_WEIGHT = 3
+CATEGORY_WEIGHT = 2
+
+TOKEN_RE = re.compile(r'[a-z0-9]+')
+STOP_WORDS = frozenset("""
+    a an and are as at be by for from has have in is it its of on or our the
+    this to was we will with you your all can get not but more new join us
+""".split())
+
+
+def tokenize(text):
+    return [
+        token for token in TOKEN_RE.findall((text or '').lower())
+        if len(token) > 1 and token not in STOP_WORDS
+    ]
+
+
+def event_terms(event):
+    """Weighted bag of words for one event"""
+    terms = Counter(tokenize(event.description))
+    for token in tokenize(event.title):
+        terms[token] += TITLE_WEIGHT
+    # A synthetic token so events in the same category share a feature
+    # without colliding with the word in free text
+    terms[f'__category_{event.category_id}'] += CATEGORY_WEIGHT
+    return terms
+
+
+def tfidf_matrix(documents, max_features=DEFAULT_MAX_FEATURES):
+    """
+    Return the L2-normalised TF-IDF matrix (float32, one row per document)
+    for a list of term Counters.
+
+    Terms found in a single document can't make two events similar, so
+    they are dropped; of the rest the ``max_features`` most common are kept
+    to bound memory.
+    """
+    document_frequency = Counter()
+    for terms in documents:
+        document_frequency.update(terms.keys())
+
+    shared = [(df, term) for term, df in document_frequency.items() if df > 1]
+    shared.sort(key=lambda item: (-item[0], item[1]))
+    vocabulary = {term: column for column, (df, term) in enumerate(shared[:max_features])}
+
+    matrix = np.zeros((len(documents), len(vocabulary)), dtype=np.float32)
+    for row, terms in enumerate(documents):
+        for term, count in terms.items():
+            column = vocabulary.get(term)
+            if column is not None:
+                matrix[row, column] = 1.0 + np.log(count)  # sublinear tf
+
+    if vocabulary:
+        df = np.array([document_frequency[term] for term in vocabulary], dtype=np.float32)
+        matrix *= np.log((1.0 + len(documents)) / (1.0 + df)) + 1.0  # smoothed idf
+
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+
+def nearest_neighbours(matrix, top_k=DEFAULT_TOP_K, block_size=BLOCK_SIZE):
+    """
+    Yield ``(row, [(neighbour_row, score), ...])`` best first, for every
+    row of a normalised matrix. Similarities are computed one block of rows
+    at a time so memory stays at ``block_size x n``.
+    """
+    n = matrix.shape[0]
+    k = min(top_k, n - 1)
+    if k <= 0:
+        return
+
+    for start in range(0, n, block_size):
+        scores = matrix[start:start + block_size] @ matrix.T
+        rows = np.arange(scores.shape[0])
+        scores[rows, rows + start] = -1.0  # never recommend the event itself
+
+        candidates = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        for offset, columns in enumerate(candidates):
+            row_scores = scores[offset, columns]
+            order = np.argsort(-row_scores, kind='stable')
+            yield start + offset, [
+                (int(columns[i]), float(row_scores[i])) for i in order if row_scores[i] > 0
+            ]
+
+
+class RecommendationService:
+    """Builds and reads precomputed similar events"""
+
+    @staticmethod
+    def build(top_k=DEFAULT_TOP_K, max_features=DEFAULT_MAX_FEATURES):
+        """
+        Recompute recommendations for every public event and replace the
+        stored ones in a single transaction. Returns the number of rows
+        written.
+        """
+        events = list(
+            Event.public.order_by('id').only('id', 'title', 'description', 'category_id')
+        )
+        links = []
+        if len(events) > 1:
+            matrix = tfidf_matrix([event_terms(event) for event in events], max_features)
+            for row, neighbours in nearest_neighbours(matrix, top_k):
+                links.extend(
+                    SimilarEvent(
+                        event_id=events[row].pk,
+                        similar_id=events[column].pk,
+                        score=score,
+                        rank=rank,
+                    )
+                    for rank, (column, score) in enumerate(neighbours, start=1)
+                )
+
+        # Readers keep seeing the previous set until the swap commits
+        with transaction.atomic():
+            SimilarEvent.objects.all().delete()
+            SimilarEvent.objects.bulk_create(links, batch_size=1000)
+        return len(links)
+
+    @staticmethod
+    def related_events(event, limit=RELATED_EVENTS_LIMIT):
+        """
+        The stored neighbours of ``event`` that are still public, best
+        first, in one query over the ``(event, rank)`` index.
+        """
+        return list(
+            Event.public
+            .filter(recommended_for__event=event)
+            .select_related('category')
+            .order_by('recommended_for__rank')[:limit]
+        )
@@ -0,0 +1,88 @@
+# event_management/search.py
+"""Ranked full-text search over public events."""
+
+from django.contrib.postgres.search import (
+    SearchQuery,
+    SearchRank,
+    SearchVector,
+    TrigramSimilarity,
+    TrigramWordSimilarity,
+)
+from django.db.models import F, FloatField, Q
+from django.db.models.functions import Cast, Greatest
+
+from .models import Event
+from .pagination import DEFAULT_PAGE_SIZE, KeysetPaginator
+
+MAX_QUERY_LENGTH = 100
+
+
+def event_search_vector():
+    """The weighted vector stored in ``Event.search_vector``"""
+    return (
+        SearchVector('title', weight='A') +
+        SearchVector('description', weight='B') +
+        SearchVector('venue', weight='C') +
+        SearchVector('address', weight='D')
+    )
+
+
+def normalize_query(query):
+    """Drop NULs (Postgres rejects them), collapse whitespace and cap the length of a user supplied query"""
+    return ' '.join((query or '').replace('\x00', '').split())[:MAX_QUERY_LENGTH]
+
+
+class EventSearchService:
+    """Service for searching the public event catalogue"""
+
+    @staticmethod
+    def fulltext_paginator(query, per_page=DEFAULT_PAGE_SIZE):
+        search_query = SearchQuery(query, search_type='websearch')
+        queryset = (
+            Event.public
+            .filter(search_vector=search_query)
+            .annotate(rank=Cast(SearchRank(F('search_vector'), search_query), FloatField()))
+            .select_related('category')
+        )
+        return KeysetPaginator(queryset, ['-rank', 'id'], per_page=per_page, key='search')
+
+    @staticmethod
+    def similar_paginator(query, per_page=DEFAULT_PAGE_SIZE):
+        queryset = (
+            Event.public
+            # Word similarity also catches a misspelt word inside a longer title
+            .filter(Q(title__trigram_similar=query) | Q(title__trigram_word_similar=query))
+            .annotate(similarity=Cast(
+                Greatest(TrigramSimilarity('title', query), TrigramWordSimilarity(query, 'title')),
+                FloatField(),
+            ))
+            .select_related('category')
+        )
+        return KeysetPaginator(queryset, ['-similarity', 'id'], per_page=per_page, key='search-similar')
+
+    @staticmethod
+    def search(query, cursor=None, params=None, per_page=DEFAULT_PAGE_SIZE):
+        """
+        Return a keyset page of public events matching ``query``.
+
+        The page's ``mode`` is ``'fulltext'`` for ranked matches or
+        ``'similar'`` when the trigram fallback produced the results.
+        """
+        query = normalize_query(query)
+        fulltext = EventSearchService.fulltext_paginator(query, per_page)
+        similar = EventSearchService.similar_paginator(query, per_page)
+
+        if cursor and similar.owns(cursor):
+            page = similar.page(cursor, params)
+            page.mode = 'similar'
+            return page
+
+        page = fulltext.page(cursor, params)
+        page.mode = 'fulltext'
+        if page or page.has_previous():
+            return page
+
+        # Nothing matched the vector: try a typo-tolerant title match
+        page = similar.page(None, params)
+        page.mode = 'similar'
+        return page
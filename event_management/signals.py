@@ -1,6 +1,8 @@
-from django.db.models.signals import post_save
+from django.db.models.signals import post_save, post_delete
 from django.dispatch import receiver
-from .models import Event
+from .models import Event, EventImage, TicketType
+from .homepage import HomepageService
+from . import autocomplete, images
 from authentication.utils import send_admin_event_notification
 import logging
 
@@ -12,3 +14,22 @@ def notify_admin_new_event(sender, instance, created, **kwargs):
     if created and not instance.is_active:  # Assuming events need approval to be active
         logger.info(f"New event created: {instance.title}, sending admin notification")
         send_admin_event_notification(instance)
+
+
+@receiver(post_save, sender=Event)
+@receiver(post_delete, sender=Event)
+@receiver(post_save, sender=TicketType)
+@receiver(post_delete, sender=TicketType)
+def invalidate_homepage_cache(sender, instance, **kwargs):
+    """Drop the cached homepage whenever listed events or tickets change"""
+    HomepageService.invalidate()
+    if sender is Event:
+        autocomplete.clear_cache()
+
+
+@receiver(post_save, sender=Event)
+@receiver(post_save, sender=EventImage)
+def queue_image_variants(sender, instance, **kwargs):
+    """Build resized variants of a new or replaced image off the request path"""
+    if images.needs_variants(instance):
+        images.schedule_variants(instance)
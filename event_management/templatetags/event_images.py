@@ -0,0 +1,53 @@
+# event_management/templatetags/event_images.py
+"""Responsive image markup for event images."""
+
+from django import template
+from django.core.files.storage import default_storage
+from django.utils.html import format_html, format_html_join
+
+from event_management.images import VARIANTS
+
+register = template.Library()
+
+# How wide each variant is drawn, so the browser can pick a candidate
+SIZES = {
+    'thumbnail': '160px',
+    'card': '(min-width: 1024px) 33vw, (min-width: 768px) 50vw, 100vw',
+    'detail': '(min-width: 1024px) 66vw, 100vw',
+    'hero': '100vw',
+}
+
+
+def _srcset(candidates):
+    return ', '.join(f'{default_storage.url(name)} {width}w' for width, name in candidates)
+
+
+@register.simple_tag
+def event_picture(obj, variant='card', alt=None, fallback='', sizes=None, eager=False, **attrs):
+    """``obj`` is anything with ``image`` and ``image_variants`` (Event, EventImage)"""
+    if variant not in VARIANTS:
+        raise template.TemplateSyntaxError(f'Unknown image variant {variant!r}')
+
+    if alt is None:
+        alt = getattr(obj, 'title', '') or getattr(obj, 'caption', '')
+    loading = 'eager' if eager else 'lazy'
+    extra = format_html_join('', ' {}="{}"', attrs.items())
+    image = getattr(obj, 'image', None)
+    entry = (getattr(obj, 'image_variants', None) or {}).get(variant)
+
+    if not image or not entry or obj.image_variants.get('source') != image.name:
+        src = image.url if image else fallback
+        if not src:
+            return ''
+        return format_html('<img src="{}" alt="{}" loading="{}" decoding="async"{}>', src, alt, loading, extra)
+
+    jpeg = entry['jpeg']
+    return format_html(
+        '<picture>'
+        '<source type="image/webp" srcset="{}" sizes="{}">'
+        '<img src="{}" srcset="{}" sizes="{}" width="{}" height="{}" alt="{}" loading="{}" decoding="async"{}>'
+        '</picture>',
+        _srcset(entry['webp']), sizes or SIZES[variant],
+        default_storage.url(jpeg[0][1]), _srcset(jpeg), sizes or SIZES[variant],
+        entry['width'], entry['height'], alt, loading, extra,
+    )
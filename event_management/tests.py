@@ -1,3 +1,597 @@
-from django.test import TestCase
+import shutil
+import tempfile
+from datetime import timedelta
+from decimal import Decimal
 
-# Create your tests here.
+from io import BytesIO, StringIO
+from unittest import mock
+
+from django.core.cache import cache
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import connection
+from django.http import QueryDict
+from django.template import Context, Template
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from PIL import Image
+
+from authentication.models import Organizer, User
+from event_management import autocomplete
+from event_management.facets import EventFacets
+from event_management.filters import EventFilter
+from event_management.homepage import HomepageService
+from event_management.ical import escape_text, fold_line
+from event_management.models import Category, Event, SimilarEvent
+from event_management.pricing import PricingService
+from event_management.recommendations import RecommendationService
+from event_management.search import EventSearchService
+
+
+class EventTestMixin:
+    """Helpers for building organizers, categories and public events."""
+
+    @classmethod
+    def create_organizer(cls, username='organizer'):
+        user = User.objects.create_user(
+            username=username, email=f'{username}@example.com', password='pass12345', is_staff=True
+        )
+        return Organizer.objects.create(
+            user=user,
+            company_name=f'{username} Ltd',
+            business_email=f'{username}@example.com',
+            business_phone='01534 000000',
+            address_line_1='1 Liberation Square',
+            city='St Helier',
+            postal_code='JE2 3AB',
+            description='Test organizer',
+        )
+
+    @classmethod
+    def create_category(cls, name='Music', slug='music'):
+        return Category.objects.create(name=name, slug=slug)
+
+    @classmethod
+    def create_event(cls, title, organizer, category, days=7, **kwargs):
+        defaults = {
+            'description': f'{title} description',
+            'venue': 'Fort Regent',
+            'address': 'St Helier, Jersey',
+            'date': timezone.now() + timedelta(days=days),
+            'price': Decimal('10.00'),
+            'is_approved': True,
+            'is_active': True,
+            'status': 'approved',
+        }
+        defaults.update(kwargs)
+        return Event.objects.create(title=title, organizer=organizer, category=category, **defaults)
+
+
+class EventSearchServiceTests(EventTestMixin, TestCase):
+    """Tests for ranked full-text search and its trigram fallback."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.organizer = cls.create_organizer()
+        cls.category = cls.create_category()
+        cls.jazz = cls.create_event('Jazz on the Beach', cls.organizer, cls.category,
+                                    description='Live jazz at St Brelade')
+        cls.festival = cls.create_event('Harbour Festival', cls.organizer, cls.category,
+                                        description='Food stalls and jazz bands by the harbour')
+        cls.hidden = cls.create_event('Jazz Rehearsal', cls.organizer, cls.category, is_approved=False)
+
+    def test_title_matches_rank_above_description_matches(self):
+        page = EventSearchService.search('jazz')
+
+        self.assertEqual(page.mode, 'fulltext')
+        self.assertEqual(list(page), [self.jazz, self.festival])
+
+    def test_unapproved_events_are_excluded(self):
+        page = EventSearchService.search('rehearsal')
+
+        self.assertNotIn(self.hidden, list(page))
+
+    def test_typo_falls_back_to_similar_titles(self):
+        page = EventSearchService.search('Harbor Festivel')
+
+        self.assertEqual(page.mode, 'similar')
+        self.assertEqual(list(page), [self.festival])
+
+    def test_short_typos_match_words_inside_longer_titles(self):
+        page = EventSearchService.search('jaz')
+
+        self.assertEqual(page.mode, 'similar')
+        self.assertEqual(list(page), [self.jazz])
+
+    def test_cursor_returns_the_next_page(self):
+        first = EventSearchService.search('jazz', per_page=1)
+        second = EventSearchService.search('jazz', cursor=first.next_cursor, per_page=1)
+
+        self.assertEqual(list(first), [self.jazz])
+        self.assertEqual(list(second), [self.festival])
+        self.assertFalse(second.has_next())
+        self.assertTrue(second.has_previous())
+
+    def test_search_view_renders_results(self):
+        response = self.client.get(reverse('event_management:event_search'), {'q': 'jazz'}, secure=True)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'Jazz on the Beach')
+
+    def test_nul_characters_are_dropped_from_queries(self):
+        response = self.client.get(reverse('event_management:event_search'), {'q': '\x00jazz'}, secure=True)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'Jazz on the Beach')
+        response = self.client.get(reverse('event_management:event_search') + '?q=%00x', secure=True)
+        self.assertEqual(response.status_code, 200)
+
+
+class SearchVectorTriggerTests(EventTestMixin, TestCase):
+    """Tests for the database trigger that maintains Event.search_vector."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.organizer = cls.create_organizer()
+        cls.category = cls.create_category()
+
+    def matches(self, event, term):
+        return Event.objects.filter(pk=event.pk, search_vector=term).exists()
+
+    def test_save_is_a_single_write(self):
+        with CaptureQueriesContext(connection) as ctx:
+            event = self.create_event('Battle of Flowers', self.organizer, self.category)
+
+        writes = [q for q in ctx.captured_queries if q['sql'].startswith(('INSERT', 'UPDATE'))]
+        self.assertEqual(len(writes), 1)
+        self.assertTrue(self.matches(event, 'flowers'))
+
+    def test_unrelated_update_keeps_vector(self):
+        event = self.create_event('Battle of Flowers', self.organizer, self.category)
+
+        event.reject()
+
+        self.assertTrue(self.matches(event, 'flowers'))
+
+    def test_title_change_recomputes_vector(self):
+        event = self.create_event('Battle of Flowers', self.organizer, self.category,
+                                  description='Annual parade')
+
+        event.title = 'Jersey Air Display'
+        event.save()
+
+        self.assertTrue(self.matches(event, 'display'))
+        self.assertFalse(self.matches(event, 'flowers'))
+
+    def test_rebuild_command_fills_missing_vectors(self):
+        event = self.create_event('Battle of Flowers', self.organizer, self.category)
+        Event.objects.filter(pk=event.pk).update(search_vector=None)
+
+        call_command('rebuild_search_vectors', '--missing-only', stdout=StringIO())
+
+        self.assertTrue(self.matches(event, 'flowers'))
+
+
+class EventFilterTests(EventTestMixin, TestCase):
+    """Tests for the event list filters and keyset pagination."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.organizer = cls.create_organizer()
+        cls.music = cls.create_category()
+        cls.sport = cls.create_category('Sport', 'sport')
+        cls.gig = cls.create_event('Harbour Gig', cls.organizer, cls.music, days=3, price=Decimal('15.00'))
+        cls.free_walk = cls.create_event('Coastal Walk', cls.organizer, cls.sport, days=1,
+                                         price=Decimal('0.00'), pet_friendly=True)
+        cls.race = cls.create_event('Island Race', cls.organizer, cls.sport, days=10, price=Decimal('25.00'))
+        cls.past = cls.create_event('Old Race', cls.organizer, cls.sport, days=-1)
+
+    def setUp(self):
+        cache.clear()
+
+    def events_for(self, query):
+        return list(EventFilter(QueryDict(query)).queryset().order_by('date'))
+
+    def test_defaults_to_upcoming_public_events_by_date(self):
+        self.assertEqual(self.events_for(''), [self.free_walk, self.gig, self.race])
+
+    def test_category_and_quick_filters_combine(self):
+        self.assertEqual(self.events_for('category=sport&filter=free&filter=pet-friendly'), [self.free_walk])
+
+    def test_price_range(self):
+        self.assertEqual(self.events_for('price_min=10&price_max=20'), [self.gig])
+
+    def test_invalid_values_are_ignored(self):
+        event_filter = EventFilter(QueryDict('price_min=abc&date_from=2025-13-40&sort=drop&filter=bogus'))
+
+        self.assertIsNone(event_filter.price_min)
+        self.assertIsNone(event_filter.date_from)
+        self.assertEqual(event_filter.sort, 'date')
+        self.assertEqual(event_filter.flags, [])
+
+    def test_nul_characters_in_the_query_string_are_dropped(self):
+        event_filter = EventFilter(QueryDict('search=%00x&category=%00&price_min=%001'))
+
+        self.assertEqual(event_filter.search, 'x')
+        self.assertEqual(event_filter.category, '')
+        self.assertEqual(event_filter.price_min, 1)
+        for query in ('search=%00x', 'category=%00', 'category=sp%00ort&date_from=%00'):
+            with self.subTest(query=query):
+                response = self.client.get(f"{reverse('event_management:event_list')}?{query}", secure=True)
+
+                self.assertEqual(response.status_code, 200)
+
+    def test_keyset_pages_follow_each_sort_order(self):
+        expected = {
+            'date': [self.free_walk, self.gig, self.race],
+            '-date': [self.race, self.gig, self.free_walk],
+            'price': [self.free_walk, self.gig, self.race],
+            '-price': [self.race, self.gig, self.free_walk],
+            'title': [self.free_walk, self.gig, self.race],
+        }
+        for sort, events in expected.items():
+            with self.subTest(sort=sort):
+                paginator = EventFilter(QueryDict(f'sort={sort}')).paginator(per_page=2)
+                first = paginator.page()
+                second = paginator.page(first.next_cursor)
+
+                self.assertEqual(list(first) + list(second), events)
+                self.assertFalse(second.has_next())
+
+    def test_cursor_from_another_sort_restarts_at_first_page(self):
+        cursor = EventFilter(QueryDict('sort=price')).paginator(per_page=1).page().next_cursor
+
+        page = EventFilter(QueryDict('sort=title')).paginator(per_page=1).page(cursor)
+
+        self.assertTrue(page.is_first_page)
+
+    def test_event_list_view_paginates(self):
+        response = self.client.get(reverse('event_management:event_list'), secure=True)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['total_events'], 3)
+        self.assertContains(response, 'Island Race')
+
+
+class HomepageServiceTests(EventTestMixin, TestCase):
+    """Tests for the cached homepage context."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.organizer = cls.create_organizer()
+        cls.music = cls.create_category()
+        cls.sport = cls.create_category('Sport', 'sport')
+        cls.gig = cls.create_event('Harbour Gig', cls.organizer, cls.music, is_featured=True)
+        for day in range(1, 7):
+            cls.create_event(f'Race {day}', cls.organizer, cls.sport, days=day)
+
+    def setUp(self):
+        cache.clear()
+
+    def test_build_uses_a_fixed_number_of_queries(self):
+        with self.assertNumQueries(4):
+            context = HomepageService.build()
+
+        self.assertEqual(context['featured_events'], [self.gig])
+        teasers = {t['category'].slug: len(t['events']) for t in context['category_teasers']}
+        self.assertEqual(teasers, {'music': 1, 'sport': 4})
+
+    def test_context_is_served_from_cache(self):
+        HomepageService.get_context()
+
+        with self.assertNumQueries(0):
+            HomepageService.get_context()
+
+    def test_event_changes_invalidate_the_cache(self):
+        HomepageService.get_context()
+
+        self.create_event('Food Festival', self.organizer, self.music, is_featured=True)
+
+        titles = [e.title for e in HomepageService.get_context()['featured_events']]
+        self.assertIn('Food Festival', titles)
+
+
+class EventFacetsTests(EventTestMixin, TestCase):
+    """Tests for the event list facet counts."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.organizer = cls.create_organizer()
+        cls.music = cls.create_category()
+        cls.sport = cls.create_category('Sport', 'sport')
+        cls.create_event('Harbour Gig', cls.organizer, cls.music, price=Decimal('15.00'), has_offers=True)
+        cls.create_event('Beach Concert', cls.organizer, cls.music, price=Decimal('0.00'))
+        cls.create_event('Coastal Walk', cls.organizer, cls.sport, price=Decimal('0.00'), pet_friendly=True)
+
+    def setUp(self):
+        cache.clear()
+
+    def test_counts_every_facet_in_one_query(self):
+        event_filter = EventFilter(QueryDict('category=music'))
+        categories = EventFacets.categories()
+
+        with self.assertNumQueries(1):
+            facets = EventFacets.compute(event_filter, categories)
+
+        self.assertEqual(facets['total'], 2)
+        self.assertEqual(facets['categories'], {'music': 2, 'sport': 1})
+        self.assertEqual(facets['flags']['free'], 1)
+        self.assertEqual(facets['flags']['offers'], 1)
+        self.assertEqual(facets['flags']['pet_friendly'], 0)
+
+    def test_selected_chips_narrow_category_counts(self):
+        facets = EventFacets.compute(EventFilter(QueryDict('filter=free')))
+
+        self.assertEqual(facets['categories'], {'music': 1, 'sport': 1})
+        self.assertEqual(facets['total'], 2)
+
+    def test_counts_are_cached_per_filter_state(self):
+        categories = EventFacets.categories()
+        EventFacets.for_filter(EventFilter(QueryDict('filter=free&sort=price')), categories)
+
+        with self.assertNumQueries(0):
+            EventFacets.for_filter(EventFilter(QueryDict('sort=title&filter=free')), categories)
+
+
+class AutocompleteTests(EventTestMixin, TestCase):
+    """Tests for the search box typeahead."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.organizer = cls.create_organizer()
+        cls.music = cls.create_category('Music & Nightlife', 'music')
+        cls.gig = cls.create_event('Harbour Gig', cls.organizer, cls.music, venue='Harbour Gallery')
+        cls.jazz = cls.create_event('Sunset Jazz Night', cls.organizer, cls.music, venue='Opera House')
+        cls.create_event('Harbour Rehearsal', cls.organizer, cls.music, is_approved=False)
+
+    def setUp(self):
+        autocomplete.clear_cache()
+
+    def test_suggests_public_events_venues_and_categories(self):
+        suggestions = autocomplete.suggest('Har')
+
+        self.assertEqual([e['title'] for e in suggestions['events']], ['Harbour Gig'])
+        self.assertEqual(suggestions['venues'], ['Harbour Gallery'])
+        self.assertEqual(autocomplete.suggest('night')['categories'][0]['slug'], 'music')
+
+    def test_fuzzy_word_matches_top_up_prefix_matches(self):
+        titles = [e['title'] for e in autocomplete.suggest('jazz')['events']]
+
+        self.assertEqual(titles, ['Sunset Jazz Night'])
+
+    def test_fuzzy_venue_matches_top_up_prefix_matches(self):
+        self.assertEqual(autocomplete.suggest('hous')['venues'], ['Opera House'])
+
+    def test_short_prefixes_skip_the_database(self):
+        with self.assertNumQueries(0):
+            self.assertEqual(autocomplete.suggest('h')['events'], [])
+
+    def test_hot_prefixes_are_served_from_memory(self):
+        autocomplete.suggest('harb')
+
+        with self.assertNumQueries(0):
+            autocomplete.suggest('  HARB ')
+
+    def test_endpoint_returns_json(self):
+        response = self.client.get(reverse('event_management:event_autocomplete'), {'q': 'opera'}, secure=True)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['venues'], ['Opera House'])
+
+    def test_endpoint_drops_nul_characters(self):
+        response = self.client.get(f"{reverse('event_management:event_autocomplete')}?q=harb%00", secure=True)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['venues'], ['Harbour Gallery'])
+
+
+class RecommendationServiceTests(EventTestMixin, TestCase):
+    """Tests for precomputed similar events."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.organizer = cls.create_organizer()
+        cls.music = cls.create_category()
+        cls.sport = cls.create_category('Sport', 'sport')
+        cls.jazz = cls.create_event('Sunset Jazz Night', cls.organizer, cls.music,
+                                    description='Live jazz quartet on the pier')
+        cls.blues = cls.create_event('Jazz and Blues Evening', cls.organizer, cls.music,
+                                     description='Smooth jazz and blues with a live band')
+        cls.rock = cls.create_event('Rock Gig', cls.organizer, cls.music,
+                                    description='Loud guitars and a live band')
+        cls.race = cls.create_event('Island Half Marathon', cls.organizer, cls.sport,
+                                    description='Half marathon around the island coast')
+        cls.swim = cls.create_event('Island Coastal Swim', cls.organizer, cls.sport,
+                                    description='Open water swim along the coast')
+
+    def test_build_ranks_the_closest_events_first(self):
+        RecommendationService.build(top_k=2)
+
+        links = SimilarEvent.objects.filter(event=self.jazz).order_by('rank')
+        self.assertEqual(links[0].similar, self.blues)
+        self.assertNotIn(self.jazz.pk, [link.similar_id for link in links])
+        race_links = SimilarEvent.objects.filter(event=self.race).order_by('rank')
+        self.assertEqual(race_links[0].similar, self.swim)
+
+    def test_build_replaces_previous_recommendations(self):
+        RecommendationService.build(top_k=2)
+        RecommendationService.build(top_k=1)
+
+        self.assertEqual(SimilarEvent.objects.filter(event=self.jazz).count(), 1)
+
+    def test_related_events_is_a_single_query_over_public_events(self):
+        RecommendationService.build(top_k=3)
+        Event.objects.filter(pk=self.blues.pk).update(is_active=False)
+
+        with self.assertNumQueries(1):
+            related = RecommendationService.related_events(self.jazz)
+
+        self.assertNotIn(self.blues, related)
+        self.assertIn(self.rock, related)
+
+    def test_event_detail_shows_related_events(self):
+        call_command('build_recommendations', stdout=StringIO())
+
+        response = self.client.get(self.jazz.get_absolute_url(), secure=True)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['related_events'][0], self.blues)
+
+
+class ICalendarTests(EventTestMixin, TestCase):
+    """Tests for .ics downloads and subscription feeds."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.organizer = cls.create_organizer()
+        cls.music = cls.create_category()
+        cls.sport = cls.create_category('Sport', 'sport')
+        cls.gig = cls.create_event('Gig; Jazz, Blues', cls.organizer, cls.music,
+                                   description='Line one\nLine two')
+        cls.race = cls.create_event('Harbour Race', cls.organizer, cls.sport)
+
+    def test_text_is_escaped_and_lines_are_folded(self):
+        self.assertEqual(escape_text('a;b,c\\d\ne'), 'a\\;b\\,c\\\\d\\ne')
+
+        folded = fold_line('DESCRIPTION:' + 'é' * 100)
+        lines = folded.split('\r\n')
+        self.assertTrue(all(len(line.encode('utf-8')) <= 75 for line in lines))
+        self.assertTrue(lines[1].startswith(' '))
+        self.assertEqual(''.join(line[1:] if i else line for i, line in enumerate(lines)),
+                         'DESCRIPTION:' + 'é' * 100)
+
+    def test_download_escapes_event_text(self):
+        response = self.client.get(
+            reverse('event_management:download_ics', args=[self.gig.slug]), secure=True
+        )
+
+        self.assertIn('SUMMARY:Gig\\; Jazz\\, Blues\r\n', response.content.decode())
+        self.assertIn('DESCRIPTION:Line one\\nLine two\r\n', response.content.decode())
+
+    def test_feeds_stream_their_events(self):
+        response = self.client.get(reverse('event_management:calendar_feed'), secure=True)
+        body = b''.join(response.streaming_content).decode()
+
+        self.assertEqual(body.count('BEGIN:VEVENT'), 2)
+        self.assertTrue(body.endswith('END:VCALENDAR\r\n'))
+
+        url = reverse('event_management:category_calendar_feed', args=['sport'])
+        body = b''.join(self.client.get(url, secure=True).streaming_content).decode()
+        self.assertIn('SUMMARY:Harbour Race', body)
+        self.assertNotIn('Gig', body)
+
+        url = reverse('event_management:organizer_calendar_feed', args=[self.organizer.pk])
+        body = b''.join(self.client.get(url, secure=True).streaming_content).decode()
+        self.assertEqual(body.count('BEGIN:VEVENT'), 2)
+
+    def test_unchanged_feed_answers_304_from_one_query(self):
+        url = reverse('event_management:calendar_feed')
+        etag = self.client.get(url, secure=True)['ETag']
+
+        with self.assertNumQueries(1):
+            response = self.client.get(url, secure=True, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+        self.race.title = 'Harbour Relay'
+        self.race.save()
+        response = self.client.get(url, secure=True, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+
+MEDIA_ROOT = tempfile.mkdtemp()
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT, IMAGE_VARIANTS_ASYNC=False)
+class ImageVariantTests(EventTestMixin, TestCase):
+    """Tests for the responsive image variant pipeline."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.organizer = cls.create_organizer()
+        cls.music = cls.create_category()
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+        super().tearDownClass()
+
+    def upload(self, size=(1000, 600), mode='RGBA'):
+        buffer = BytesIO()
+        Image.new(mode, size, (200, 40, 40, 255)[:len(mode)]).save(buffer, 'PNG')
+        return SimpleUploadedFile('poster.png', buffer.getvalue(), content_type='image/png')
+
+    def test_upload_builds_hashed_variants_after_commit(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            event = self.create_event('Harbour Gig', self.organizer, self.music, image=self.upload())
+
+        event.refresh_from_db()
+        variants = event.image_variants
+        self.assertEqual(variants['source'], event.image.name)
+        # Never upscaled past the 1000px original
+        self.assertEqual([w for w, _ in variants['card']['webp']], [480, 960])
+        self.assertEqual([w for w, _ in variants['hero']['jpeg']], [960])
+        width, name = variants['card']['jpeg'][0]
+        self.assertIn(variants['hash'], name)
+        with default_storage.open(name) as stored:
+            self.assertEqual(Image.open(stored).size, (480, 300))
+
+    def test_tag_renders_srcset_and_falls_back_to_original(self):
+        event = self.create_event('Harbour Gig', self.organizer, self.music, image=self.upload())
+        tag = Template("{% load event_images %}{% event_picture event 'card' class='cover' %}")
+
+        html = tag.render(Context({'event': event}))
+        self.assertIn(f'src="{event.image.url}"', html)
+        self.assertNotIn('srcset', html)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            event.save()
+        event.refresh_from_db()
+        html = tag.render(Context({'event': event}))
+        self.assertIn('<source type="image/webp"', html)
+        self.assertIn(' 960w', html)
+        self.assertIn('class="cover"', html)
+        self.assertIn('alt="Harbour Gig"', html)
+
+
+class PricingServiceTests(TestCase):
+    """Tests for the compiled tier table and batch quoting."""
+
+    def tearDown(self):
+        PricingService.reload()
+
+    def test_tier_lookup_uses_inclusive_boundaries(self):
+        names = [PricingService.get_tier_for_capacity(c)['name'] for c in (1, 50, 51, 200, 201, 10 ** 7)]
+
+        self.assertEqual(names, ['Community', 'Community', 'Small', 'Small', 'Medium', 'Large'])
+
+    def test_batch_quotes_match_single_quotes(self):
+        capacities = [1, 10, 50, 51, 199, 200, 333, 500, 501, 5000, 120]
+        prices = ['0', '0.01', '2.50', '9.99', '10', '12.345', '25', '0.37', '100', '7.77', Decimal('-1')]
+
+        quotes = PricingService.quote_fees(capacities, prices)
+
+        expected = [
+            PricingService.calculate_event_fee(capacity, ticket_price=price)
+            for capacity, price in zip(capacities, prices)
+        ]
+        self.assertEqual(quotes, expected)
+        self.assertEqual(str(quotes[3][0]), '17.83')
+
+    def test_batch_quotes_handle_very_large_amounts(self):
+        quotes = PricingService.quote_fees([999999], ['99999999999.99'])
+
+        self.assertEqual(quotes, [PricingService.calculate_event_fee(999999, ticket_price='99999999999.99')])
+
+    def test_tiers_are_compiled_once_until_reloaded(self):
+        PricingService.get_tier_table()
+
+        with mock.patch.dict('os.environ', {'TIER_1_PERCENTAGE': '5.25'}):
+            self.assertEqual(PricingService.get_tier_for_capacity(10)['percentage'], Decimal('4.0'))
+            PricingService.reload()
+            self.assertEqual(PricingService.get_tier_for_capacity(10)['percentage'], Decimal('5.25'))
+            fee, tier = PricingService.quote_fees([40], ['11.11'])[0]
+            self.assertEqual((fee, tier), PricingService.calculate_event_fee(40, ticket_price='11.11'))
@@ -8,8 +8,12 @@ urlpatterns = [
     path('', views.event_list, name='event_list'),
     path('pricing/', views.event_pricing, name='event-pricing'),
     path('search/', views.event_search, name='event_search'),
+    path('autocomplete/', views.event_autocomplete, name='event_autocomplete'),
     path('create/', views.create_event, name='create_event'),
     path('organizer/dashboard/', views.organizer_dashboard, name='organizer_dashboard'),
+    path('calendar.ics', views.calendar_feed, name='calendar_feed'),
+    path('category/<slug:slug>/calendar.ics', views.category_calendar_feed, name='category_calendar_feed'),
+    path('organizer/<int:organizer_id>/calendar.ics', views.organizer_calendar_feed, name='organizer_calendar_feed'),
     path('<slug:slug>/ics/', views.download_ics, name='download_ics'),
     path('<slug:slug>/', views.event_detail, name='event_detail'),  # Keep slug at the end
 ]
@@ -5,7 +5,8 @@ from .models import Event
 from authentication.models import Organizer
 
 def homepage(request):
-    return render(request, 'home.html')
+    from .homepage import HomepageService
+    return render(request, 'home.html', HomepageService.get_context())
 
 @login_required
 def organizer_dashboard(request):
@@ -45,8 +46,25 @@ def create_event(request):
     })
 
 def event_list(request):
-    events = Event.objects.filter(status='approved')
-    return render(request, 'event_management/event_list.html', {'events': events})
+    from .facets import EventFacets
+    from .filters import EventFilter
+
+    event_filter = EventFilter(request.GET)
+    page = event_filter.paginator().page(request.GET.get('cursor'), params=request.GET)
+
+    categories = EventFacets.categories()
+    facets = EventFacets.for_filter(event_filter, categories)
+    for category in categories:
+        category.facet_count = facets['categories'].get(category.slug, 0)
+
+    context = event_filter.as_context()
+    context.update({
+        'page_obj': page,
+        'total_events': facets['total'],
+        'categories': categories,
+        'facets': facets,
+    })
+    return render(request, 'event_management/event_list.html', context)
 
 
 def event_pricing(request):
@@ -55,39 +73,128 @@ def event_pricing(request):
 
 def event_detail(request, slug):
     from django.shortcuts import get_object_or_404
+    from booking.waiting_room import WaitingRoom
+    from .recommendations import RecommendationService
     event = get_object_or_404(Event, slug=slug)
+    if event.waiting_room_enabled and not WaitingRoom.is_admitted(request, event.pk):
+        return redirect('booking:waiting_room', event_id=event.pk)
     return render(request, 'event_management/event_detail.html', {
-        'event': event
+        'event': event,
+        'related_events': RecommendationService.related_events(event),
     })
 
 def event_search(request):
-    from django.shortcuts import redirect
-    # Simple search redirect to event list with search param
-    return redirect('event_management:event_list')
+    from .models import Category
+    from .search import EventSearchService, normalize_query
+
+    query = normalize_query(request.GET.get('q') or request.GET.get('search'))
+    if not query:
+        return redirect('event_management:event_list')
+
+    page = EventSearchService.search(
+        query,
+        cursor=request.GET.get('cursor'),
+        params=request.GET,
+    )
+    return render(request, 'event_management/event_list.html', {
+        'page_obj': page,
+        'search_query': query,
+        'search_mode': page.mode,
+        'total_events': page.paginator.count,
+        'categories': Category.objects.all(),
+    })
+
+
+def event_autocomplete(request):
+    """Typeahead suggestions as JSON, or an HTML fragment for HTMX requests"""
+    from django.http import JsonResponse
+    from django.utils.cache import patch_cache_control
+    from .autocomplete import suggest
+
+    prefix = request.GET.get('q') or request.GET.get('search', '')
+    suggestions = suggest(prefix)
+
+    if getattr(request, 'htmx', False):
+        response = render(request, 'event_management/partials/autocomplete.html', suggestions)
+    else:
+        response = JsonResponse(suggestions)
+    patch_cache_control(response, public=True, max_age=60)
+    return response
 
 
 def download_ics(request, slug):
     from django.http import HttpResponse
     from django.shortcuts import get_object_or_404
-    import datetime
-    
-    event = get_object_or_404(Event, slug=slug)
-    
-    # Create ICS content
-    ics_content = f"""BEGIN:VCALENDAR
-VERSION:2.0
-PRODID:-//Jersey Events//EN
-BEGIN:VEVENT
-UID:{event.id}@jerseyevents.com
-DTSTAMP:{datetime.datetime.now().strftime('%Y%m%dT%H%M%SZ')}
-DTSTART:{event.date.strftime('%Y%m%dT%H%M%S')}
-DTEND:{event.end_date.strftime('%Y%m%dT%H%M%S') if event.end_date else event.date.strftime('%Y%m%dT%H%M%S')}
-SUMMARY:{event.title}
-DESCRIPTION:{event.description[:100]}...
-LOCATION:{event.venue}, {event.address}
-END:VEVENT
-END:VCALENDAR"""
-    
-    response = HttpResponse(ics_content, content_type='text/calendar')
+    from .ical import render_event
+
+    event = get_object_or_404(Event.objects.select_related('category'), slug=slug)
+
+    response = HttpResponse(
+        render_event(event, base_url=request.build_absolute_uri('/').rstrip('/')),
+        content_type='text/calendar; charset=utf-8',
+    )
     response['Content-Disposition'] = f'attachment; filename="{event.slug}.ics"'
     return response
+
+
+def _ics_feed(request, events, key, name):
+    """
+    Stream ``events`` as a subscribable calendar, answering conditional
+    requests with a 304 before any event is rendered.
+    """
+    from django.http import StreamingHttpResponse
+    from django.utils.cache import get_conditional_response, patch_cache_control
+    from django.utils.http import http_date, quote_etag
+    from .ical import FEED_MAX_AGE, feed_validators, stream_calendar
+
+    etag, last_modified = feed_validators(events, key)
+    etag = quote_etag(etag)
+    timestamp = int(last_modified.timestamp()) if last_modified else None
+
+    response = get_conditional_response(request, etag=etag, last_modified=timestamp)
+    if response is None:
+        response = StreamingHttpResponse(
+            stream_calendar(
+                events.order_by('date', 'id'),
+                name=name,
+                base_url=request.build_absolute_uri('/').rstrip('/'),
+            ),
+            content_type='text/calendar; charset=utf-8',
+        )
+        response['Content-Disposition'] = f'inline; filename="{key}.ics"'
+
+    response['ETag'] = etag
+    if timestamp is not None:
+        response['Last-Modified'] = http_date(timestamp)
+    patch_cache_control(response, public=True, max_age=FEED_MAX_AGE)
+    return response
+
+
+def calendar_feed(request):
+    """All public events as an iCalendar feed"""
+    return _ics_feed(request, Event.public.all(), 'jersey-events', 'Jersey Events')
+
+
+def category_calendar_feed(request, slug):
+    from django.shortcuts import get_object_or_404
+    from .models import Category
+
+    category = get_object_or_404(Category, slug=slug)
+    return _ics_feed(
+        request,
+        Event.public.filter(category=category),
+        f'category-{category.slug}',
+        f'Jersey Events: {category.name}',
+    )
+
+
+def organizer_calendar_feed(request, organizer_id):
+    from django.shortcuts import get_object_or_404
+
+    organizer = get_object_or_404(Organizer, pk=organizer_id)
+    return _ics_feed(
+        request,
+        Event.public.filter(organizer=organizer),
+        f'organizer-{organizer.pk}',
+        f'{organizer.company_name} Events',
+    )
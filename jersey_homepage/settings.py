@@ -61,6 +61,7 @@ INSTALLED_APPS = [
     'django.contrib.messages',
     'django.contrib.staticfiles',
     'django.contrib.humanize',  # Add this
+    'django.contrib.postgres',  # Full-text search and trigram lookups
     #'authentication',  # Your existing auth app
     #'event_management',
     #'booking', 
@@ -126,6 +127,64 @@ DATABASES = {
     )
 }
 
+# Cache (homepage data). Use Redis when REDIS_URL is set so invalidation
+# reaches every worker; fall back to a per-process cache for development.
+REDIS_URL = config('REDIS_URL', default='')
+if REDIS_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': REDIS_URL,
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+
+# Rendered ticket QR codes (booking.qr): a per-process LRU of QR_CACHE_SIZE
+# images in front of a file cache shared by the workers on this host.
+QR_CACHE_SIZE = config('QR_CACHE_SIZE', default=1024, cast=int)
+CACHES['qr'] = {
+    'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+    'LOCATION': config('QR_CACHE_DIR', default=str(BASE_DIR / 'cache' / 'qr')),
+    'TIMEOUT': None,
+    'OPTIONS': {'MAX_ENTRIES': config('QR_CACHE_MAX_ENTRIES', default=50000, cast=int)},
+}
+# Batch rendering (regenerate_ticket_qr_codes, the admin action): worker
+# processes (0 = one per CPU) and tickets per worker task.
+QR_RENDER_WORKERS = config('QR_RENDER_WORKERS', default=0, cast=int)
+QR_RENDER_CHUNK_SIZE = config('QR_RENDER_CHUNK_SIZE', default=250, cast=int)
+
+# Signed ticket codes (booking.ticket_codes). The secret defaults to SECRET_KEY;
+# old TKT... ticket numbers are accepted until TICKET_LEGACY_CODES_UNTIL
+# (YYYY-MM-DD), or indefinitely while it is unset.
+TICKET_CODE_SECRET = config('TICKET_CODE_SECRET', default='')
+TICKET_LEGACY_CODES_UNTIL = config('TICKET_LEGACY_CODES_UNTIL', default='')
+
+# How long a user's permission to scan tickets for an event is cached (booking.validation)
+TICKET_SCAN_PERMISSION_TIMEOUT = config('TICKET_SCAN_PERMISSION_TIMEOUT', default=300, cast=int)
+
+# Offline gate manifests (booking.gate_manifest). Scanner devices verify
+# manifests with GATE_MANIFEST_SECRET, which is required and must not be SECRET_KEY.
+GATE_MANIFEST_SECRET = config('GATE_MANIFEST_SECRET', default='')
+GATE_MANIFEST_CACHE_SECONDS = config('GATE_MANIFEST_CACHE_SECONDS', default=30, cast=int)
+
+# How long adding tickets to a cart holds them for that cart (booking.inventory)
+CART_HOLD_MINUTES = config('CART_HOLD_MINUTES', default=10, cast=int)
+
+# Where carts are kept between requests (booking.cart_storage). Set
+# CART_STORAGE=booking.cart_storage.RedisCartStorage to keep them out of Postgres.
+CART_STORAGE = config('CART_STORAGE', default='booking.cart_storage.DatabaseCartStorage')
+CART_REDIS_URL = config('CART_REDIS_URL', default=REDIS_URL or 'redis://localhost:6379/0')
+
+# Waiting room for events with waiting_room_enabled (booking.waiting_room).
+# Queue state is kept in CACHES['default'], so set REDIS_URL in production.
+WAITING_ROOM_TOKEN_MAX_AGE = config('WAITING_ROOM_TOKEN_MAX_AGE', default=60 * 60 * 3, cast=int)
+WAITING_ROOM_POLL_SECONDS = config('WAITING_ROOM_POLL_SECONDS', default=5, cast=int)
+
 # Password validation
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -4,3 +4,8 @@ from django.apps import AppConfig
 class PaymentsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'payments'
+
+    def ready(self):
+        # Parse the platform fee tiers at startup so bad settings fail fast
+        from .platform_fees import get_fee_table
+        get_fee_table()
@@ -0,0 +1,138 @@
+# payments/platform_fees.py
+"""Platform fee charged on ticket orders."""
+
+import threading
+from bisect import bisect_left
+from decimal import ROUND_HALF_UP, Decimal
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.core.signals import setting_changed
+from django.db.models import Case, DecimalField, F, Q, Sum, Value, When
+from django.db.models.functions import Greatest, Least, Round
+from django.dispatch import receiver
+
+PENNY = Decimal('0.01')
+TIER_COUNT = 4
+FEE_FIELD = DecimalField(max_digits=10, decimal_places=2)
+RATE_FIELD = DecimalField(max_digits=9, decimal_places=6)
+
+
+def _decimal(name, value):
+    try:
+        return Decimal(str(value))
+    except ArithmeticError:
+        raise ImproperlyConfigured(f'{name} must be a number, got {value!r}')
+
+
+class FeeTable:
+    """Tier boundaries and rates parsed from settings"""
+
+    def __init__(self, boundaries, rates, minimum):
+        if len(rates) != len(boundaries) + 1:
+            raise ImproperlyConfigured('Platform fees need one more rate than tier maximum')
+        if list(boundaries) != sorted(boundaries):
+            raise ImproperlyConfigured('PLATFORM_FEE_TIER_<n>_MAX values must increase')
+        self.boundaries = list(boundaries)  # inclusive upper bound of each tier but the last
+        self.rates = list(rates)
+        self.minimum = minimum
+
+    @classmethod
+    def from_settings(cls):
+        boundaries = [
+            _decimal(f'PLATFORM_FEE_TIER_{n}_MAX', getattr(settings, f'PLATFORM_FEE_TIER_{n}_MAX'))
+            for n in range(1, TIER_COUNT)
+        ]
+        rates = [
+            _decimal(f'PLATFORM_FEE_TIER_{n}_RATE', getattr(settings, f'PLATFORM_FEE_TIER_{n}_RATE'))
+            for n in range(1, TIER_COUNT + 1)
+        ]
+        minimum = _decimal('PLATFORM_FEE_MINIMUM', getattr(settings, 'PLATFORM_FEE_MINIMUM', 0))
+        return cls(boundaries, rates, minimum.quantize(PENNY, rounding=ROUND_HALF_UP))
+
+    def rate_for(self, amount):
+        return self.rates[bisect_left(self.boundaries, amount)]
+
+    def fee_for(self, amount):
+        if amount <= 0:
+            return Decimal('0.00')
+        fee = (amount * self.rate_for(amount)).quantize(PENNY, rounding=ROUND_HALF_UP)
+        return min(max(fee, self.minimum), amount)
+
+
+_table = None
+_table_lock = threading.Lock()
+
+
+def get_fee_table():
+    """The parsed fee table, built on first use"""
+    global _table
+    table = _table
+    if table is None:
+        with _table_lock:
+            if _table is None:
+                _table = FeeTable.from_settings()
+            table = _table
+    return table
+
+
+@receiver(setting_changed)
+def _reset_fee_table(setting, **kwargs):
+    global _table
+    if setting.startswith('PLATFORM_FEE_'):
+        with _table_lock:
+            _table = None
+
+
+def calculate_platform_fee(amount):
+    """Platform fee for an order total, as ``Decimal`` rounded to the penny"""
+    amount = Decimal(str(amount or 0)).quantize(PENNY, rounding=ROUND_HALF_UP)
+    return get_fee_table().fee_for(amount)
+
+
+def platform_fee_expression(amount_field='total_amount'):
+    """SQL expression for ``calculate_platform_fee(<amount_field>)``"""
+    table = get_fee_table()
+    amount = F(amount_field)
+
+    def percent_of(rate):
+        # NUMERIC round() in Postgres rounds half away from zero (half-up here)
+        return Round(amount * Value(rate, output_field=RATE_FIELD), 2, output_field=FEE_FIELD)
+
+    tiered = Case(
+        *[
+            When(Q(**{f'{amount_field}__lte': boundary}), then=percent_of(rate))
+            for boundary, rate in zip(table.boundaries, table.rates)
+        ],
+        default=percent_of(table.rates[-1]),
+        output_field=FEE_FIELD,
+    )
+    fee = Least(Greatest(tiered, Value(table.minimum, output_field=FEE_FIELD)), amount, output_field=FEE_FIELD)
+    return Case(
+        When(Q(**{f'{amount_field}__lte': 0}), then=Value(Decimal('0.00'), output_field=FEE_FIELD)),
+        default=fee,
+        output_field=FEE_FIELD,
+    )
+
+
+def annotate_platform_fees(queryset, amount_field='total_amount'):
+    """
+    Annotate each order in ``queryset`` with ``platform_fee`` and
+    ``organizer_payout_amount`` computed by the database (the latter named
+    so it doesn't shadow ``Order.organizer_payout()``).
+    """
+    return queryset.annotate(
+        platform_fee=platform_fee_expression(amount_field),
+    ).annotate(
+        organizer_payout_amount=F(amount_field) - F('platform_fee'),
+    )
+
+
+def summarize_platform_fees(queryset, amount_field='total_amount'):
+    """Totals of order value, platform fees and payouts in one aggregate query"""
+    totals = annotate_platform_fees(queryset, amount_field).aggregate(
+        gross=Sum(amount_field),
+        platform_fees=Sum('platform_fee'),
+        organizer_payouts=Sum('organizer_payout_amount'),
+    )
+    return {key: value if value is not None else Decimal('0.00') for key, value in totals.items()}
@@ -2,9 +2,16 @@ from decimal import Decimal
 from types import SimpleNamespace
 from unittest.mock import MagicMock, patch
 
-from django.test import TestCase
+from django.test import TestCase, override_settings
+
+from booking.models import Order
 
 from payments.paypal_platform import PayPalPlatformService
+from payments.platform_fees import (
+    annotate_platform_fees,
+    calculate_platform_fee,
+    summarize_platform_fees,
+)
 
 
 class PayPalPlatformServiceTests(TestCase):
@@ -81,3 +88,47 @@ class PayPalPlatformServiceTests(TestCase):
         self.assertIn("error", result)
         mock_payment.execute.assert_called_once_with({"payer_id": "PAYER1"})
         MockPayment.find.assert_called_once_with("ORDER1")
+
+
+class PlatformFeeTests(TestCase):
+    """Tests for the tiered platform fee engine."""
+
+    AMOUNTS = ['0', '0.30', '5.00', '6.25', '100.00', '500.00', '500.01', '1234.56',
+               '600.75', '2000.00', '4999.99', '5000.01', '12345.67']
+
+    def test_fees_follow_the_tiers(self):
+        fees = {amount: calculate_platform_fee(Decimal(amount)) for amount in self.AMOUNTS}
+
+        self.assertEqual(fees['0'], Decimal('0.00'))
+        self.assertEqual(fees['0.30'], Decimal('0.30'))    # never more than the order
+        self.assertEqual(fees['5.00'], Decimal('0.50'))    # minimum fee
+        self.assertEqual(fees['6.25'], Decimal('0.50'))
+        self.assertEqual(fees['500.00'], Decimal('40.00'))  # tier 1 is inclusive
+        self.assertEqual(fees['500.01'], Decimal('30.00'))
+        self.assertEqual(fees['1234.56'], Decimal('74.07'))  # 74.0736
+        self.assertEqual(fees['5000.01'], Decimal('150.00'))
+
+    def test_rounding_is_half_up(self):
+        self.assertEqual(calculate_platform_fee(Decimal('600.75')), Decimal('36.05'))  # 36.045
+
+    @override_settings(PLATFORM_FEE_TIER_1_RATE='0.10', PLATFORM_FEE_MINIMUM='1')
+    def test_settings_changes_rebuild_the_table(self):
+        self.assertEqual(calculate_platform_fee(Decimal('100')), Decimal('10.00'))
+        self.assertEqual(calculate_platform_fee(Decimal('5')), Decimal('1.00'))
+
+    def test_sql_annotation_matches_python(self):
+        for amount in self.AMOUNTS:
+            Order.objects.create(
+                email='buyer@example.com', first_name='Ann', last_name='Buyer',
+                total_amount=Decimal(amount),
+            )
+
+        orders = annotate_platform_fees(Order.objects.all())
+
+        for order in orders:
+            self.assertEqual(order.platform_fee, calculate_platform_fee(order.total_amount), order.total_amount)
+            self.assertEqual(order.organizer_payout_amount, order.organizer_payout())
+
+        totals = summarize_platform_fees(Order.objects.all())
+        self.assertEqual(totals['platform_fees'], sum(calculate_platform_fee(Decimal(a)) for a in self.AMOUNTS))
+        self.assertEqual(totals['organizer_payouts'], totals['gross'] - totals['platform_fees'])